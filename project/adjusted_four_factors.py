@@ -0,0 +1,194 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from fetch_games import load_games, load_team_ids
+from four_factors import normalize_data, calculate_four_factor_score, OFFENSIVE_FACTORS, DEFENSIVE_FACTORS, WEIGHTS
+
+# opponent-adjusted four factors
+# a team's raw four factors depend on who it played. Each factor is modeled as league average + the team's offense
+# effect + the average defense effect of its opponents (and the same the other way around for what it allowed),
+# and the effects are fit with ridge regression using the schedule from the game results stored by fetch_games.py.
+# every season and factor share one sparse block-diagonal design, so the normal matrix is factored once and all
+# the factors are solved together as columns of the right-hand side.
+
+# each factor as (offensive column, column of what the defense allowed)
+# DRB% is the share of the opponent's misses rebounded by the defense, so what it allowed is 100 - DRB% (the
+# opponent's ORB%)
+FACTOR_PAIRS = {
+    "eFG%": ("Off eFG%", "Def eFG%"),
+    "TOV%": ("Off TOV%", "Def TOV%"),
+    "ORB%": ("ORB%", "DRB%"),
+    "FT/FGA": ("Off FT/FGA%", "Def FT/FGA%")
+}
+
+
+def allowed(df, off_col, def_col):
+    return 100 - df[def_col] if off_col == "ORB%" else df[def_col]
+
+
+def schedule_weights(games, teams, team_ids):
+    """
+    Share of each team's regular season games played against every opponent.
+
+    Args:
+        games (dict): Columns from fetch_games.load_games.
+        teams (list): Team names, in row order.
+        team_ids (dict): Team name -> id.
+    Returns:
+        sp.csr_matrix: (teams x teams) row-normalized schedule matrix.
+    """
+    index = np.full(max(team_ids.values()) + 1, -1)
+    index[[team_ids[t] for t in teams]] = np.arange(len(teams))
+
+    regular = games["playoff"] == 0
+    home = index[games["home"][regular]]
+    away = index[games["away"][regular]]
+    if (home < 0).any() or (away < 0).any():
+        raise ValueError("Games include teams that are missing from the advanced stats table")
+
+    n = len(teams)
+    counts = sp.coo_matrix((np.ones(2 * len(home)), (np.concatenate([home, away]), np.concatenate([away, home]))),
+                           shape=(n, n)).tocsr()
+    played = np.asarray(counts.sum(axis=1)).ravel()
+    return sp.diags(1.0 / np.maximum(played, 1)) @ counts
+
+
+def season_design(W):
+    """
+    Design of one season: rows are the teams' offensive then allowed values, columns the offense then defense
+    effects. A team's offensive value loads on its own offense and on its opponents' defenses through W.
+
+    Args:
+        W (sp.csr_matrix): Row-normalized schedule matrix.
+    Returns:
+        sp.csr_matrix: (2 * teams x 2 * teams) design matrix.
+    """
+    I = sp.identity(W.shape[0], format="csr")
+    return sp.bmat([[I, W], [W, I]], format="csr")
+
+
+def fit_effects(designs, Y, alpha=0.05):
+    """
+    Ridge fit of the team effects of every season and factor in one solve. The seasons' designs are stacked
+    block-diagonally and the factors are the columns of Y, so (A'A + alpha * I) is factored once and reused for
+    all of them. The ridge penalty also pins down the level of each factor, which is shared between a team's
+    offense and its opponents' defenses and cannot be told apart by the data.
+
+    Args:
+        designs (list): Season design matrices from season_design.
+        Y (np.ndarray): Centered responses, (total rows x factors).
+        alpha (float): Ridge penalty.
+    Returns:
+        np.ndarray: Fitted effects, (total columns x factors).
+    """
+    A = sp.block_diag(designs, format="csc")
+    normal = (A.T @ A + alpha * sp.identity(A.shape[1], format="csc")).tocsc()
+    return splu(normal).solve(np.asarray(A.T @ Y))
+
+
+def load_season(year, team_ids):
+    """
+    Load a season's raw four factors and schedule.
+
+    Args:
+        year (int): Season.
+        team_ids (dict): Team name -> id.
+    Returns:
+        tuple: (advanced stats DataFrame, schedule matrix) or None if either is missing.
+    """
+    path = f"./data/{year}/adv_{year}.csv"
+    if not os.path.exists(path):
+        print(f"ERROR: File not found: {path}")
+        return None
+    games = load_games(year)
+    if games is None:
+        return None
+
+    df = pd.read_csv(path)
+    df = df[df["Team"] != "League Average"].reset_index(drop=True)
+    return df, schedule_weights(games, list(df["Team"]), team_ids)
+
+
+def adjust_seasons(start_year, end_year, alpha=0.05, norm="zscore"):
+    """
+    Fit opponent-adjusted four factors for a range of seasons and save them with an adjusted four factor score to
+    ./data/{year}/four_factors_adj_{year}.csv.
+
+    Args:
+        start_year (int): First season.
+        end_year (int): Last season.
+        alpha (float): Ridge penalty.
+        norm (str): Normalization method for the score (see four_factors.normalize_data).
+    """
+    team_ids = load_team_ids()
+    seasons, designs, blocks, means = [], [], [], []
+    for year in range(start_year, end_year + 1):
+        season = load_season(year, team_ids)
+        if season is None:
+            continue
+        df, W = season
+        # center every factor on the season's league average, both sides share the same average
+        Y = np.column_stack([np.concatenate([df[off], allowed(df, off, dfn)]) for off, dfn in FACTOR_PAIRS.values()])
+        mean = Y.mean(axis=0)
+        seasons.append((year, df))
+        designs.append(season_design(W))
+        blocks.append(Y - mean)
+        means.append(mean)
+
+    if not seasons:
+        print("No seasons with both advanced stats and game results.")
+        return
+
+    start = time.perf_counter()
+    effects = fit_effects(designs, np.vstack(blocks), alpha=alpha)
+    elapsed = time.perf_counter() - start
+
+    offset = 0
+    for (year, df), mean in zip(seasons, means):
+        n = len(df)
+        off_eff, def_eff = effects[offset:offset + n], effects[offset + n:offset + 2 * n]
+        offset += 2 * n
+
+        out = pd.DataFrame({"Team": df["Team"], "W": df["W"], "L": df["L"]})
+        out["W/L%"] = (df["W"] / (df["W"] + df["L"])).round(6)
+        # adjusted values are what the team would post against a league average opponent
+        for k, (off, dfn) in enumerate(FACTOR_PAIRS.values()):
+            out[off] = mean[k] + off_eff[:, k]
+            out[dfn] = 100 - (mean[k] + def_eff[:, k]) if off == "ORB%" else mean[k] + def_eff[:, k]
+
+        all_factors = OFFENSIVE_FACTORS + DEFENSIVE_FACTORS
+        out = out[["Team", "W", "L", "W/L%"] + all_factors]
+        normalized = normalize_data(out, norm, all_factors)
+        score = calculate_four_factor_score(normalized, WEIGHTS, all_factors)
+        out = out.rename(columns={col: f"Adj {col}" for col in all_factors})
+        out[[f"Adj {col}" for col in all_factors]] = out[[f"Adj {col}" for col in all_factors]].round(4)
+        out["Adj Four-Factor Score"] = score.round(6)
+
+        outpath = f"./data/{year}/four_factors_adj_{year}.csv"
+        out.to_csv(outpath, index=False)
+        print(f"Adjusted four factors for year {year} saved to: {outpath}")
+
+    print(f"Fit {len(seasons)} seasons x {len(FACTOR_PAIRS) * 2} factors in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2000, help="Start year to process")
+    parser.add_argument("--end_year", type=int, default=2024, help="End year to process")
+    parser.add_argument("--year", type=int, default=None, help="Year to process (if no date range is needed). Leave blank if a range is needed")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Ridge penalty on the team effects")
+    parser.add_argument("--norm", type=str, default="zscore", choices=["zscore", "min-max", "centered"],
+                        help="Normalization method to use on the adjusted four factors")
+    args = parser.parse_args()
+
+    start_yr = args.start_year
+    end_yr = args.end_year
+    if args.year is not None:
+        start_yr = args.year
+        end_yr = args.year
+
+    adjust_seasons(start_yr, end_yr, alpha=args.alpha, norm=args.norm)
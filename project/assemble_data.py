@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import os
 import argparse
+import tracing
+from tracing import traced
 
 # config for getting features of interest and filepaths
 # this config is applied to each years' data in a specified range, and that data is compiled into one dataset
@@ -18,6 +20,24 @@ CONFIG = {
         "srs": {
             "file_pattern": "srs_{year}.csv",
             "columns": ["Team", "SRS_norm"]
+        },
+        # optional files are only merged in when they exist (they need the game results from fetch_games.py)
+        # add their columns to "features" below to use them
+        "elo": {
+            "file_pattern": "elo_{year}.csv",  # from elo.py
+            "columns": ["Team", "Elo_norm"],
+            "optional": True
+        },
+        "form": {
+            "file_pattern": "form_{year}.csv",  # from form.py
+            "columns": ["Team", "Margin_L5", "Margin_L10", "Margin_L20", "Margin_EWM10",
+                        "Win%_L5", "Win%_L10", "Win%_L20", "Win%_EWM10"],
+            "optional": True
+        },
+        "four_factors_adj": {
+            "file_pattern": "four_factors_adj_{year}.csv",  # from adjusted_four_factors.py
+            "columns": ["Team", "Adj Four-Factor Score"],
+            "optional": True
         }
     },
     # column names of the final compiled dataset
@@ -25,6 +45,7 @@ CONFIG = {
     "features": ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
 }
 
+@traced()
 def load_csv(file_path, cols):
     """
     Load a CSV file and select given columns.
@@ -37,12 +58,14 @@ def load_csv(file_path, cols):
     """
     try:
         df = pd.read_csv(file_path)
+        tracing.count("rows", len(df))
         return df[cols]
     except Exception as e:
         print(f"ERROR: Unable to process file: {file_path}")
         return None
 
 
+@traced()
 def assemble_data(year, config, write=False):
     """
     Assemble data for a given year based on the provided configuration.
@@ -51,13 +74,15 @@ def assemble_data(year, config, write=False):
         year (int): Year for which the data will be processed.
         config (dict): Configuration for file patterns and columns.
     Returns:
-        pd.DataFrame: Combined DataFrame for the given year.
+        pd.DataFrame: Combined DataFrame for the given year, with a "Season" column.
     """
     base_path = f"./data/{year}/"
     merged_data = None
 
     for key, file_info in config['files'].items():
         filepath = os.path.join(base_path, file_info['file_pattern'].format(year=year))
+        if file_info.get('optional', False) and not os.path.exists(filepath):
+            continue
         df = load_csv(file_path=filepath, cols=file_info['columns'])
         
         if df is not None:
@@ -72,11 +97,42 @@ def assemble_data(year, config, write=False):
 
     if merged_data is not None:
         selected_cols = config['features'] + config['response_vars']
-        return merged_data[selected_cols]
+        missing = [col for col in selected_cols if col not in merged_data.columns]
+        if missing:
+            print(f"ERROR: Missing columns for year {year}: {missing}")
+            return None
+        return merged_data[selected_cols].assign(Season=year)
     else:
         print(f"ERROR: Failed to assemble data for year {year}.")
         return None
 
+@traced()
+def load_yearly_data(start_year, end_year):
+    """
+    Load the yearly compiled data (data_{year}.csv) for a range of years into one DataFrame,
+    keeping the season of each row.
+
+    Args:
+        start_year (int): First season to load.
+        end_year (int): Last season to load.
+    Returns:
+        pd.DataFrame: Combined DataFrame with a "Season" column (empty if no file was found).
+    """
+    frames = []
+    for year in range(start_year, end_year + 1):
+        file_path = f"./data/{year}/data_{year}.csv"
+        if not os.path.exists(file_path):
+            print(f"ERROR: File not found: {file_path}")
+            continue
+        df = pd.read_csv(file_path)
+        df["Season"] = year
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=["Season"])
+    return pd.concat(frames, ignore_index=True)
+
+@traced()
 def save_dataset(dataset, file_path):
     """
     Save a dataset to a CSV file.
@@ -96,9 +152,12 @@ if __name__ == "__main__":
     parser.add_argument("--start_year", type=int, default=None, help="Start year for the dataset. Specify this and end year to compile one dataset for the given range")
     parser.add_argument("--end_year", type=int, default=None, help="End year for the dataset. Specify this and start year to compile one dataset for the given range")
     parser.add_argument("--write", action="store_true", help="Whether to write the yearly data as a csv to its respective data folder.")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
 
     # parse params
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     train_start, train_end = map(int, args.train_years.split("-"))
     test_start, test_end = map(int, args.test_years.split("-"))
@@ -0,0 +1,382 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import pandas as pd
+import scraper
+from fetch_bballref_data import get_df
+from four_factors import compute_four_factors
+from srs import standardize_srs
+from nrtg import standardize_nrtg
+from assemble_data import assemble_data, load_yearly_data, save_dataset, CONFIG
+from linreg import train_linear_regression
+from svr import train_svr
+from rf import train_random_forest
+from gbm import train_gradient_boosting
+
+# end-to-end benchmark of the pipeline stages on committed fixture data
+# the fixtures (./benchmarks/fixtures) are the raw tables of a few seasons and a saved league page for the scraper.
+# Every stage runs in a scratch copy of the fixtures, in pipeline order, and is timed over several repeats after one
+# discarded warmup run (plus one extra run under tracemalloc for its peak memory). Each run is appended to
+# ./benchmarks/history.json and compared with ./benchmarks/baseline.json: a stage is flagged when its median time or
+# peak memory grew by more than the threshold.
+
+BENCHMARK_DIR = "./benchmarks"
+FIXTURE_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+HISTORY_PATH = os.path.join(BENCHMARK_DIR, "history.json")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+FIXTURE_YEARS = list(range(2020, 2025))
+TRAIN_YEARS = FIXTURE_YEARS[:-1]
+TEST_YEARS = FIXTURE_YEARS[-1:]
+FIXTURE_PAGE_YEAR = 2024
+RAW_TABLES = ["standings", "per_100_team", "per_100_opp", "adv", "shooting", "per_game_team", "per_game_opp"]
+
+FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+RESPONSE_VAR = "W/L%"
+
+# differences smaller than this are timer noise and never flagged
+MIN_DELTA_S = 0.002
+
+
+def _th(text, scope=None):
+    attrs = f' scope="{scope}"' if scope else ""
+    return f"<th{attrs}>{text}</th>"
+
+
+def _table(div_id, header_rows, body_rows):
+    head = "".join("<tr>" + "".join(_th(h) for h in row) + "</tr>" for row in header_rows)
+    body = "".join("<tr>" + "".join(row) + "</tr>" for row in body_rows)
+    return f'<div id="{div_id}"><table><thead>{head}</thead><tbody>{body}</tbody></table></div>\n'
+
+
+def _rank_rows(df):
+    # rank is a row header and the other cells are data cells, as on the site
+    return [[_th(row[0], "row")] + [f"<td>{v}</td>" for v in row[1:]] for row in df.itertuples(index=False)]
+
+
+def build_fixture_page(year, data_dir="./data"):
+    """
+    Rebuild a basketball-reference league page from a season's saved tables, with the div ids and header layout
+    the scraper parses (conference standings, per game, per 100 possessions, advanced and shooting tables).
+
+    Args:
+        year (int): Season.
+        data_dir (str): Directory of the yearly data folders.
+    Returns:
+        str: HTML of the page.
+    """
+    def read(table):
+        return pd.read_csv(os.path.join(data_dir, str(year), f"{table}_{year}.csv"), dtype=str, keep_default_na=False)
+
+    parts = [f"<html><head><title>{year - 1}-{str(year)[2:]} NBA Season Summary</title></head><body>\n"]
+
+    standings = read("standings")
+    for div, conf, rows in (("all_confs_standings_E", "Eastern Conference", standings.iloc[:15]),
+                            ("all_confs_standings_W", "Western Conference", standings.iloc[15:])):
+        body = [[_th(row[0], "row")] + [f"<td>{v}</td>" for v in row[1:]] for row in rows.itertuples(index=False)]
+        parts.append(_table(div, [[conf] + list(standings.columns[1:])], body))
+
+    for table, div in (("per_game_team", "div_per_game-team"), ("per_game_opp", "div_per_game-opponent")):
+        df = read(table)
+        parts.append(_table(div, [list(df.columns)], _rank_rows(df)))
+
+    for table, div in (("per_100_team", "div_per_poss-team"), ("per_100_opp", "div_per_poss-opponent")):
+        # the saved tables drop the minutes column, the page has it
+        df = read(table)
+        df.insert(3, "MP", [str(int(g) * 240) if g else "" for g in df["G"]])
+        parts.append(_table(div, [list(df.columns)], _rank_rows(df)))
+
+    adv = read("adv")
+    names = {"Off eFG%": "eFG%", "Off TOV%": "TOV%", "Off FT/FGA%": "FT/FGA",
+             "Def eFG%": "eFG%", "Def TOV%": "TOV%", "Def FT/FGA%": "FT/FGA"}
+    # blank spacer columns before each four factor group and before the arena, like the site
+    for col in ("Off eFG%", "Def eFG%", "Arena"):
+        adv.insert(adv.columns.get_loc(col), f"spacer {col}", "")
+    header = ["" if col.startswith("spacer") else names.get(col, col) for col in adv.columns]
+    parts.append(_table("div_advanced-team", [["", "", "Offense Four Factors", "Defense Four Factors", ""], header],
+                        _rank_rows(adv)))
+
+    shooting = read("shooting")
+    parents = ["", "% of FGA By Distance", "FG% By Distance", "% of FG Ast'd", "Dunks", "Layups", "Corner", "Heaves"]
+    header = [col.split(" - ")[-1] for col in shooting.columns]
+    parts.append(_table("div_shooting-team", [parents, header], _rank_rows(shooting)))
+
+    parts.append("</body></html>\n")
+    return "".join(parts)
+
+
+def make_fixtures(data_dir="./data", fixture_dir=FIXTURE_DIR):
+    """
+    Copy the raw tables of the fixture seasons and build the fixture league page.
+
+    Args:
+        data_dir (str): Directory of the yearly data folders.
+        fixture_dir (str): Output directory.
+    """
+    for year in FIXTURE_YEARS:
+        os.makedirs(os.path.join(fixture_dir, "data", str(year)), exist_ok=True)
+        for table in RAW_TABLES:
+            shutil.copy(os.path.join(data_dir, str(year), f"{table}_{year}.csv"),
+                        os.path.join(fixture_dir, "data", str(year), f"{table}_{year}.csv"))
+    with open(os.path.join(fixture_dir, f"NBA_{FIXTURE_PAGE_YEAR}.html"), "w") as f:
+        f.write(build_fixture_page(FIXTURE_PAGE_YEAR, data_dir))
+    print(f"Fixtures saved to: {fixture_dir}")
+
+
+class _FixtureResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+
+@contextlib.contextmanager
+def fixture_requests(page):
+    """
+    Serve the fixture page to the scraper instead of the network.
+    """
+    original = scraper.requests.get
+    scraper.requests.get = lambda url, headers=None: _FixtureResponse(page)
+    try:
+        yield
+    finally:
+        scraper.requests.get = original
+
+
+def pipeline_stages(page):
+    """
+    The benchmarked stages, in pipeline order. Each stage returns the number of rows it processed; the model
+    stages share the trained models through `state`.
+
+    Args:
+        page (bytes): Fixture league page.
+    Returns:
+        list: (stage name, function) pairs.
+    """
+    state = {}
+    url = f"https://www.basketball-reference.com/leagues/NBA_{FIXTURE_PAGE_YEAR}.html"
+
+    def parse_tables():
+        with fixture_requests(page):
+            return sum(len(get_df(table, url)) for table in RAW_TABLES)
+
+    def per_year(func):
+        def run():
+            for year in FIXTURE_YEARS:
+                func(year)
+            return 30 * len(FIXTURE_YEARS)
+        return run
+
+    def assemble():
+        train = pd.concat([assemble_data(year, CONFIG, write=True) for year in TRAIN_YEARS], ignore_index=True)
+        test = pd.concat([assemble_data(year, CONFIG, write=True) for year in TEST_YEARS], ignore_index=True)
+        save_dataset(train, "./data/train_data.csv")
+        save_dataset(test, "./data/test_data.csv")
+        state["train"], state["test"] = train, test
+        state["seasons"] = load_yearly_data(TRAIN_YEARS[0], TRAIN_YEARS[-1])
+        return len(train) + len(test)
+
+    def train(name, fit):
+        def run():
+            state[name] = fit(state["seasons"] if name == "gbm" else state["train"])
+            return len(state["train"])
+        return run
+
+    def predict(name):
+        def run():
+            data = pd.concat([state["train"], state["test"]], ignore_index=True)
+            state[name].predict(data[FEATURES])
+            return len(data)
+        return run
+
+    return [
+        ("scraper parse", parse_tables),
+        ("four_factors", per_year(compute_four_factors)),
+        ("srs", per_year(standardize_srs)),
+        ("nrtg", per_year(standardize_nrtg)),
+        ("assemble_data", assemble),
+        ("linreg train", train("linreg", lambda df: train_linear_regression(df, FEATURES, RESPONSE_VAR))),
+        ("linreg predict", predict("linreg")),
+        ("svr train", train("svr", lambda df: train_svr(df, FEATURES, RESPONSE_VAR))),
+        ("svr predict", predict("svr")),
+        ("rf train", train("rf", lambda df: train_random_forest(df, FEATURES, RESPONSE_VAR))),
+        ("rf predict", predict("rf")),
+        ("gbm train", train("gbm", lambda df: train_gradient_boosting(df, FEATURES, RESPONSE_VAR)[0])),
+        ("gbm predict", predict("gbm"))
+    ]
+
+
+def measure(func, repeat):
+    """
+    Time a stage over several repeats after a discarded warmup run (imports, file caches, lazy initialization), and
+    measure its peak traced memory in one more run.
+
+    Returns:
+        dict: Best and median wall time, rows, throughput and peak memory.
+    """
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {"best_s": min(times), "median_s": median, "rows": rows, "rows_per_s": rows / median,
+            "peak_mem_mb": peak / 2 ** 20}
+
+
+def run_benchmarks(repeat=5, fixture_dir=FIXTURE_DIR):
+    """
+    Run every stage on a scratch copy of the fixtures.
+
+    Args:
+        repeat (int): Timed runs per stage.
+        fixture_dir (str): Directory of the fixtures.
+    Returns:
+        dict: Stage name -> measurements.
+    """
+    with open(os.path.join(fixture_dir, f"NBA_{FIXTURE_PAGE_YEAR}.html"), "rb") as f:
+        page = f.read()
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        shutil.copytree(os.path.join(fixture_dir, "data"), os.path.join(scratch, "data"))
+        os.chdir(scratch)
+        try:
+            for name, func in pipeline_stages(page):
+                # the stages print their progress, keep the benchmark output readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = measure(func, repeat)
+                print(f"{name:<16} {results[name]['median_s'] * 1000:>9.2f} ms")
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, threshold, compare_time=True):
+    """
+    Flag the stages whose median time or peak memory grew by more than the threshold over the baseline.
+
+    Args:
+        results (dict): Stage measurements of this run.
+        baseline (dict): Stage measurements of the baseline run.
+        threshold (float): Allowed relative growth (0.25 = 25%).
+        compare_time (bool): Compare the times as well as the memory (only meaningful on the baseline's machine).
+    Returns:
+        list: Descriptions of the regressions.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if compare_time and current["median_s"] > base["median_s"] * (1 + threshold) and current["median_s"] - base["median_s"] > MIN_DELTA_S:
+            regressions.append(f"{name}: median time {base['median_s'] * 1000:.2f} -> {current['median_s'] * 1000:.2f} ms")
+        if current["peak_mem_mb"] > base["peak_mem_mb"] * (1 + threshold) and current["peak_mem_mb"] - base["peak_mem_mb"] > 0.1:
+            regressions.append(f"{name}: peak memory {base['peak_mem_mb']:.2f} -> {current['peak_mem_mb']:.2f} MB")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summary_table(results, baseline):
+    rows = []
+    for name, r in results.items():
+        base = baseline.get(name) if baseline else None
+        rows.append({
+            "stage": name,
+            "best ms": round(r["best_s"] * 1000, 2),
+            "median ms": round(r["median_s"] * 1000, 2),
+            "rows/s": round(r["rows_per_s"]),
+            "peak MB": round(r["peak_mem_mb"], 2),
+            "vs baseline": f"{r['median_s'] / base['median_s']:.2f}x" if base else ""
+        })
+    return pd.DataFrame(rows).to_string(index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative growth in time or memory over the baseline that counts as a regression")
+    parser.add_argument("--save_baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--no_history", action="store_true", help="Do not append this run to the history")
+    parser.add_argument("--make_fixtures", action="store_true", help="Rebuild the fixtures from ./data and exit")
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures()
+        exit()
+
+    results = run_benchmarks(repeat=args.repeat)
+
+    baseline = None
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline_run = json.load(f)
+        baseline = baseline_run["stages"]
+
+    run = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus",
+        "repeat": args.repeat,
+        "stages": results
+    }
+    # absolute times are only comparable on the machine and python version the baseline was recorded with
+    same_env = baseline is not None and all(baseline_run.get(key) == run[key] for key in ("machine", "python"))
+    run["regressions"] = compare(results, baseline, args.threshold, compare_time=same_env) if baseline else []
+
+    print()
+    print(summary_table(results, baseline))
+    if baseline is not None and not same_env and not args.save_baseline:
+        print(f"\nWARNING: The baseline was recorded on {baseline_run.get('machine')} with python {baseline_run.get('python')}, "
+              f"this run on {run['machine']} with python {run['python']}. Only peak memory is compared, "
+              f"re-record the baseline on this machine (--save_baseline) to compare times.")
+
+    if not args.no_history:
+        history = []
+        if os.path.exists(HISTORY_PATH):
+            with open(HISTORY_PATH) as f:
+                history = json.load(f)
+        history.append(run)
+        with open(HISTORY_PATH, "w") as f:
+            json.dump(history, f, indent=2)
+        print(f"\nRun appended to: {HISTORY_PATH}")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to: {BASELINE_PATH}")
+    elif baseline is None:
+        print("No baseline to compare with (use --save_baseline)")
+    elif run["regressions"]:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for regression in run["regressions"]:
+            print(f"  {regression}")
+        exit(1)
+    else:
+        print(f"No regressions beyond {args.threshold:.0%}")
@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import os
+from multiprocessing import Pool, shared_memory
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from tracing import traced
+
+# season-level bootstrap for the rf and svr scripts
+# the feature matrices live in shared memory so the worker processes read them without pickled copies
+
+# shared arrays attached in each worker process
+_shared = {}
+
+
+def _to_shared(arr):
+    """
+    Copy an array into a new shared memory block.
+
+    Args:
+        arr (np.ndarray): Array to share.
+    Returns:
+        tuple: (SharedMemory block, spec used by the workers to attach to it)
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _init_worker(specs):
+    # attach to the shared blocks once per worker
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shared[key] = (shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+
+
+def _fit_replicate(task):
+    """
+    Fit one bootstrap replicate on a resample of whole seasons and draw predictive values for the evaluation rows.
+    The residual noise added to the predictions comes from the out-of-bag seasons of the replicate: one of them is
+    drawn and its residuals are resampled for the evaluation rows. Random forests predict the out-of-bag season and
+    the evaluation rows in one pass per tree, and the per-tree predictions are reused for both the forest mean and
+    its monte carlo variance.
+
+    Args:
+        task (tuple): (seed, unfitted estimator)
+    Returns:
+        np.ndarray: Prediction, monte carlo variance of the prediction (0 for models other than random forests) and
+            residual noise, shape (3, n_eval).
+    """
+    seed, estimator = task
+    X = _shared["X"][1]
+    y = _shared["y"][1]
+    seasons = _shared["seasons"][1]
+    X_eval = _shared["X_eval"][1]
+
+    # resample seasons with replacement and take all the rows of each drawn season
+    rng = np.random.default_rng(seed)
+    unique_seasons = np.unique(seasons)
+    drawn = rng.choice(unique_seasons, size=len(unique_seasons), replace=True)
+    rows = np.concatenate([np.flatnonzero(seasons == s) for s in drawn])
+
+    model = clone(estimator)
+    if isinstance(model, RandomForestRegressor):
+        model.set_params(random_state=seed, n_jobs=1)
+    model.fit(X[rows], y[rows])
+
+    # residuals of a season the replicate was not trained on (in-bag if every season was drawn, which is very rare)
+    oob = np.setdiff1d(unique_seasons, drawn)
+    season = rng.choice(oob if len(oob) else unique_seasons)
+    season_rows = np.flatnonzero(seasons == season)
+    stacked = np.concatenate([X[season_rows], X_eval])
+
+    if isinstance(model, RandomForestRegressor):
+        per_tree = np.stack([tree.predict(stacked) for tree in model.estimators_])
+        pred = per_tree.mean(axis=0)
+        mc_var = per_tree[:, len(season_rows):].var(axis=0, ddof=1) / len(model.estimators_)
+    else:
+        pred = model.predict(stacked)
+        mc_var = np.zeros(len(X_eval))
+
+    resid = y[season_rows] - pred[:len(season_rows)]
+    return np.stack([pred[len(season_rows):], mc_var, rng.choice(resid, size=len(X_eval), replace=True)])
+
+
+@traced()
+def bootstrap_predictions(estimator, X, y, seasons, X_eval, n_boot=500, n_jobs=None, random_state=42):
+    """
+    Refit a model on n_boot season-level bootstrap resamples across a process pool.
+
+    Args:
+        estimator: Unfitted sklearn estimator with the hyperparameters of the point model.
+        X (np.ndarray): Training features.
+        y (np.ndarray): Training response.
+        seasons (np.ndarray): Season of each training row.
+        X_eval (np.ndarray): Rows to predict.
+        n_boot (int): Number of bootstrap replicates.
+        n_jobs (int): Number of worker processes (all cores if None).
+        random_state (int): Random state for reproducibility.
+    Returns:
+        list: Prediction, monte carlo variance and residual noise of each replicate (see _fit_replicate).
+    """
+    if len(np.unique(seasons)) < 2:
+        raise ValueError("The season bootstrap needs at least two training seasons")
+
+    arrays = {
+        "X": np.ascontiguousarray(X, dtype=np.float64),
+        "y": np.ascontiguousarray(y, dtype=np.float64),
+        "seasons": np.ascontiguousarray(seasons),
+        "X_eval": np.ascontiguousarray(X_eval, dtype=np.float64)
+    }
+    blocks = []
+    specs = {}
+    try:
+        for key, arr in arrays.items():
+            shm, spec = _to_shared(arr)
+            blocks.append(shm)
+            specs[key] = spec
+
+        seeds = np.random.SeedSequence(random_state).generate_state(n_boot)
+        tasks = [(int(seed), estimator) for seed in seeds]
+        with Pool(processes=n_jobs or os.cpu_count(), initializer=_init_worker, initargs=(specs,)) as pool:
+            preds = pool.map(_fit_replicate, tasks, chunksize=max(1, n_boot // (4 * (n_jobs or os.cpu_count()))))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return preds
+
+
+def percentile_intervals(preds, alpha=0.1):
+    """
+    Percentile prediction intervals from the bootstrap replicate predictions. For random forests the within-forest
+    variance of the tree predictions estimates the monte carlo noise of each replicate, and the replicate predictions
+    are shrunk towards their center to remove it before the residual noise is added, so small replicate forests give
+    the same intervals as large ones.
+
+    Args:
+        preds (list): Replicate predictions from bootstrap_predictions.
+        alpha (float): Miscoverage level (0.1 gives a 90% interval).
+    Returns:
+        tuple: (lower, upper) bounds as numpy arrays.
+    """
+    draws = np.stack(preds)  # (n_boot, 3, n_eval)
+    means = draws[:, 0]
+    mc_var = draws[:, 1].mean(axis=0)
+    if mc_var.any():
+        tot_var = means.var(axis=0, ddof=1)
+        shrink = np.sqrt(np.clip(1.0 - mc_var / np.maximum(tot_var, 1e-12), 0.0, 1.0))
+        center = means.mean(axis=0)
+        means = center + shrink * (means - center)
+
+    values = means + draws[:, 2]
+    lower = np.percentile(values, 100 * alpha / 2, axis=0)
+    upper = np.percentile(values, 100 * (1 - alpha / 2), axis=0)
+    return lower, upper
+
+
+def add_bootstrap_intervals(results, year, estimator, train_data, features, response_var, n_boot=500, alpha=0.1,
+                            n_jobs=None):
+    """
+    Add season-bootstrap prediction intervals on win% and wins to the results of evaluate_specific_year. The
+    replicates resample the seasons of the point model's own training set and refit its hyperparameters.
+
+    Args:
+        results (pd.DataFrame): Results from evaluate_specific_year.
+        year (int): Year that was evaluated.
+        estimator: Unfitted sklearn estimator with the hyperparameters of the point model.
+        train_data (pd.DataFrame): Training dataset of the point model, with a "Season" column.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        n_boot (int): Number of bootstrap replicates.
+        alpha (float): Miscoverage level (0.1 gives a 90% interval).
+        n_jobs (int): Number of worker processes (all cores if None).
+    Returns:
+        pd.DataFrame: Results with the interval columns added.
+    """
+    if "Season" not in train_data.columns:
+        raise ValueError("The training data has no Season column, recompile it with assemble_data.py")
+    seasons = train_data["Season"].to_numpy(dtype=np.int64)
+    X = train_data[features].to_numpy(dtype=np.float64)
+    y = train_data[response_var].to_numpy(dtype=np.float64)
+
+    df = pd.read_csv(f"./data/{year}/data_{year}.csv")
+    tot_games = df["W"] + df["L"]
+
+    preds = bootstrap_predictions(estimator, X, y, seasons, df[features].to_numpy(), n_boot=n_boot, n_jobs=n_jobs)
+    lower, upper = percentile_intervals(preds, alpha=alpha)
+
+    results["Win% Lower"] = lower
+    results["Win% Upper"] = upper
+    results["Wins Lower"] = (tot_games * lower).round(2)
+    results["Wins Upper"] = (tot_games * upper).round(2)
+    return results
@@ -0,0 +1,374 @@
+import argparse
+import json
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree, BallTree
+
+# historical team comparables
+# every team-season of a range of years is put in a KD-tree (or ball tree) over its features, standardized over
+# all the team-seasons and multiplied by a weight per feature, so the euclidean distance in the tree is the
+# weighted standardized distance. The index is saved as a directory:
+#   tree.pkl                 the scikit-learn KDTree / BallTree over the weighted standardized features
+#   X.npy                    raw features of every team-season
+#   teams.npy, seasons.npy   team and season of every row
+#   win_pct.npy              final W/L% of every row
+#   meta.json                features, standardization, weights and the years of the index
+# a query only loads these once, then each k-nearest-neighbor or radius lookup takes microseconds
+
+FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+RESPONSE_VAR = "W/L%"
+INDEX_DIR = "./models/comparables"
+ARRAYS = ["X", "teams", "seasons", "win_pct"]
+
+# yearly files the features are read from, in order: the compiled data, then the normalized four factors
+FEATURE_FILES = ["data_{year}.csv", "four_factors_{year}.csv"]
+
+
+def load_season(year, features):
+    """
+    Load the features and W/L% of every team in a season. Features that are not in data_{year}.csv (e.g. the
+    normalized per-factor columns) are taken from four_factors_{year}.csv.
+
+    Args:
+        year (int): Season.
+        features (list): Feature columns.
+    Returns:
+        pd.DataFrame: Team, Season, W/L% and the features, or None if a file or column is missing.
+    """
+    df = None
+    for pattern in FEATURE_FILES:
+        missing = [col for col in features if df is None or col not in df.columns]
+        if not missing:
+            break
+        file_path = os.path.join("./data", str(year), pattern.format(year=year))
+        if not os.path.exists(file_path):
+            continue
+        part = pd.read_csv(file_path)
+        if df is None:
+            df = part
+        else:
+            df = df.merge(part[["Team"] + [col for col in missing if col in part.columns]], on="Team", how="inner")
+    if df is None:
+        print(f"ERROR: File not found: ./data/{year}/{FEATURE_FILES[0].format(year=year)}")
+        return None
+
+    missing = [col for col in features + [RESPONSE_VAR] if col not in df.columns]
+    if missing:
+        print(f"ERROR: Missing columns for year {year}: {missing}")
+        return None
+    df["Season"] = year
+    return df[["Team", "Season", RESPONSE_VAR] + features].dropna().reset_index(drop=True)
+
+
+def parse_weights(items, features):
+    """
+    Parse feature weights given as feature=weight (features that are not listed keep a weight of 1).
+
+    Returns:
+        np.ndarray: Weight of each feature.
+    """
+    weights = dict.fromkeys(features, 1.0)
+    for item in items or []:
+        name, _, value = item.rpartition("=")
+        if name not in weights:
+            raise ValueError(f"Weight given for {name}, which is not a feature ({features})")
+        weights[name] = float(value)
+    return np.array([weights[col] for col in features])
+
+
+class ComparablesIndex:
+    """
+    Spatial index of historical team-seasons for nearest-neighbor and radius queries on weighted standardized
+    features.
+    """
+
+    def __init__(self, tree, X, teams, seasons, win_pct, meta):
+        self.tree = tree
+        self.X = X
+        self.teams = teams
+        self.seasons = seasons
+        self.win_pct = win_pct
+        self.meta = meta
+        self.features = meta["features"]
+        self.mean = np.asarray(meta["mean"])
+        self.std = np.asarray(meta["std"])
+        self.weights = np.asarray(meta["weights"])
+
+    @classmethod
+    def build(cls, df, features, weights=None, tree="kd", leaf_size=16):
+        """
+        Build the index over a table of team-seasons.
+
+        Args:
+            df (pd.DataFrame): Team, Season, W/L% and the feature columns.
+            features (list): Feature columns.
+            weights (np.ndarray): Weight of each feature in the distance (all 1 if None).
+            tree (str): "kd" for a KDTree, "ball" for a BallTree.
+            leaf_size (int): Leaf size of the tree.
+        Returns:
+            ComparablesIndex: The index.
+        """
+        X = df[features].to_numpy(dtype=np.float64)
+        mean, std = X.mean(axis=0), X.std(axis=0, ddof=1)
+        std[std == 0] = 1.0
+        weights = np.ones(len(features)) if weights is None else np.asarray(weights, dtype=np.float64)
+        Z = (X - mean) / std * weights
+        tree_cls = KDTree if tree == "kd" else BallTree
+
+        seasons = df["Season"].to_numpy(dtype=np.int32)
+        meta = {
+            "features": list(features), "mean": mean.tolist(), "std": std.tolist(), "weights": weights.tolist(),
+            "tree": tree, "leaf_size": leaf_size, "n_rows": len(df),
+            "start_year": int(seasons.min()), "end_year": int(seasons.max()),
+            # most rows in one season, how far a query has to look past its own season
+            "max_season_rows": int(np.bincount(seasons - seasons.min()).max())
+        }
+        return cls(tree_cls(Z, leaf_size=leaf_size), X, df["Team"].to_numpy(dtype=str), seasons,
+                   df[RESPONSE_VAR].to_numpy(dtype=np.float64), meta)
+
+    def save(self, index_dir=INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(index_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(index_dir, "tree.pkl"), "wb") as f:
+            pickle.dump(self.tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(index_dir, "meta.json"), "w") as f:
+            json.dump(self.meta, f, indent=2)
+        print(f"Comparables index saved to: {index_dir}")
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        if not os.path.exists(os.path.join(index_dir, "meta.json")):
+            print(f"ERROR: No comparables index in {index_dir} (build it with: comparables.py build)")
+            return None
+        arrays = {name: np.load(os.path.join(index_dir, f"{name}.npy")) for name in ARRAYS}
+        with open(os.path.join(index_dir, "tree.pkl"), "rb") as f:
+            tree = pickle.load(f)
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            meta = json.load(f)
+        index = cls(tree, meta=meta, **arrays)
+        # the first query of a loaded tree pays a few ms of one-time setup, do it here instead
+        index.tree.query(index.transform(index.X[:1]), k=1)
+        return index
+
+    def transform(self, X):
+        return (np.atleast_2d(np.asarray(X, dtype=np.float64)) - self.mean) / self.std * self.weights
+
+    def _excluded(self, idx, teams, seasons, other_seasons):
+        # the query team-season itself, or its whole season with other_seasons
+        same_season = self.seasons[idx] == np.asarray(seasons)[:, None]
+        if other_seasons:
+            return same_season
+        return same_season & (self.teams[idx] == np.asarray(teams)[:, None])
+
+    def kneighbors(self, X, k=5, teams=None, seasons=None, other_seasons=False):
+        """
+        k nearest team-seasons of every query row.
+
+        Args:
+            X (np.ndarray): Raw features of the queries (rows x features).
+            k (int): Number of comparables.
+            teams (list): Team of each query, with seasons, to leave the query's own team-season out.
+            seasons (list): Season of each query.
+            other_seasons (bool): Leave out every team-season of the query's season.
+        Returns:
+            tuple: (distances, row indices), both of shape (queries, k), nearest first.
+        """
+        Z = self.transform(X)
+        if seasons is None:
+            return self.tree.query(Z, k=min(k, self.meta["n_rows"]))
+        # look past the rows that will be left out, then keep the first k that remain. Only the query itself is
+        # left out by default; with other_seasons the look-ahead grows until every query has k rows left (or
+        # the whole index was searched)
+        extra = k if other_seasons else 1
+        while True:
+            n_query = min(k + extra, self.meta["n_rows"])
+            dist, idx = self.tree.query(Z, k=n_query)
+            keep = ~self._excluded(idx, teams, seasons, other_seasons)
+            if n_query == self.meta["n_rows"] or keep.sum(axis=1).min() >= k:
+                break
+            extra = min(extra * 4, self.meta["max_season_rows"])
+        order = np.argsort(~keep, axis=1, kind="stable")[:, :k]
+        dist, idx = np.take_along_axis(dist, order, axis=1), np.take_along_axis(idx, order, axis=1)
+        valid = np.take_along_axis(keep, order, axis=1)
+        return np.where(valid, dist, np.inf), np.where(valid, idx, -1)
+
+    def radius(self, X, r, teams=None, seasons=None, other_seasons=False):
+        """
+        Team-seasons within distance r of every query row (same arguments as kneighbors).
+
+        Returns:
+            tuple: (list of distance arrays, list of row index arrays), one per query, nearest first.
+        """
+        idx, dist = self.tree.query_radius(self.transform(X), r=r, return_distance=True, sort_results=True)
+        if seasons is None:
+            return list(dist), list(idx)
+        out_dist, out_idx = [], []
+        for i in range(len(idx)):
+            keep = ~self._excluded(idx[i][None, :], teams[i:i + 1], seasons[i:i + 1], other_seasons)[0]
+            out_dist.append(dist[i][keep])
+            out_idx.append(idx[i][keep])
+        return out_dist, out_idx
+
+    def to_frame(self, dist, idx):
+        """
+        Table of comparables (team, season, distance, features and final W/L%) for one query.
+        """
+        idx, dist = np.asarray(idx), np.asarray(dist)
+        mask = idx >= 0
+        idx, dist = idx[mask], dist[mask]
+        df = pd.DataFrame({"Team": self.teams[idx], "Season": self.seasons[idx], "Distance": dist.round(3)})
+        for j, col in enumerate(self.features):
+            df[col] = self.X[idx, j].round(3)
+        df[RESPONSE_VAR] = self.win_pct[idx].round(3)
+        df.index = np.arange(1, len(df) + 1)
+        return df
+
+
+def build_index(args):
+    features = args.features or FEATURES
+    frames = [load_season(year, features) for year in range(args.start_year, args.end_year + 1)]
+    frames = [df for df in frames if df is not None]
+    if not frames:
+        print("ERROR: No data loaded")
+        return
+    df = pd.concat(frames, ignore_index=True)
+
+    try:
+        weights = parse_weights(args.weights, features)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+
+    start = time.perf_counter()
+    index = ComparablesIndex.build(df, features, weights, tree=args.tree, leaf_size=args.leaf_size)
+    print(f"Indexed {len(df)} team-seasons from {index.meta['start_year']}-{index.meta['end_year']} "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    index.save(args.index_dir)
+
+
+def query_index(args):
+    index = ComparablesIndex.load(args.index_dir)
+    if index is None:
+        return
+    season = load_season(args.year, index.features)
+    if season is None:
+        return
+    if args.team is not None:
+        season = season[season["Team"] == args.team]
+        if season.empty:
+            print(f"ERROR: Team not found in {args.year}: {args.team}")
+            return
+
+    X = season[index.features].to_numpy(dtype=np.float64)
+    teams, seasons = season["Team"].to_numpy(dtype=str), season["Season"].to_numpy()
+    start = time.perf_counter()
+    if args.radius is not None:
+        dist, idx = index.radius(X, args.radius, teams, seasons, args.other_seasons)
+    else:
+        dist, idx = index.kneighbors(X, args.k, teams, seasons, args.other_seasons)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", None)
+    if args.team is not None:
+        comps = index.to_frame(dist[0], idx[0])
+        values = ", ".join(f"{col} {x:.3f}" for col, x in zip(index.features, X[0]))
+        print(f"Comparables of {args.team} ({args.year}): {values}, {RESPONSE_VAR} {season[RESPONSE_VAR].iloc[0]:.3f}")
+        print(comps)
+        if not comps.empty:
+            print(f"Mean {RESPONSE_VAR} of the comparables: {comps[RESPONSE_VAR].mean():.3f}")
+    else:
+        rows = []
+        for i, team in enumerate(teams):
+            comps = index.to_frame(dist[i], idx[i])
+            nearest = comps.iloc[0] if len(comps) else None
+            rows.append({
+                "Team": team,
+                RESPONSE_VAR: season[RESPONSE_VAR].iloc[i],
+                "Comparables": len(comps),
+                f"Comparables {RESPONSE_VAR}": comps[RESPONSE_VAR].mean() if len(comps) else np.nan,
+                "Nearest": f"{nearest['Season']} {nearest['Team']}" if nearest is not None else "",
+                f"Nearest {RESPONSE_VAR}": nearest[RESPONSE_VAR] if nearest is not None else np.nan,
+                "Distance": nearest["Distance"] if nearest is not None else np.nan
+            })
+        results = pd.DataFrame(rows).sort_values(f"Comparables {RESPONSE_VAR}", ascending=False)
+        print(f"Comparables of the {args.year} teams:")
+        print(results.round(3).to_string(index=False))
+        if args.output:
+            long = pd.concat([index.to_frame(dist[i], idx[i]).rename_axis("Rank").reset_index().assign(**{"Query Team": team})
+                              for i, team in enumerate(teams)], ignore_index=True)
+            long.insert(0, "Query Team", long.pop("Query Team"))
+            long.to_csv(args.output, index=False)
+            print(f"Comparables saved to: {args.output}")
+    print(f"\n{len(X)} queries in {elapsed:.2f} ms ({elapsed * 1000 / len(X):.0f} us per team)")
+
+
+def bench_queries(args):
+    index = ComparablesIndex.load(args.index_dir)
+    if index is None:
+        return
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(index.X), args.n_queries)
+    X, teams, seasons = index.X[rows], index.teams[rows], index.seasons[rows]
+
+    # one query at a time, as in an interactive lookup (each query leaves its own team-season out)
+    single = []
+    for i in range(len(X)):
+        start = time.perf_counter()
+        index.kneighbors(X[i:i + 1], args.k, teams[i:i + 1], seasons[i:i + 1])
+        single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    index.kneighbors(X, args.k, teams, seasons)
+    batch = time.perf_counter() - start
+
+    # brute force pandas distances over every team-season, the way it was done before the index
+    frame = pd.DataFrame(index.X, columns=index.features)
+    brute = []
+    for x in X[:min(len(X), 50)]:
+        start = time.perf_counter()
+        diff = (frame - x) / index.std * index.weights
+        np.sqrt((diff ** 2).sum(axis=1)).nsmallest(args.k)
+        brute.append(time.perf_counter() - start)
+
+    print(f"{index.meta['n_rows']} team-seasons, {index.meta['tree']} tree, k={args.k}")
+    print(f"single query: median {np.median(single) * 1e6:.0f} us, p99 {np.percentile(single, 99) * 1e6:.0f} us")
+    print(f"batch of {len(X)}: {batch * 1e6 / len(X):.1f} us per query")
+    print(f"brute force pandas: median {np.median(brute) * 1e6:.0f} us per query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build and save the index over the historical team-seasons")
+    build.add_argument("--start_year", type=int, default=2000, help="First season of the index")
+    build.add_argument("--end_year", type=int, default=2024, help="Last season of the index")
+    build.add_argument("--features", type=str, nargs="+", default=None, help="Feature columns (Four-Factor Score, NRtg_norm and SRS_norm if not set)")
+    build.add_argument("--weights", type=str, nargs="+", default=None, help="Feature weights as feature=weight (1 if not set)")
+    build.add_argument("--tree", type=str, default="kd", choices=["kd", "ball"], help="KDTree or BallTree")
+    build.add_argument("--leaf_size", type=int, default=16, help="Leaf size of the tree")
+    build.add_argument("--index_dir", type=str, default=INDEX_DIR, help="Directory of the index")
+    build.set_defaults(func=build_index)
+
+    query = subparsers.add_parser("query", help="Find the comparables of a team, or of every team in a season")
+    query.add_argument("--year", type=int, required=True, help="Season of the query team(s)")
+    query.add_argument("--team", type=str, default=None, help="Team to query (every team of the season if not set)")
+    query.add_argument("--k", type=int, default=5, help="Number of comparables")
+    query.add_argument("--radius", type=float, default=None, help="Return every comparable within this distance instead of the k nearest")
+    query.add_argument("--other_seasons", action="store_true", help="Only return team-seasons from other seasons")
+    query.add_argument("--output", type=str, default=None, help="CSV to save the comparables of a season query to")
+    query.add_argument("--index_dir", type=str, default=INDEX_DIR, help="Directory of the index")
+    query.set_defaults(func=query_index)
+
+    bench = subparsers.add_parser("bench", help="Time single and batch queries against brute force pandas distances")
+    bench.add_argument("--k", type=int, default=5, help="Number of comparables")
+    bench.add_argument("--n_queries", type=int, default=1000, help="Number of queries")
+    bench.add_argument("--index_dir", type=str, default=INDEX_DIR, help="Directory of the index")
+    bench.set_defaults(func=bench_queries)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,248 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from fetch_games import load_games, load_team_ids
+
+# incremental Elo ratings over the game results stored by fetch_games.py
+# ratings are kept per franchise in a flat array, the state is persisted to ./data/elo/state.npz and re-runs only
+# process the games played since the last run. Each season's end of regular season ratings are written to
+# ./data/{year}/elo_{year}.csv so they can be used as a feature (see assemble_data.CONFIG)
+
+ELO_DIR = "./data/elo"
+STATE_PATH = os.path.join(ELO_DIR, "state.npz")
+
+INITIAL_RATING = 1500.0
+K = 20.0
+HOME_COURT = 100.0
+# between seasons ratings are pulled a quarter of the way back to the league mean
+MEAN_REVERSION = 0.25
+REVERSION_TARGET = 1505.0
+
+# older names of current franchises, so relocated and renamed teams keep their rating
+FRANCHISE_NAMES = {
+    "New Jersey Nets": "Brooklyn Nets",
+    "Seattle SuperSonics": "Oklahoma City Thunder",
+    "Vancouver Grizzlies": "Memphis Grizzlies",
+    "Charlotte Bobcats": "Charlotte Hornets",
+    "New Orleans Hornets": "New Orleans Pelicans",
+    "New Orleans/Oklahoma City Hornets": "New Orleans Pelicans"
+}
+
+
+def franchise_ids(team_ids):
+    """
+    Map each team id to a franchise id. The franchise id is the lowest team id among the franchise's names, so
+    it never changes as new team ids are added.
+
+    Args:
+        team_ids (dict): Team name -> id from fetch_games.load_team_ids.
+    Returns:
+        np.ndarray: Franchise id of each team id.
+    """
+    first_id = {}
+    for name, team_id in sorted(team_ids.items(), key=lambda kv: kv[1]):
+        first_id.setdefault(FRANCHISE_NAMES.get(name, name), team_id)
+    franchise = np.zeros(len(team_ids), dtype=np.int64)
+    for name, team_id in team_ids.items():
+        franchise[team_id] = first_id[FRANCHISE_NAMES.get(name, name)]
+    return franchise
+
+
+def game_keys(games):
+    """
+    Key of each stored game, unique within a season: the date and the home and away team ids packed in an int64.
+
+    Args:
+        games (dict): Game columns from fetch_games.load_games.
+    Returns:
+        np.ndarray: Key of each game.
+    """
+    return ((games["date"].astype(np.int64) << 30) | (games["home"].astype(np.int64) << 15)
+            | games["away"].astype(np.int64))
+
+
+class EloState:
+    """
+    Current Elo rating and games played of every franchise, plus the season, the keys of the games processed in it
+    and the date of the last game processed.
+    """
+
+    def __init__(self, n_teams=0, k=K, home_court=HOME_COURT):
+        self.ratings = np.full(n_teams, INITIAL_RATING)
+        self.games = np.zeros(n_teams, dtype=np.int64)
+        self.k = k
+        self.home_court = home_court
+        self.season = 0
+        self.processed = np.zeros(0, dtype=np.int64)
+        self.last_date = 0
+
+    def resize(self, n_teams):
+        # new teams start at the initial rating
+        if n_teams > len(self.ratings):
+            extra = n_teams - len(self.ratings)
+            self.ratings = np.append(self.ratings, np.full(extra, INITIAL_RATING))
+            self.games = np.append(self.games, np.zeros(extra, dtype=np.int64))
+
+    def start_season(self, year):
+        if self.season:
+            self.ratings = (1 - MEAN_REVERSION) * self.ratings + MEAN_REVERSION * REVERSION_TARGET
+        self.season = year
+        self.processed = np.zeros(0, dtype=np.int64)
+
+    def update(self, home, away, home_pts, away_pts, dates):
+        """
+        Apply a block of games, in date order. Ratings move by K * MOV multiplier * (result - expected), with the
+        home team getting home_court extra points in the expected result. The multiplier grows with the margin of
+        victory and shrinks when the favorite wins, so blowouts by strong teams are not over-rewarded.
+
+        The games are sequential by nature, so the hot loop runs over plain Python floats, which is faster than
+        numpy for one game at a time, and the results are written back to the rating array at the end.
+
+        Args:
+            home (np.ndarray): Franchise id of the home team of each game.
+            away (np.ndarray): Franchise id of the away team of each game.
+            home_pts (np.ndarray): Home team points.
+            away_pts (np.ndarray): Away team points.
+            dates (np.ndarray): Game dates (yyyymmdd).
+        Returns:
+            int: Number of games applied.
+        """
+        if len(home) == 0:
+            return 0
+        ratings = self.ratings.tolist()
+        k, hca = self.k, self.home_court
+        margins = (np.asarray(home_pts, dtype=np.float64) - away_pts).tolist()
+
+        for h, a, mov in zip(home.tolist(), away.tolist(), margins):
+            diff = ratings[h] + hca - ratings[a]
+            p_home = 1.0 / (1.0 + 10.0 ** (-diff / 400.0))
+            if mov > 0:
+                shift = k * (mov + 3.0) ** 0.8 / (7.5 + 0.006 * diff) * (1.0 - p_home)
+            else:
+                shift = -k * (3.0 - mov) ** 0.8 / (7.5 - 0.006 * diff) * p_home
+            ratings[h] += shift
+            ratings[a] -= shift
+
+        self.ratings = np.array(ratings)
+        np.add.at(self.games, home, 1)
+        np.add.at(self.games, away, 1)
+        self.last_date = max(self.last_date, int(dates[-1]))
+        return len(home)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ratings=self.ratings, games=self.games, k=self.k, home_court=self.home_court,
+                 season=self.season, processed=self.processed, last_date=self.last_date)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            state = cls(k=float(f["k"]), home_court=float(f["home_court"]))
+            state.ratings = f["ratings"].copy()
+            state.games = f["games"].copy()
+            state.season = int(f["season"])
+            state.processed = f["processed"].copy()
+            state.last_date = int(f["last_date"])
+        return state
+
+
+def save_season_ratings(year, ratings, season_team_ids, franchise, names):
+    """
+    Write the ratings of the teams of a season to ./data/{year}/elo_{year}.csv. Elo_norm is z-scored within the
+    season like the other features.
+
+    Args:
+        year (int): Season.
+        ratings (np.ndarray): Franchise ratings.
+        season_team_ids (np.ndarray): Team ids that played in the season.
+        franchise (np.ndarray): Franchise id of each team id.
+        names (dict): Team id -> name.
+    """
+    elo = ratings[franchise[season_team_ids]]
+    df = pd.DataFrame({
+        "Team": [names[t] for t in season_team_ids],
+        "Elo": elo.round(1),
+        "Elo_norm": ((elo - elo.mean()) / elo.std(ddof=1)).round(4)
+    })
+    outpath = f"./data/{year}/elo_{year}.csv"
+    df.to_csv(outpath, index=False)
+    print(f"Processed and saved: {outpath}")
+
+
+def update_ratings(start_year, end_year, state_path=STATE_PATH, rebuild=False):
+    """
+    Bring the Elo state up to date with the stored games of a range of seasons. Seasons and games already in the
+    state are skipped, so only the games played since the last run are processed. A snapshot of the state is
+    saved at the end of each season to ./data/elo/state_{year}.npz.
+
+    Args:
+        start_year (int): First season to process (only used when there is no saved state).
+        end_year (int): Last season to process.
+        state_path (str): Path of the persisted state.
+        rebuild (bool): Ignore the saved state and replay every season from start_year.
+    Returns:
+        EloState: Updated state.
+    """
+    team_ids = load_team_ids()
+    franchise = franchise_ids(team_ids)
+    names = {team_id: name for name, team_id in team_ids.items()}
+
+    if os.path.exists(state_path) and not rebuild:
+        state = EloState.load(state_path)
+    else:
+        state = EloState()
+    state.resize(len(team_ids))
+
+    n_updates, elapsed = 0, 0.0
+    for year in range(max(start_year, state.season), end_year + 1):
+        games = load_games(year)
+        if games is None:
+            continue
+        if year != state.season:
+            state.start_season(year)
+
+        # only the games not processed yet. The store keeps partly played days, so a run in the middle of a game day
+        # must still pick up that day's later games on the next run, which a last date cutoff would skip
+        keys = game_keys(games)
+        new = ~np.isin(keys, state.processed)
+        state.processed = np.union1d(state.processed, keys[new])
+        home = franchise[games["home"][new]]
+        away = franchise[games["away"][new]]
+        playoff = games["playoff"][new].astype(bool)
+        cols = (games["home_pts"][new], games["away_pts"][new], games["date"][new])
+
+        regular = ~playoff
+        start = time.perf_counter()
+        n_updates += state.update(home[regular], away[regular], *(c[regular] for c in cols))
+        elapsed += time.perf_counter() - start
+        if regular.any():
+            # features use the end of regular season ratings, so the file is written before the playoffs
+            save_season_ratings(year, state.ratings, np.unique(np.concatenate([games["home"], games["away"]])),
+                                franchise, names)
+        start = time.perf_counter()
+        n_updates += state.update(home[playoff], away[playoff], *(c[playoff] for c in cols))
+        elapsed += time.perf_counter() - start
+
+        state.save(os.path.join(os.path.dirname(state_path), f"state_{year}.npz"))
+
+    state.save(state_path)
+    if n_updates:
+        print(f"Applied {n_updates} games ({n_updates / max(elapsed, 1e-9):,.0f} games/sec)")
+    else:
+        print("Ratings are up to date")
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2000, help="First season to rate when there is no saved state")
+    parser.add_argument("--end_year", type=int, default=2025, help="Last season to rate")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the saved state and replay every season from start_year")
+    parser.add_argument("--state_path", type=str, default=STATE_PATH, help="Path of the persisted Elo state")
+    args = parser.parse_args()
+
+    update_ratings(args.start_year, args.end_year, state_path=args.state_path, rebuild=args.rebuild)
@@ -0,0 +1,332 @@
+import argparse
+import os
+import time
+from math import comb
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+from assemble_data import load_yearly_data
+
+# best-subset search for the OLS feature list
+# every subset of the candidate columns up to a given size is fit by OLS and scored by season-grouped CV-RMSE,
+# AIC/BIC and VIF. No fit touches the rows: the cross-products [1 X y]'[1 X y] are computed once per season, the
+# full-data and fold-training Gram matrices are sums of those, and the subsets are enumerated depth first so each
+# one is its parent plus one column. Its Cholesky factor is the parent's with one row appended (an O(k^2) update,
+# done for every fold at once) and moving back up the tree drops the last row again.
+
+# candidate tables merged onto data_{year}.csv (by Team), with the prefix added to their column names
+# W, L, PW and PL are left out since they are the response in another form
+CANDIDATE_SOURCES = {
+    "adv": {
+        "file_pattern": "adv_{year}.csv",
+        "prefix": "",
+        "columns": ["Age", "MOV", "SOS", "ORtg", "DRtg", "Pace", "FTr", "3PAr", "TS%", "Off eFG%", "Off TOV%",
+                    "ORB%", "Off FT/FGA%", "Def eFG%", "Def TOV%", "DRB%", "Def FT/FGA%", "Attend./G"]
+    },
+    "per_100_team": {
+        "file_pattern": "per_100_team_{year}.csv",
+        "prefix": "Team/100 ",
+        "columns": ["FG", "FGA", "FG%", "3P", "3PA", "3P%", "2P", "2PA", "2P%", "FT", "FTA", "FT%",
+                    "ORB", "DRB", "TRB", "AST", "STL", "BLK", "TOV", "PF", "PTS"]
+    },
+    "per_100_opp": {
+        "file_pattern": "per_100_opp_{year}.csv",
+        "prefix": "Opp/100 ",
+        "columns": ["FG", "FGA", "FG%", "3P", "3PA", "3P%", "2P", "2PA", "2P%", "FT", "FTA", "FT%",
+                    "ORB", "DRB", "TRB", "AST", "STL", "BLK", "TOV", "PF", "PTS"]
+    },
+    "shooting": {
+        "file_pattern": "shooting_{year}.csv",
+        "prefix": "Shooting ",
+        "columns": ["Dist.", "% of FGA By Distance - 0-3", "% of FGA By Distance - 3-10",
+                    "% of FGA By Distance - 10-16", "% of FGA By Distance - 16-3P", "% of FGA By Distance - 3P",
+                    "FG% By Distance - 0-3", "FG% By Distance - 3-10", "FG% By Distance - 10-16",
+                    "FG% By Distance - 16-3P", "FG% By Distance - 3P", "% of FG Ast'd - 2P", "% of FG Ast'd - 3P",
+                    "Dunks - %FGA", "Layups - %FGA", "Corner - %3PA", "Corner - 3P%"]
+    }
+}
+
+BASE_FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+
+# relative pivot below which an added column is treated as collinear with the subset (its supersets are skipped)
+COLLINEAR_TOL = 1e-10
+
+# Gram matrices used by the worker processes
+_grams = {}
+
+
+def load_candidates(start_year, end_year, sources, response_var):
+    """
+    Load data_{year}.csv for a range of seasons with the candidate columns of the source tables merged in.
+    Candidate columns with missing values in any season are dropped.
+
+    Args:
+        start_year (int): First season.
+        end_year (int): Last season.
+        sources (list): Keys of CANDIDATE_SOURCES to merge.
+        response_var (str): Name of the response variable column.
+    Returns:
+        tuple: (DataFrame with a "Season" column, list of candidate columns), or (None, None) if nothing loaded.
+    """
+    data = load_yearly_data(start_year, end_year)
+    if data.empty:
+        return None, None
+
+    frames = []
+    for year in range(start_year, end_year + 1):
+        year_df = data[data["Season"] == year]
+        for key in sources:
+            info = CANDIDATE_SOURCES[key]
+            file_path = f"./data/{year}/{info['file_pattern'].format(year=year)}"
+            if not os.path.exists(file_path):
+                print(f"ERROR: File not found: {file_path}")
+                continue
+            df = pd.read_csv(file_path, thousands=",")
+            df["Team"] = df["Team"].str.replace("*", "", regex=False)
+            cols = [col for col in info["columns"] if col in df.columns]
+            df = df[["Team"] + cols].rename(columns={col: info["prefix"] + col for col in cols})
+            year_df = year_df.merge(df, on="Team", how="left")
+        frames.append(year_df)
+    data = pd.concat(frames, ignore_index=True)
+
+    candidates = [col for col in BASE_FEATURES if col in data.columns]
+    for key in sources:
+        info = CANDIDATE_SOURCES[key]
+        candidates += [info["prefix"] + col for col in info["columns"] if info["prefix"] + col in data.columns]
+    data[candidates] = data[candidates].apply(pd.to_numeric, errors="coerce")
+
+    incomplete = [col for col in candidates if data[col].isna().any()]
+    if incomplete:
+        print(f"Dropping {len(incomplete)} candidates with missing values: {', '.join(incomplete)}")
+    candidates = [col for col in candidates if col not in incomplete]
+    data = data.dropna(subset=[response_var]).reset_index(drop=True)
+    return data, candidates
+
+
+def season_folds(seasons, n_folds=5, random_state=42):
+    """
+    Assign whole seasons to cross-validation folds.
+
+    Args:
+        seasons (np.ndarray): Season of each row.
+        n_folds (int): Number of folds.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        np.ndarray: Fold index of each row.
+    """
+    unique_seasons = np.random.default_rng(random_state).permutation(np.unique(seasons))
+    n_folds = min(n_folds, len(unique_seasons))
+    fold_of_season = {}
+    for fold, group in enumerate(np.array_split(unique_seasons, n_folds)):
+        fold_of_season.update({season: fold for season in group})
+    return np.array([fold_of_season[season] for season in seasons])
+
+
+def fold_grams(X, y, folds):
+    """
+    Gram matrices of the standardized design [1 X] for the full data and for each fold's training and held-out
+    rows. The cross-products are computed once per fold; a fold's training Gram is the full Gram minus its own.
+
+    Args:
+        X (np.ndarray): Candidate features (rows x candidates).
+        y (np.ndarray): Response.
+        folds (np.ndarray): Fold index of each row.
+    Returns:
+        dict: "fit" (full data first, then each fold's training rows) and "held" Gram matrices (G, Z'y, y'y),
+            with the number of rows.
+    """
+    sd = X.std(axis=0)
+    Z = np.column_stack([np.ones(len(X)), (X - X.mean(axis=0)) / np.where(sd > 0, sd, 1.0)])
+
+    n_folds = folds.max() + 1
+    G = np.stack([Z[folds == f].T @ Z[folds == f] for f in range(n_folds)])
+    b = np.stack([Z[folds == f].T @ y[folds == f] for f in range(n_folds)])
+    yy = np.array([y[folds == f] @ y[folds == f] for f in range(n_folds)])
+
+    return {
+        "fit": (np.concatenate([G.sum(0)[None], G.sum(0) - G]), np.concatenate([b.sum(0)[None], b.sum(0) - b]),
+                np.concatenate([[yy.sum()], yy.sum() - yy])),
+        "held": (G, b, yy),
+        "n": len(X)
+    }
+
+
+def _init_worker(grams):
+    _grams.update(grams)
+
+
+def _extend(G, b, Linv, z, cols, j):
+    """
+    Append column j to the Cholesky factors of every fold at once. With L L' = G[cols, cols], the new row of L is
+    (l', d) with l = L^-1 G[cols, j] and d^2 = G[j, j] - l'l, and the inverse factor and z = L^-1 b get one row each.
+
+    Returns:
+        tuple: (new inverse factors, new z), or None if column j is collinear with cols in any fold.
+    """
+    l = np.einsum("fab,fb->fa", Linv, G[:, cols, j])
+    d2 = G[:, j, j] - np.einsum("fa,fa->f", l, l)
+    if np.any(d2 <= COLLINEAR_TOL * G[:, j, j]):
+        return None
+    d = np.sqrt(d2)
+    m = len(cols)
+    new_Linv = np.zeros((len(G), m + 1, m + 1))
+    new_Linv[:, :m, :m] = Linv
+    new_Linv[:, m, :m] = -np.einsum("fa,fab->fb", l, Linv) / d[:, None]
+    new_Linv[:, m, m] = 1.0 / d
+    new_z = np.column_stack([z, (b[:, j] - np.einsum("fa,fa->f", l, z)) / d])
+    return new_Linv, new_z
+
+
+def _score(Linv, z, cols):
+    """
+    Training RSS, held-out SSE summed over the folds and VIFs of one subset, from its Cholesky factors.
+    """
+    G_fit, b_fit, yy_fit = _grams["fit"]
+    G_held, b_held, yy_held = _grams["held"]
+    rss = yy_fit[0] - z[0] @ z[0]
+
+    # fold coefficients beta = L'^-1 z, scored on the held-out cross-products
+    beta = np.einsum("fba,fb->fa", Linv[1:], z[1:])
+    Gh = G_held[:, cols][:, :, cols]
+    sse = yy_held - 2 * np.einsum("fa,fa->f", beta, b_held[:, cols]) + np.einsum("fa,fab,fb->f", beta, Gh, beta)
+
+    # the diagonal of inv(Z'Z) past the intercept is that of the inverse centered cross-product matrix, and the
+    # standardized columns have a sum of squares of n, so VIF_i = n * inv(Z'Z)_ii
+    vif = _grams["n"] * np.einsum("ab,ab->b", Linv[0], Linv[0])[1:]
+    return rss, sse.sum(), vif
+
+
+def _search(task):
+    """
+    Fit every subset that starts with the given column (plus the intercept), up to max_size columns.
+
+    Args:
+        task (tuple): (first column, number of candidates, max_size)
+    Returns:
+        list: (subset, RSS, CV SSE, max VIF) of each feasible subset.
+    """
+    first, p, max_size = task
+    G, b, _ = _grams["fit"]
+    results = []
+
+    root = np.sqrt(G[:, 0, 0])
+    Linv = (1.0 / root)[:, None, None]
+    z = (b[:, 0] / root)[:, None]
+
+    def visit(cols, Linv, z, j):
+        extended = _extend(G, b, Linv, z, cols, j)
+        if extended is None:
+            return
+        cols = cols + [j]
+        Linv, z = extended
+        rss, sse, vif = _score(Linv, z, cols)
+        results.append((tuple(cols[1:]), rss, sse, vif.max()))
+        if len(cols) - 1 < max_size:
+            for k in range(j + 1, p + 1):
+                visit(cols, Linv, z, k)
+
+    visit([0], Linv, z, first)
+    return results
+
+
+def best_subsets(X, y, seasons, max_size=3, n_folds=5, n_jobs=None, random_state=42):
+    """
+    Score every subset of the candidate columns with 1 to max_size columns (each with an intercept).
+
+    Args:
+        X (np.ndarray): Candidate features (rows x candidates).
+        y (np.ndarray): Response.
+        seasons (np.ndarray): Season of each row, for the grouped cross-validation folds.
+        max_size (int): Largest subset size.
+        n_folds (int): Number of season-grouped CV folds.
+        n_jobs (int): Number of worker processes (all cores if None).
+        random_state (int): Random state of the fold assignment.
+    Returns:
+        pd.DataFrame: One row per subset with its size, CV-RMSE, RMSE, AIC, BIC and largest VIF, as column indices
+            into X.
+    """
+    grams = fold_grams(X, y, season_folds(seasons, n_folds, random_state))
+    n, p = X.shape
+
+    # larger subtrees (earlier first columns) go first so the pool stays balanced
+    tasks = [(j, p, max_size) for j in range(1, p + 1)]
+    n_jobs = n_jobs or os.cpu_count()
+    if n_jobs == 1:
+        _init_worker(grams)
+        chunks = map(_search, tasks)
+        results = [row for chunk in chunks for row in chunk]
+    else:
+        with Pool(processes=n_jobs, initializer=_init_worker, initargs=(grams,)) as pool:
+            results = [row for chunk in pool.imap_unordered(_search, tasks) for row in chunk]
+
+    subsets, rss, sse, max_vif = zip(*results)
+    rss = np.maximum(np.array(rss), 1e-300)
+    size = np.array([len(s) for s in subsets])
+    # Gaussian log-likelihood up to a constant, with the intercept and the noise variance as parameters
+    n_params = size + 2
+    return pd.DataFrame({
+        "subset": [tuple(c - 1 for c in s) for s in subsets],
+        "size": size,
+        "CV-RMSE": np.sqrt(np.array(sse) / n),
+        "RMSE": np.sqrt(rss / n),
+        "AIC": n * np.log(rss / n) + 2 * n_params,
+        "BIC": n * np.log(rss / n) + np.log(n) * n_params,
+        "max VIF": np.array(max_vif)
+    })
+
+
+def subset_vif(X, subset):
+    """
+    VIF of each column of a subset (the diagonal of the inverse of its correlation matrix).
+
+    Args:
+        X (np.ndarray): Candidate features.
+        subset (tuple): Column indices.
+    Returns:
+        np.ndarray: VIF of each column (1 for a single column).
+    """
+    if len(subset) == 1:
+        return np.ones(1)
+    return np.diag(np.linalg.inv(np.corrcoef(X[:, list(subset)], rowvar=False)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2000, help="First season of the search data")
+    parser.add_argument("--end_year", type=int, default=2020, help="Last season of the search data")
+    parser.add_argument("--sources", type=str, nargs="*", default=list(CANDIDATE_SOURCES), choices=list(CANDIDATE_SOURCES), help="Tables the candidate columns come from")
+    parser.add_argument("--max_size", type=int, default=3, help="Largest number of features in a subset")
+    parser.add_argument("--n_folds", type=int, default=5, help="Number of season-grouped cross-validation folds")
+    parser.add_argument("--criterion", type=str, default="CV-RMSE", choices=["CV-RMSE", "AIC", "BIC"], help="Column the subsets are ranked by")
+    parser.add_argument("--top", type=int, default=20, help="Number of subsets to report")
+    parser.add_argument("--n_jobs", type=int, default=None, help="Number of worker processes (all cores if None)")
+    parser.add_argument("--output", type=str, default="./data/feature_search.csv", help="File the ranked subsets are written to")
+    args = parser.parse_args()
+
+    response_var = "W/L%"
+    data, candidates = load_candidates(args.start_year, args.end_year, args.sources, response_var)
+    if data is None:
+        print("ERROR: No data loaded")
+        exit()
+
+    X = data[candidates].to_numpy(dtype=np.float64)
+    y = data[response_var].to_numpy(dtype=np.float64)
+    n_subsets = sum(comb(len(candidates), k) for k in range(1, args.max_size + 1))
+    print(f"{len(candidates)} candidates, {len(X)} rows, {n_subsets} subsets of up to {args.max_size} features")
+
+    start = time.perf_counter()
+    ranked = best_subsets(X, y, data["Season"].to_numpy(), max_size=args.max_size, n_folds=args.n_folds,
+                          n_jobs=args.n_jobs)
+    elapsed = time.perf_counter() - start
+    print(f"Fit {len(ranked)} subsets in {elapsed:.2f}s ({len(ranked) / elapsed:.0f} fits/s)")
+
+    ranked = ranked.sort_values(args.criterion).head(args.top).reset_index(drop=True)
+    ranked["VIF"] = [", ".join(f"{v:.2f}" for v in subset_vif(X, s)) for s in ranked["subset"]]
+    ranked["features"] = [", ".join(candidates[c] for c in s) for s in ranked["subset"]]
+    ranked = ranked.drop(columns="subset")
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_colwidth", 80)
+    print(ranked[["features", "CV-RMSE", "RMSE", "AIC", "BIC", "max VIF"]].round(4).to_string())
+    ranked.to_csv(args.output, index=False)
+    print(f"Ranked subsets saved to: {args.output}")
@@ -3,6 +3,7 @@ import pandas as pd
 from scraper import *
 import argparse
 import os
+import tracing
 
 def get_df(val, url):
     match val:
@@ -44,14 +45,17 @@ def fetch_season_data(start_year, end_year, tables):
             f_path = os.path.join(dir_path, f_name)
 
             # get parsed data frame and save
-            df = get_df(tables[j], url)
+            with tracing.span("fetch table", table=tables[j], year=i):
+                df = get_df(tables[j], url)
             if df is not None:
                 print(f"Saving table {tables[j]} for year {i}.")
                 df.to_csv(f_path, index=False)
+                tracing.count("rows", len(df))
             else:
                 print(f"No table for {tables[j]} found for year {i}. Continuing...")
 
-            time.sleep(3) # respect robots.txt crawl delay
+            with tracing.span("crawl delay"):
+                time.sleep(3) # respect robots.txt crawl delay
 
 
 
@@ -62,9 +66,12 @@ if __name__ == "__main__":
     parser.add_argument("--year", type=int, default=None, help="Year to fetch data from (if no date range is needed). Leave blank if a range is needed")
     parser.add_argument("--table", type=str, default=None, help="Tables to fetch (if None, then fetch all)", 
                         choices=["per_100_team", "per_game_team", "standings", "adv", "shooting", "per_100_opp", "per_game_opp"])
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
 
     # parse params
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
     tables = None
     if args.table is None:
         tables = ["standings", "per_100_team", "per_100_opp", "adv", "shooting", "per_game_team", "per_game_opp"]
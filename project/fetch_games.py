@@ -0,0 +1,367 @@
+import argparse
+import csv
+import os
+import time
+from datetime import datetime
+import numpy as np
+from scraper import scrape_table_by_div_id
+from scraper_utils import is_allowed
+
+# game-level schedule and results ingest
+# the monthly schedule pages (NBA_{year}_games-{month}.html) are parsed into a columnar store with one partition
+# per game day, ./data/{year}/games/{YYYY-MM-DD}.npz, so new game days are appended without rewriting the season.
+# teams are stored as integer ids, the id of each team name is kept in ./data/team_ids.csv
+
+TEAM_IDS_PATH = "./data/team_ids.csv"
+
+# columns of every partition and their dtypes
+# date is yyyymmdd, points are -1 for games that have not been played yet, ot is the number of overtimes
+GAME_COLUMNS = {
+    "date": np.int32,
+    "home": np.int16,
+    "away": np.int16,
+    "home_pts": np.int16,
+    "away_pts": np.int16,
+    "ot": np.int8,
+    "playoff": np.int8
+}
+
+MONTHS = ["october", "november", "december", "january", "february", "march", "april", "may", "june"]
+
+# seasons that did not follow the usual october-june calendar
+SEASON_MONTHS = {
+    2012: ["december", "january", "february", "march", "april", "may", "june"],
+    2020: ["october-2019", "november", "december", "january", "february", "march", "july", "august", "september",
+           "october-2020"],
+    2021: ["december", "january", "february", "march", "april", "may", "june", "july"]
+}
+
+
+def season_months(year):
+    """
+    Month pages of a season's schedule, in calendar order.
+
+    Args:
+        year (int): Season (e.g., 2024 for 2023-24).
+    Returns:
+        list: Month names as used in the schedule page urls.
+    """
+    return SEASON_MONTHS.get(year, MONTHS)
+
+
+def load_team_ids(path=TEAM_IDS_PATH):
+    """
+    Load the team name -> integer id map.
+
+    Args:
+        path (str): Path to the team id CSV.
+    Returns:
+        dict: Team name -> id.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="") as f:
+        return {row["Team"]: int(row["team_id"]) for row in csv.DictReader(f)}
+
+
+def get_team_ids(names, path=TEAM_IDS_PATH):
+    """
+    Look up the ids of team names, adding new names to the map. Ids are never reassigned, so stored games keep
+    their meaning as teams are added.
+
+    Args:
+        names (iterable): Team names.
+        path (str): Path to the team id CSV.
+    Returns:
+        dict: Team name -> id for every known team.
+    """
+    team_ids = load_team_ids(path)
+    new_names = sorted(set(names) - set(team_ids))
+    if new_names:
+        for name in new_names:
+            team_ids[name] = len(team_ids)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Team", "team_id"])
+            for name, team_id in sorted(team_ids.items(), key=lambda kv: kv[1]):
+                writer.writerow([name, team_id])
+    return team_ids
+
+
+def parse_schedule_table(table, playoff=0):
+    """
+    Parse a monthly schedule table into one dict per game. Games after the "Playoffs" separator row are
+    flagged as playoff games. The separator is only on the page of the month the playoffs start, so the pages
+    of the later months are parsed with playoff=1.
+
+    Args:
+        table (bs4.element.Tag): Schedule table from scrape_table_by_div_id.
+        playoff (int): Playoff flag of the games before any separator row.
+    Returns:
+        list: Dicts with date, home, away, home_pts, away_pts, ot and playoff.
+    """
+    games = []
+    for tr in table.find("tbody").find_all("tr"):
+        # the playoffs start after a header row with just "Playoffs" in it
+        if "thead" in (tr.get("class") or []):
+            if tr.text.strip() == "Playoffs":
+                playoff = 1
+            continue
+
+        cells = {cell.get("data-stat"): cell.text.strip() for cell in tr.find_all(["th", "td"])}
+        if not cells.get("date_game") or not cells.get("home_team_name"):
+            continue
+
+        ot = cells.get("overtimes", "")
+        games.append({
+            "date": int(datetime.strptime(cells["date_game"], "%a, %b %d, %Y").strftime("%Y%m%d")),
+            "home": cells["home_team_name"],
+            "away": cells["visitor_team_name"],
+            "home_pts": int(cells["home_pts"]) if cells.get("home_pts") else -1,
+            "away_pts": int(cells["visitor_pts"]) if cells.get("visitor_pts") else -1,
+            "ot": (int(ot[0]) if ot[0].isdigit() else 1) if ot else 0,
+            "playoff": playoff
+        })
+    return games
+
+
+def fetch_month(year, month, playoff=0):
+    """
+    Fetch and parse one month of a season's schedule.
+
+    Args:
+        year (int): Season.
+        month (str): Month name as used in the url (e.g., "november").
+        playoff (int): 1 if the playoffs started in an earlier month.
+    Returns:
+        list: Parsed games, or None if the page or table is missing.
+    """
+    url = f"https://www.basketball-reference.com/leagues/NBA_{year}_games-{month}.html"
+    if not is_allowed(url):
+        print(f"Skipping disallowed URL: {url}")
+        return None
+    table = scrape_table_by_div_id(url, "div_schedule")
+    if table is None:
+        return None
+    return parse_schedule_table(table, playoff=playoff)
+
+
+def to_columns(games, team_ids):
+    """
+    Convert parsed games to the columnar layout of the store.
+
+    Args:
+        games (list): Parsed games.
+        team_ids (dict): Team name -> id.
+    Returns:
+        dict: Column name -> numpy array.
+    """
+    columns = {}
+    for col, dtype in GAME_COLUMNS.items():
+        if col in ("home", "away"):
+            columns[col] = np.array([team_ids[g[col]] for g in games], dtype=dtype)
+        else:
+            columns[col] = np.array([g[col] for g in games], dtype=dtype)
+    return columns
+
+
+def partition_path(year, date):
+    date = str(date)
+    return f"./data/{year}/games/{date[:4]}-{date[4:6]}-{date[6:]}.npz"
+
+
+def write_game_days(columns, year, refresh=False):
+    """
+    Write games into the season's store, one partition per game day. Days that are already stored with every
+    game played are left alone unless refresh is set, so re-running on the current season only writes the
+    new days (and days whose results came in since the last run).
+
+    Args:
+        columns (dict): Games in the columnar layout.
+        year (int): Season.
+        refresh (bool): Rewrite days that are already complete.
+    Returns:
+        int: Number of game days written.
+    """
+    os.makedirs(f"./data/{year}/games", exist_ok=True)
+    order = np.argsort(columns["date"], kind="stable")
+    dates, starts = np.unique(columns["date"][order], return_index=True)
+    bounds = np.append(starts, len(order))
+
+    written = 0
+    for i, date in enumerate(dates):
+        path = partition_path(year, date)
+        if not refresh and is_complete(path):
+            continue
+        rows = order[bounds[i]:bounds[i + 1]]
+        # write to a temporary file first so a reader never sees a half written day
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **{col: arr[rows] for col, arr in columns.items()})
+        os.replace(tmp_path, path)
+        written += 1
+    return written
+
+
+def is_complete(path):
+    if not os.path.exists(path):
+        return False
+    with np.load(path) as part:
+        return bool(np.all(part["home_pts"] >= 0))
+
+
+def load_games(year, played_only=True):
+    """
+    Load a season's games from the store.
+
+    Args:
+        year (int): Season.
+        played_only (bool): Drop games that have not been played yet.
+    Returns:
+        dict: Column name -> numpy array, sorted by date, or None if the season is not stored.
+    """
+    games_dir = f"./data/{year}/games"
+    if not os.path.isdir(games_dir):
+        print(f"ERROR: No games stored for {year}: {games_dir}")
+        return None
+
+    parts = {col: [] for col in GAME_COLUMNS}
+    for name in sorted(os.listdir(games_dir)):
+        if not name.endswith(".npz") or ".tmp" in name:
+            continue
+        with np.load(os.path.join(games_dir, name)) as part:
+            for col in GAME_COLUMNS:
+                parts[col].append(part[col])
+    if not parts["date"]:
+        return None
+
+    games = {col: np.concatenate(arrs) for col, arrs in parts.items()}
+    if played_only:
+        mask = games["home_pts"] >= 0
+        games = {col: arr[mask] for col, arr in games.items()}
+    return games
+
+
+def load_games_range(start_year, end_year, played_only=True):
+    """
+    Load the games of a range of seasons into one set of columns with a "season" column added.
+
+    Args:
+        start_year (int): First season to load.
+        end_year (int): Last season to load.
+        played_only (bool): Drop games that have not been played yet.
+    Returns:
+        dict: Column name -> numpy array, or None if no season is stored.
+    """
+    seasons = []
+    for year in range(start_year, end_year + 1):
+        games = load_games(year, played_only=played_only)
+        if games is not None:
+            games["season"] = np.full(len(games["date"]), year, dtype=np.int16)
+            seasons.append(games)
+    if not seasons:
+        return None
+    return {col: np.concatenate([g[col] for g in seasons]) for col in seasons[0]}
+
+
+def last_complete_date(year):
+    """
+    Latest stored game day with every game played, or None.
+    """
+    games_dir = f"./data/{year}/games"
+    if not os.path.isdir(games_dir):
+        return None
+    dates = sorted(name[:-4] for name in os.listdir(games_dir) if name.endswith(".npz") and ".tmp" not in name)
+    for date in reversed(dates):
+        if is_complete(os.path.join(games_dir, date + ".npz")):
+            return int(date.replace("-", ""))
+    return None
+
+
+def month_slug(year, date):
+    """
+    Month page of a season that a game day falls in.
+
+    Args:
+        year (int): Season.
+        date (int): Game day as yyyymmdd.
+    Returns:
+        str: Month name as used in the schedule page urls, or None if the season has no page for that month.
+    """
+    day = datetime.strptime(str(date), "%Y%m%d")
+    name = day.strftime("%B").lower()
+    # seasons with two pages for the same month name tell them apart by the calendar year (e.g., "october-2020")
+    for slug in (f"{name}-{day.year}", name):
+        if slug in season_months(year):
+            return slug
+    return None
+
+
+def stored_playoff_flag(year, before):
+    """
+    Playoff flag of the latest stored game before a date, 0 if there is none.
+
+    Args:
+        year (int): Season.
+        before (int): Date as yyyymmdd.
+    Returns:
+        int: 1 if the playoffs had started before the date.
+    """
+    games = load_games(year, played_only=False)
+    if games is None:
+        return 0
+    mask = games["date"] < before
+    if not mask.any():
+        return 0
+    return int(games["playoff"][mask][np.argmax(games["date"][mask])])
+
+
+def fetch_season_games(start_year, end_year, refresh=False):
+    # fetch the schedule pages for each year and append the new game days to the store
+    for year in range(start_year, end_year + 1):
+        months = season_months(year)
+        playoff = 0
+
+        # months before the last complete day are already stored, only fetch from that month on
+        last = None if refresh else last_complete_date(year)
+        slug = month_slug(year, last) if last is not None else None
+        if slug is not None:
+            months = months[months.index(slug):]
+            # the playoff flag carries over from the stored months when the refetch starts after the separator
+            playoff = stored_playoff_flag(year, last // 100 * 100 + 1)
+
+        games = []
+        for month in months:
+            month_games = fetch_month(year, month, playoff=playoff)
+            if month_games is None:
+                print(f"No schedule found for {month} {year}. Continuing...")
+            else:
+                games.extend(month_games)
+                # the "Playoffs" separator is only on the first playoff month's page, carry the flag to the next ones
+                playoff = max([playoff] + [g["playoff"] for g in month_games])
+            time.sleep(3) # respect robots.txt crawl delay
+
+        if not games:
+            print(f"No games found for {year}.")
+            continue
+
+        team_ids = get_team_ids(g[side] for g in games for side in ("home", "away"))
+        written = write_game_days(to_columns(games, team_ids), year, refresh=refresh)
+        print(f"Saved {written} new game days for {year} ({len(games)} games fetched).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2024, help="Start year to fetch games from")
+    parser.add_argument("--end_year", type=int, default=2024, help="End year to fetch games from")
+    parser.add_argument("--year", type=int, default=None, help="Year to fetch games from (if no date range is needed). Leave blank if a range is needed")
+    parser.add_argument("--refresh", action="store_true", help="Refetch every month and rewrite game days that are already stored")
+    args = parser.parse_args()
+
+    start_yr = args.start_year
+    end_yr = args.end_year
+    if args.year is not None:
+        start_yr = args.year
+        end_yr = args.year
+
+    fetch_season_games(start_year=start_yr, end_year=end_yr, refresh=args.refresh)
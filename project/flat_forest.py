@@ -0,0 +1,227 @@
+import numpy as np
+import argparse
+import json
+import os
+import pickle
+import shutil
+import time
+
+# flat, array-backed random forest for fast scoring without sklearn
+# every tree of a trained RandomForestRegressor is concatenated into one set of node arrays:
+#   feature[i], threshold[i]   split of node i (feature is -2 for leaves)
+#   left[i], right[i]          global index of the children of node i (-1 for leaves)
+#   value[i]                   prediction stored at node i
+#   roots[t]                   global index of the root of tree t
+# the arrays are saved as separate .npy files so they can be memory-mapped
+
+ARRAYS = ["feature", "threshold", "left", "right", "value", "roots"]
+
+
+def export_forest(model, features, out_dir):
+    """
+    Compile a trained RandomForestRegressor into flat node arrays and save them to a directory.
+
+    Args:
+        model (RandomForestRegressor): Trained Random Forest model.
+        features (list): List of feature column names the model was trained on.
+        out_dir (str): Directory to write the artifact to.
+    Returns:
+        dict: The flat forest arrays.
+    """
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        feature.append(np.where(is_leaf, -2, tree.feature).astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        left.append(np.where(is_leaf, -1, tree.children_left + offset).astype(np.int32))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset).astype(np.int32))
+        value.append(tree.value[:, 0, 0].astype(np.float64))
+        max_depth = max(max_depth, tree.max_depth)
+        offset += tree.node_count
+
+    forest = {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left),
+        "right": np.concatenate(right),
+        "value": np.concatenate(value),
+        "roots": np.asarray(roots, dtype=np.int32)
+    }
+
+    # write into a temporary directory and swap it in, so the files of an artifact that is memory-mapped or being
+    # loaded elsewhere are never rewritten in place (truncated arrays read back as zeros or fault the reader)
+    out_dir = os.path.normpath(out_dir)
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), forest[name])
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump({"features": list(features), "n_trees": len(roots), "n_nodes": int(offset), "max_depth": int(max_depth)}, f)
+    if os.path.isdir(out_dir):
+        old_dir = out_dir + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(tmp_dir, out_dir)
+    print(f"Flat forest saved to: {out_dir}")
+    return forest
+
+
+def load_forest(model_dir, mmap=True):
+    """
+    Load a flat forest artifact.
+
+    Args:
+        model_dir (str): Directory the artifact was exported to.
+        mmap (bool): Memory-map the node arrays instead of reading them into memory.
+    Returns:
+        tuple: (dict of node arrays, metadata dict)
+    """
+    mode = "r" if mmap else None
+    forest = {name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS}
+    with open(os.path.join(model_dir, "meta.json")) as f:
+        meta = json.load(f)
+    return forest, meta
+
+
+def predict_forest(forest, X, max_depth):
+    """
+    Score a batch of rows with a flat forest. All trees and rows are traversed together: each step moves every
+    (tree, row) pointer that has not reached a leaf one level down, so the Python loop runs at most max_depth
+    times regardless of the forest size.
+
+    Args:
+        forest (dict): Flat forest node arrays.
+        X (np.ndarray): Feature matrix of shape (n_rows, n_features), columns in training order.
+        max_depth (int): Depth of the deepest tree.
+    Returns:
+        np.ndarray: Predictions averaged over the trees.
+    """
+    # sklearn compares float32 features against float64 thresholds
+    X = np.asarray(X, dtype=np.float32)
+    feature, threshold = forest["feature"], forest["threshold"]
+    left, right = forest["left"], forest["right"]
+    n_rows = len(X)
+
+    # one pointer per (tree, row); pointers that reach a leaf are dropped from the active set
+    node = np.repeat(np.asarray(forest["roots"], dtype=np.int64), n_rows)
+    row = np.tile(np.arange(n_rows), len(forest["roots"]))
+    active = np.arange(len(node))
+    for _ in range(max_depth):
+        cur = node[active]
+        feat = feature[cur]
+        internal = feat >= 0
+        active, cur, feat = active[internal], cur[internal], feat[internal]
+        if len(active) == 0:
+            break
+        go_left = X[row[active], feat] <= threshold[cur]
+        node[active] = np.where(go_left, left[cur], right[cur])
+
+    node = node.reshape(len(forest["roots"]), n_rows)
+    return forest["value"][node].mean(axis=0)
+
+
+def artifact_size(model_dir):
+    """
+    Total size in bytes of a flat forest artifact on disk.
+
+    Args:
+        model_dir (str): Directory the artifact was exported to.
+    Returns:
+        int: Size in bytes.
+    """
+    return sum(os.path.getsize(os.path.join(model_dir, f)) for f in os.listdir(model_dir))
+
+
+def benchmark(model, forest, meta, X, repeats=50):
+    """
+    Compare latency and footprint of RandomForestRegressor.predict with the flat forest engine.
+
+    Args:
+        model (RandomForestRegressor): Trained Random Forest model.
+        forest (dict): Flat forest node arrays exported from model.
+        meta (dict): Flat forest metadata.
+        X (pd.DataFrame): Rows to score, with the training feature columns.
+        repeats (int): Number of timed runs.
+    Returns:
+        dict: Median latency (ms) of both engines, the max prediction difference and the model sizes (bytes).
+    """
+    def median_ms(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) * 1000)
+        return float(np.median(times))
+
+    X_flat = X[meta["features"]].to_numpy()
+    sk_pred = model.predict(X)
+    flat_pred = predict_forest(forest, X_flat, meta["max_depth"])
+    return {
+        "sklearn predict (ms)": median_ms(lambda: model.predict(X)),
+        "flat predict (ms)": median_ms(lambda: predict_forest(forest, X_flat, meta["max_depth"])),
+        "max abs diff": float(np.abs(sk_pred - flat_pred).max()),
+        "sklearn pickle (bytes)": len(pickle.dumps(model)),
+        "flat arrays (bytes)": int(sum(forest[name].nbytes for name in ARRAYS))
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--export", action="store_true", help="Train a Random Forest on ./data/data.csv and export it as a flat forest")
+    parser.add_argument("--eval_year", type=int, default=None, help="Score a specific year with the exported flat forest (no sklearn import)")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the flat forest against RandomForestRegressor.predict")
+    parser.add_argument("--model_dir", type=str, default="./models/rf_flat", help="Directory of the flat forest artifact")
+    parser.add_argument("--n_estimators", type=int, default=100, help="Number of trees in the Random Forest")
+    parser.add_argument("--max_depth", type=int, default=None, help="Maximum depth of the trees")
+    args = parser.parse_args()
+
+    FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+    RESPONSE_VAR = "W/L%"  # Using Win% as the response variable
+
+    import pandas as pd
+
+    if args.export or args.benchmark:
+        # sklearn is only needed to train the forest
+        from rf import train_random_forest
+
+        full_data = pd.read_csv("./data/data.csv")
+        model = train_random_forest(full_data, FEATURES, RESPONSE_VAR, n_estimators=args.n_estimators, max_depth=args.max_depth)
+        export_forest(model, FEATURES, args.model_dir)
+
+        if args.benchmark:
+            forest, meta = load_forest(args.model_dir)
+            year_X = pd.read_csv("./data/2024/data_2024.csv")[FEATURES]
+            for label, X in [("one season (30 rows)", year_X), (f"full data ({len(full_data)} rows)", full_data[FEATURES])]:
+                print(f"\nBenchmark on {label}:")
+                for key, val in benchmark(model, forest, meta, X).items():
+                    print(f"{key}: {val:.6g}")
+            print(f"artifact on disk (bytes): {artifact_size(args.model_dir)}")
+
+    if args.eval_year is not None:
+        forest, meta = load_forest(args.model_dir)
+        df = pd.read_csv(f"./data/{args.eval_year}/data_{args.eval_year}.csv")
+        y_pred = predict_forest(forest, df[meta["features"]].to_numpy(), meta["max_depth"])
+        tot_games = df["W"] + df["L"]
+
+        results = pd.DataFrame({
+            "Team": df["Team"],
+            "Actual Win%": df[RESPONSE_VAR],
+            "Predicted Win%": y_pred,
+            "Actual Wins": df["W"],
+            "Predicted Wins": (tot_games * y_pred).round(2)
+        })
+        rmse = np.sqrt(np.mean((df[RESPONSE_VAR] - y_pred) ** 2))
+        r2 = 1 - np.sum((df[RESPONSE_VAR] - y_pred) ** 2) / np.sum((df[RESPONSE_VAR] - df[RESPONSE_VAR].mean()) ** 2)
+        print(f"\nEvaluation Results for {args.eval_year}:")
+        print(results)
+        print(f"\nMetrics for {args.eval_year}:")
+        print(f"Root Mean Squared Error (RMSE): {rmse:.3f}")
+        print(f"R^2 Score: {r2:.3f}")
@@ -0,0 +1,199 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from fetch_games import load_games, load_team_ids
+
+# rolling team form features over the game results stored by fetch_games.py
+# every team's games are laid out as one row of a (teams x games) matrix, so last-N-games averages are a cumulative
+# sum difference and exponentially weighted averages are a linear filter along the rows, with no per-team loops.
+# the form of every team as of every game day (carried forward from its last game) is saved to
+# ./data/{year}/form_daily_{year}.csv and the end of regular season values to ./data/{year}/form_{year}.csv,
+# which can be used as features (see assemble_data.CONFIG)
+
+WINDOWS = [5, 10, 20]
+EWM_SPANS = [10]
+
+
+def team_game_matrix(games):
+    """
+    Lay out a season's games per team, in date order.
+
+    Args:
+        games (dict): Columns from fetch_games.load_games (played games only).
+    Returns:
+        tuple: (team ids, games played per team, (row, col) position of each team-game, team-game columns)
+    """
+    n = len(games["date"])
+    margin = games["home_pts"].astype(np.float64) - games["away_pts"]
+    # one row per team per game, from that team's point of view
+    team = np.concatenate([games["home"], games["away"]])
+    cols = {
+        "date": np.tile(games["date"], 2),
+        "playoff": np.tile(games["playoff"], 2),
+        "margin": np.concatenate([margin, -margin]),
+    }
+    cols["win"] = (cols["margin"] > 0).astype(np.float64)
+
+    order = np.lexsort((cols["date"], team))
+    team = team[order]
+    cols = {col: arr[order] for col, arr in cols.items()}
+
+    team_ids, row, counts = np.unique(team, return_inverse=True, return_counts=True)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    col = np.arange(2 * n) - starts[row]
+    return team_ids, counts, (row, col), cols
+
+
+def to_matrix(values, pos, shape):
+    X = np.zeros(shape)
+    X[pos] = values
+    return X
+
+
+def rolling_mean(X, window):
+    """
+    Mean of the last `window` games (or all games so far, early in the season) after every game.
+
+    Args:
+        X (np.ndarray): (teams x games) values, zero padded.
+        window (int): Number of games in the window.
+    Returns:
+        np.ndarray: (teams x games) rolling means.
+    """
+    S = np.concatenate([np.zeros((X.shape[0], 1)), np.cumsum(X, axis=1)], axis=1)
+    j = np.arange(X.shape[1])
+    lo = np.maximum(j + 1 - window, 0)
+    return (S[:, j + 1] - S[:, lo]) / np.minimum(j + 1, window)
+
+
+def ewm_mean(X, span):
+    """
+    Exponentially weighted mean after every game, with alpha = 2 / (span + 1). Weights are renormalized early in
+    the season (the same as pandas ewm with adjust=True).
+
+    Args:
+        X (np.ndarray): (teams x games) values, zero padded.
+        span (float): Span of the exponential weights.
+    Returns:
+        np.ndarray: (teams x games) weighted means.
+    """
+    alpha = 2.0 / (span + 1.0)
+    a = [1.0, -(1.0 - alpha)]
+    num = lfilter([1.0], a, X, axis=1)
+    den = lfilter([1.0], a, np.ones(X.shape[1]))
+    return num / den
+
+
+def form_features(games, windows=WINDOWS, spans=EWM_SPANS):
+    """
+    Rolling margin and win% of every team after every game.
+
+    Args:
+        games (dict): Columns from fetch_games.load_games (played games only).
+        windows (list): Last-N-games windows.
+        spans (list): Spans of the exponentially weighted means.
+    Returns:
+        dict: Column name -> numpy array, one entry per team-game ordered by team then date.
+    """
+    team_ids, counts, pos, cols = team_game_matrix(games)
+    shape = (len(team_ids), counts.max())
+
+    out = {"team": team_ids[pos[0]], "date": cols["date"], "G": pos[1] + 1, "playoff": cols["playoff"]}
+    for name, key in (("Margin", "margin"), ("Win%", "win")):
+        X = to_matrix(cols[key], pos, shape)
+        for window in windows:
+            out[f"{name}_L{window}"] = rolling_mean(X, window)[pos]
+        for span in spans:
+            out[f"{name}_EWM{span}"] = ewm_mean(X, span)[pos]
+    return out
+
+
+def daily_grid(form):
+    """
+    Carry the form of every team forward onto a (game day x team) grid, so each row is a team's form as of the end
+    of that day. Days before a team's first game have G = 0 and no feature values.
+
+    Args:
+        form (dict): Team-game columns from form_features, ordered by team then date.
+    Returns:
+        dict: Column name -> numpy array, one entry per game day and team, ordered by date then team.
+    """
+    team_ids, row = np.unique(form["team"], return_inverse=True)
+    days = np.unique(form["date"])
+
+    # the last game of each team on or before each day, found with one search over (team, date) keys
+    keys = row.astype(np.int64) * 100_000_000 + form["date"]
+    grid_row = np.tile(np.arange(len(team_ids)), len(days))
+    grid_date = np.repeat(days, len(team_ids))
+    last = np.searchsorted(keys, grid_row.astype(np.int64) * 100_000_000 + grid_date, side="right") - 1
+    played = (last >= 0) & (row[np.maximum(last, 0)] == grid_row)
+    last = np.maximum(last, 0)
+
+    out = {"team": team_ids[grid_row], "date": grid_date, "G": np.where(played, form["G"][last], 0),
+           "playoff": np.where(played, form["playoff"][last], 0)}
+    for col, values in form.items():
+        if col.startswith(("Margin_", "Win%_")):
+            out[col] = np.where(played, values[last], np.nan)
+    return out
+
+
+def save_form(year, windows=WINDOWS, spans=EWM_SPANS):
+    """
+    Compute a season's form features from its stored games and save the daily and end of regular season values.
+
+    Args:
+        year (int): Year for which the data will be processed.
+        windows (list): Last-N-games windows.
+        spans (list): Spans of the exponentially weighted means.
+    """
+    games = load_games(year)
+    if games is None:
+        return
+    start = time.perf_counter()
+    form = form_features(games, windows=windows, spans=spans)
+    grid = daily_grid(form)
+    elapsed = time.perf_counter() - start
+
+    names = {team_id: name for name, team_id in load_team_ids().items()}
+
+    def to_frame(cols):
+        df = pd.DataFrame(cols)
+        df.insert(0, "Team", [names.get(t, str(t)) for t in cols["team"]])
+        df = df.drop(columns=["team"]).rename(columns={"date": "Date", "playoff": "Playoff"})
+        feature_cols = [col for col in df.columns if col.startswith(("Margin_", "Win%_"))]
+        df[feature_cols] = df[feature_cols].round(4)
+        return df, feature_cols
+
+    daily, feature_cols = to_frame(grid)
+    daily = daily[["Date", "Team"] + [col for col in daily.columns if col not in ("Date", "Team")]]
+    daily_path = f"./data/{year}/form_daily_{year}.csv"
+    daily.to_csv(daily_path, index=False)
+
+    # the last regular season game of each team
+    df, _ = to_frame(form)
+    season = df[df["Playoff"] == 0].groupby("Team", sort=False).tail(1)
+    season_path = f"./data/{year}/form_{year}.csv"
+    season[["Team"] + feature_cols].to_csv(season_path, index=False)
+    print(f"Processed and saved: {daily_path}, {season_path} ({len(df)} team-games, {len(daily)} team-days in {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2024, help="Start year to process")
+    parser.add_argument("--end_year", type=int, default=2024, help="End year to process")
+    parser.add_argument("--year", type=int, default=None, help="Year to process (if no date range is needed). Leave blank if a range is needed")
+    parser.add_argument("--windows", type=int, nargs="+", default=WINDOWS, help="Last-N-games windows")
+    parser.add_argument("--spans", type=float, nargs="*", default=EWM_SPANS, help="Spans of the exponentially weighted means")
+    args = parser.parse_args()
+
+    start_yr = args.start_year
+    end_yr = args.end_year
+    if args.year is not None:
+        start_yr = args.year
+        end_yr = args.year
+
+    spans = [int(s) if float(s).is_integer() else s for s in args.spans]
+    for i in range(start_yr, end_yr + 1):
+        save_form(year=i, windows=args.windows, spans=spans)
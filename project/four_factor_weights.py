@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+from datetime import date
+import numpy as np
+import pandas as pd
+from scipy.optimize import nnls
+from four_factors import OFFENSIVE_FACTORS, DEFENSIVE_FACTORS, WEIGHTS
+from feature_search import season_folds
+
+# data-driven four factor weights
+# every season's raw factors are stacked once, all three normalize_data methods are applied per season in one
+# vectorized pass, and the weights against W/L% are fit for every method and cross-validation fold in a single
+# batched solve. The chosen weights are written as a versioned config that four_factors.py can load with --weights.
+
+METHODS = ["zscore", "min-max", "centered"]
+FACTORS = OFFENSIVE_FACTORS + DEFENSIVE_FACTORS
+WEIGHTS_DIR = "./data/weights"
+
+
+def load_raw_factors(start_year, end_year):
+    """
+    Stack the raw four factors and W/L% of a range of seasons.
+
+    Args:
+        start_year (int): First season.
+        end_year (int): Last season.
+    Returns:
+        tuple: (factors (rows x 8), W/L%, season of each row), or None if no season was found.
+    """
+    frames = []
+    for year in range(start_year, end_year + 1):
+        path = f"./data/{year}/adv_{year}.csv"
+        if not os.path.exists(path):
+            print(f"ERROR: File not found: {path}")
+            continue
+        df = pd.read_csv(path).iloc[:-1]  # ignore league avg row, as in four_factors.py
+        df["Season"] = year
+        frames.append(df)
+    if not frames:
+        return None
+
+    df = pd.concat(frames, ignore_index=True)
+    X = df[FACTORS].to_numpy(dtype=np.float64)
+    y = (df["W"] / (df["W"] + df["L"])).to_numpy(dtype=np.float64)
+    return X, y, df["Season"].to_numpy()
+
+
+def normalize_all(X, seasons):
+    """
+    Apply every normalize_data method to each season's rows at once (seasons must be contiguous).
+
+    Args:
+        X (np.ndarray): Raw factors (rows x factors).
+        seasons (np.ndarray): Season of each row.
+    Returns:
+        np.ndarray: Normalized factors of shape (methods, rows, factors), in the order of METHODS.
+    """
+    starts = np.flatnonzero(np.r_[True, seasons[1:] != seasons[:-1]])
+    counts = np.diff(np.r_[starts, len(seasons)])
+    group = np.repeat(np.arange(len(starts)), counts)
+
+    mean = np.add.reduceat(X, starts, axis=0) / counts[:, None]
+    centered = X - mean[group]
+    # sample standard deviation, like pandas
+    std = np.sqrt(np.add.reduceat(centered ** 2, starts, axis=0) / (counts[:, None] - 1))
+    low = np.minimum.reduceat(X, starts, axis=0)
+    high = np.maximum.reduceat(X, starts, axis=0)
+
+    return np.stack([centered / std[group], (X - low[group]) / (high - low)[group], centered])
+
+
+def fit_weights(N, y, folds, alpha=0.0, signed=False):
+    """
+    Fit the factor weights (plus an intercept) of every normalization method, on all the rows and on each
+    cross-validation fold's training rows. The ridge fits of all methods and folds are one batched solve of the
+    (methods x fits) normal equations. With signed=True each weight is kept to the sign of its Dean Oliver
+    weight (non-negative least squares on the sign-flipped factors, one small solve per method and fit).
+
+    Args:
+        N (np.ndarray): Normalized factors (methods x rows x factors).
+        y (np.ndarray): W/L% of each row.
+        folds (np.ndarray): Fold index of each row.
+        alpha (float): Ridge penalty on each weight, relative to the variance of its factor so it means the same for
+            every method and every factor scale (the intercept is not penalized).
+        signed (bool): Constrain the weight signs.
+    Returns:
+        tuple: (weights (methods x fits x factors), intercepts (methods x fits)); fit 0 uses all the rows and fit
+            f + 1 leaves out fold f.
+    """
+    n_methods, n, k = N.shape
+    n_folds = folds.max() + 1
+    # training row masks: all rows, then each fold left out
+    masks = np.vstack([np.ones(n, dtype=bool), folds[None, :] != np.arange(n_folds)[:, None]]).astype(np.float64)
+    counts = masks.sum(axis=1)
+
+    # per-fit means of the factors and response, so the intercept drops out of the solve
+    X_mean = np.einsum("fr,mrk->mfk", masks, N) / counts[None, :, None]
+    y_mean = masks @ y / counts
+
+    # centered cross-products of every (method, fit) pair
+    G = np.einsum("fr,mrj,mrk->mfjk", masks, N, N) - counts[None, :, None, None] * np.einsum("mfj,mfk->mfjk", X_mean, X_mean)
+    b = np.einsum("fr,mrk,r->mfk", masks, N, y) - counts[None, :, None] * X_mean * y_mean[None, :, None]
+    # scaling the diagonal is ridge on the standardized factors, i.e. each factor is penalized relative to its variance
+    G = G + alpha * np.einsum("mfkk->mfk", G)[..., None] * np.eye(k)
+
+    if signed:
+        sign = np.sign([WEIGHTS[factor] for factor in FACTORS])
+        weights = np.empty((n_methods, len(counts), k))
+        for m in range(n_methods):
+            for f in range(len(counts)):
+                # least squares on the Gram matrix: ||R w - R^-T b|| with R the Cholesky factor of G
+                R = np.linalg.cholesky(G[m, f] * np.outer(sign, sign)).T
+                w, _ = nnls(R, np.linalg.solve(R.T, b[m, f] * sign))
+                weights[m, f] = w * sign
+    else:
+        weights = np.linalg.solve(G, b[..., None])[..., 0]
+
+    intercepts = y_mean[None, :] - np.einsum("mfk,mfk->mf", X_mean, weights)
+    return weights, intercepts
+
+
+def evaluate(N, y, folds, weights, intercepts):
+    """
+    In-sample and cross-validated RMSE and R^2 of each method's fitted weights.
+
+    Returns:
+        pd.DataFrame: One row per method.
+    """
+    pred = np.einsum("mrk,mk->mr", N, weights[:, 0]) + intercepts[:, 0, None]
+    # each row is predicted by the fit that left its fold out
+    cv_pred = np.einsum("mrk,mrk->mr", N, weights[:, folds + 1]) + intercepts[:, folds + 1]
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    sse = np.sum((pred - y) ** 2, axis=1)
+    cv_sse = np.sum((cv_pred - y) ** 2, axis=1)
+    return pd.DataFrame({
+        "RMSE": np.sqrt(sse / len(y)),
+        "R2": 1 - sse / ss_tot,
+        "CV-RMSE": np.sqrt(cv_sse / len(y)),
+        "CV-R2": 1 - cv_sse / ss_tot
+    }, index=METHODS)
+
+
+def oliver_baseline(N, y):
+    """
+    RMSE of W/L% regressed on the Four-Factor Score with the hard-coded weights, for each method.
+    """
+    w = np.array([WEIGHTS[factor] for factor in FACTORS])
+    score = N @ w
+    rmse = []
+    for s in score:
+        slope, intercept = np.polyfit(s, y, 1)
+        rmse.append(np.sqrt(np.mean((intercept + slope * s - y) ** 2)))
+    return pd.Series(rmse, index=METHODS, name="Oliver RMSE")
+
+
+def to_config(weights, intercept, method, metrics, start_year, end_year, alpha, signed):
+    """
+    Weights config in the four_factors.py convention: the weights are rescaled so their absolute values sum to 2
+    (1 for offense and 1 for defense, like the Dean Oliver weights), and the scale that maps the resulting
+    Four-Factor Score back to W/L% is stored with them.
+    """
+    scale = np.abs(weights).sum() / 2
+    return {
+        "norm": method,
+        "weights": {factor: round(float(w / scale), 6) for factor, w in zip(FACTORS, weights)},
+        "score_scale": float(scale),
+        "intercept": float(intercept),
+        "fit": {"start_year": start_year, "end_year": end_year, "alpha": alpha, "signed": signed,
+                "date": date.today().isoformat()},
+        "metrics": {key: float(value) for key, value in metrics.items()}
+    }
+
+
+def save_config(config, weights_dir=WEIGHTS_DIR):
+    """
+    Write a weights config as the next version in weights_dir (four_factors_v{n}.json).
+
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(weights_dir, exist_ok=True)
+    versions = [int(name[len("four_factors_v"):-len(".json")]) for name in os.listdir(weights_dir)
+                if name.startswith("four_factors_v") and name.endswith(".json")]
+    config = {"version": max(versions, default=0) + 1, **config}
+    path = os.path.join(weights_dir, f"four_factors_v{config['version']}.json")
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2000, help="First season of the fit")
+    parser.add_argument("--end_year", type=int, default=2020, help="Last season of the fit")
+    parser.add_argument("--alpha", type=float, default=0.0, help="Ridge penalty on the weights (relative to each factor's variance)")
+    parser.add_argument("--signed", action="store_true", help="Keep each weight to the sign of its Dean Oliver weight")
+    parser.add_argument("--n_folds", type=int, default=5, help="Number of season-grouped cross-validation folds")
+    parser.add_argument("--norm", type=str, default=None, choices=METHODS, help="Normalization method of the saved weights (lowest CV-RMSE if not set)")
+    parser.add_argument("--no_save", action="store_true", help="Only print the comparison")
+    args = parser.parse_args()
+
+    raw = load_raw_factors(args.start_year, args.end_year)
+    if raw is None:
+        print("ERROR: No data loaded")
+        exit()
+    X, y, seasons = raw
+
+    N = normalize_all(X, seasons)
+    folds = season_folds(seasons, args.n_folds)
+    weights, intercepts = fit_weights(N, y, folds, alpha=args.alpha, signed=args.signed)
+    results = evaluate(N, y, folds, weights, intercepts).join(oliver_baseline(N, y))
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", None)
+    print(f"{len(y)} team seasons from {args.start_year}-{args.end_year}")
+    print(results.round(4))
+    print("\nFitted weights:")
+    print(pd.DataFrame(weights[:, 0], index=METHODS, columns=FACTORS).round(4))
+
+    method = args.norm or results["CV-RMSE"].idxmin()
+    m = METHODS.index(method)
+    config = to_config(weights[m, 0], intercepts[m, 0], method, results.loc[method], args.start_year, args.end_year,
+                       args.alpha, args.signed)
+    if not args.no_save:
+        path = save_config(config)
+        print(f"\n{method} weights saved to: {path}")
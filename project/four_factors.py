@@ -1,7 +1,21 @@
 import pandas as pd
 import argparse
+import json
 import os
-
+import sys
+from season_norm import update_season, output_signature, DEFAULT_TOL
+import tracing
+from tracing import traced
+
+OFFENSIVE_FACTORS = ["Off eFG%", "Off TOV%", "ORB%", "Off FT/FGA%"]
+DEFENSIVE_FACTORS = ["Def eFG%", "Def TOV%", "DRB%", "Def FT/FGA%"]
+# weights for score calculation
+WEIGHTS = {
+    "Off eFG%": 0.40, "Off TOV%": -0.25, "ORB%": 0.20, "Off FT/FGA%": 0.15,
+    "Def eFG%": -0.40, "Def TOV%": 0.25, "DRB%": 0.20, "Def FT/FGA%": -0.15
+}
+
+@traced()
 def normalize_data(df, method, cols):
     """
     Normalize the specified columns in the DataFrame using the specified method.
@@ -23,6 +37,21 @@ def normalize_data(df, method, cols):
     else:
         raise ValueError(f"Normalization method {method} not supported")
 
+def load_weights(path):
+    """
+    Load a weights config written by four_factor_weights.py.
+
+    Parameters:
+        path (str): Path to the JSON weights config.
+
+    Returns:
+        tuple: (weights dict, normalization method the weights were fit with)
+    """
+    with open(path) as f:
+        config = json.load(f)
+    return config["weights"], config["norm"]
+
+@traced()
 def calculate_four_factor_score(df, weights, factors):
     """
     Calculate a weighted score for specified factors.
@@ -37,16 +66,92 @@ def calculate_four_factor_score(df, weights, factors):
     """
     return sum(weights[factor] * df[factor] for factor in factors)
 
+@traced()
+def compute_four_factors(year, norm="zscore", weights=WEIGHTS, incremental=False, tol=DEFAULT_TOL):
+    """
+    Normalize the four factors of a given year, calculate the offensive, defensive and total Four-Factor Scores and
+    save them to ./data/{year}/four_factors_{year}.csv.
+
+    Parameters:
+        year (int): Year for which the data will be processed.
+        norm (str): Normalization method ('zscore', 'min-max', 'centered').
+        weights (dict): Dictionary mapping factors to their weights.
+        incremental (bool): Only renormalize the teams that changed since the last run (see season_norm.py).
+        tol (float): Drift of the normalization constants that triggers renormalizing every team.
+    """
+    offensive_factors = OFFENSIVE_FACTORS
+    defensive_factors = DEFENSIVE_FACTORS
+
+    path = f"./data/{year}/adv_{year}.csv" # path of adv stats table
+    # load csv and transform data
+    if not os.path.exists(path=path):
+        print(f"File not found: {path}")
+        return
+
+    with tracing.span("read csv", year=year):
+        df = pd.read_csv(path)
+    df = df.iloc[:-1] # ignore leageue avg row
+    tracing.count("rows", len(df))
+
+    all_factors = offensive_factors + defensive_factors
+    outpath = f"./data/{year}/four_factors_{year}.csv"
+
+    try:
+        if incremental:
+            # the scores also depend on the weights, so a weights change rewrites the output
+            signature = output_signature(path, weights=weights)
+            values, n_changed, write = update_season(year, "four_factors", df, all_factors, norm, tol=tol,
+                                                     output_path=outpath, signature=signature)
+            if not write:
+                print(f"No changes in {path}")
+                tracing.count("cache hits")
+                return
+            normalized_factors = pd.DataFrame(values, columns=all_factors, index=df.index).round(6)
+        else:
+            normalized_factors = normalize_data(df, norm, all_factors).round(6)
+
+        # make new df and copy over cols
+        normalized_df = pd.DataFrame()
+        normalized_df['Team'] = df['Team']  
+        normalized_df['W'] = df['W']
+        normalized_df['L'] = df['L']
+        normalized_df['W/L%'] = (df['W'] / (df['W'] + df['L'])).round(6)
+
+        # add normalized off/def four factors
+        for col in all_factors:
+            normalized_df[col] = normalized_factors[col]
+
+        # off/def four factor score calculation
+        normalized_df['Offensive Score'] = calculate_four_factor_score(normalized_df, weights, offensive_factors).round(6)
+        normalized_df['Defensive Score'] = calculate_four_factor_score(normalized_df, weights, defensive_factors).round(6)
+        normalized_df['Four-Factor Score'] = (normalized_df['Offensive Score'] + normalized_df['Defensive Score']).round(6)
+        
+
+        # write to csv
+        with tracing.span("write csv", year=year):
+            normalized_df.to_csv(outpath, index=False)
+        print(f"Four factors for year {year} saved to: {outpath}")
+            
+    except ValueError as e:
+        print(e)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--start_year", type=int, default=2024, help="Start year to fetch data from")
     parser.add_argument("--end_year", type=int, default=2024, help="End year to fetch data from")
     parser.add_argument("--year", type=int, default=None, help="Year to fetch data from (if no date range is needed). Leave blank if a range is needed")
-    parser.add_argument("--norm", type=str, default="zscore", choices=["zscore", "min-max", "centered"],
-                        help="Normalization method to use on the four factors")
+    parser.add_argument("--norm", type=str, default=None, choices=["zscore", "min-max", "centered"],
+                        help="Normalization method to use on the four factors (zscore if not set, or the method of --weights)")
+    parser.add_argument("--weights", type=str, default=None,
+                        help="Weights config from four_factor_weights.py (uses its normalization method). Leave blank for the Dean Oliver weights")
+    parser.add_argument("--incremental", action="store_true", help="Only renormalize the teams that changed since the last run")
+    parser.add_argument("--tol", type=float, default=DEFAULT_TOL, help="Drift of the normalization constants (relative to the factor's spread) that triggers renormalizing every team")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
 
     # parse params
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     start_yr = args.start_year
     end_yr = args.end_year
@@ -54,51 +159,16 @@ if __name__ == "__main__":
         start_yr = args.year
         end_yr = args.year
 
-    offensive_factors = ["Off eFG%", "Off TOV%", "ORB%", "Off FT/FGA%"]
-    defensive_factors = ["Def eFG%", "Def TOV%", "DRB%", "Def FT/FGA%"]
-    # weights for score calculation
-    weights = {
-        "Off eFG%": 0.40, "Off TOV%": -0.25, "ORB%": 0.20, "Off FT/FGA%": 0.15,
-        "Def eFG%": -0.40, "Def TOV%": 0.25, "DRB%": 0.20, "Def FT/FGA%": -0.15
-    }
+    weights = WEIGHTS
+    if args.weights is not None:
+        weights, weights_norm = load_weights(args.weights)
+        if args.norm is not None and args.norm != weights_norm:
+            print(f"ERROR: --norm {args.norm} does not match the {weights_norm} normalization of {args.weights}")
+            sys.exit(1)
+        args.norm = weights_norm
+        print(f"Using {args.norm} weights from: {args.weights}")
+    elif args.norm is None:
+        args.norm = "zscore"
 
     for i in range(start_yr, end_yr + 1):
-        path = f"./data/{i}/adv_{i}.csv" # path of adv stats table
-        # load csv and transform data
-        if not os.path.exists(path=path):
-            print(f"File not found: {path}")
-            continue
-
-        df = pd.read_csv(path)
-        df = df.iloc[:-1] # ignore leageue avg row
-
-        all_factors = offensive_factors + defensive_factors
-
-        try:
-            normalized_factors = normalize_data(df, args.norm, all_factors).round(6)
-
-            # make new df and copy over cols
-            normalized_df = pd.DataFrame()
-            normalized_df['Team'] = df['Team']  
-            normalized_df['W'] = df['W']
-            normalized_df['L'] = df['L']
-            normalized_df['W/L%'] = (df['W'] / (df['W'] + df['L'])).round(6)
-
-            # add normalized off/def four factors
-            for col in all_factors:
-                normalized_df[col] = normalized_factors[col]
-
-            # off/def four factor score calculation
-            normalized_df['Offensive Score'] = calculate_four_factor_score(normalized_df, weights, offensive_factors).round(6)
-            normalized_df['Defensive Score'] = calculate_four_factor_score(normalized_df, weights, defensive_factors).round(6)
-            normalized_df['Four-Factor Score'] = (normalized_df['Offensive Score'] + normalized_df['Defensive Score']).round(6)
-            
-
-            # write to csv
-            outpath = f"./data/{i}/four_factors_{i}.csv"
-            normalized_df.to_csv(outpath, index=False)
-            print(f"Four factors for year {i} saved to: {outpath}")
-                
-        except ValueError as e:
-            print(e)
-            continue
+        compute_four_factors(i, norm=args.norm, weights=weights, incremental=args.incremental, tol=args.tol)
@@ -0,0 +1,286 @@
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+import argparse
+import pickle
+import sys
+import time
+import numpy as np
+from assemble_data import load_yearly_data
+from rf import train_random_forest
+import tracing
+from tracing import traced
+
+@traced()
+def load_data(train_path, test_path):
+    """
+    Load training and testing data from CSV files.
+
+    Args:
+        train_path (str): Path to the training CSV file.
+        test_path (str): Path to the testing CSV file.
+    Returns:
+        tuple: training and testing data as Pandas DataFrames.
+    """
+    train_data = pd.read_csv(train_path)
+    test_data = pd.read_csv(test_path)
+    tracing.count("rows", len(train_data) + len(test_data))
+    return train_data, test_data
+
+
+def season_split(seasons, val_fraction=0.2, random_state=42):
+    """
+    Split rows into train/validation masks by holding out whole seasons.
+
+    Args:
+        seasons (np.ndarray): Season of each row.
+        val_fraction (float): Fraction of the seasons held out for validation.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        np.ndarray: Boolean mask of the validation rows.
+    """
+    unique_seasons = np.unique(seasons)
+    n_val = max(1, int(round(val_fraction * len(unique_seasons))))
+    val_seasons = np.random.default_rng(random_state).choice(unique_seasons, size=n_val, replace=False)
+    return np.isin(seasons, val_seasons)
+
+
+@traced()
+def train_gradient_boosting(train_data, features, response_var, learning_rate=0.1, max_iter=500, max_leaf_nodes=31,
+                            max_bins=255, val_fraction=0.2, patience=10, random_state=42):
+    """
+    Train a histogram-based gradient boosting model with early stopping on a season-grouped validation split.
+    The boosting rounds are chosen on held-out seasons (so teams from one season are never split between train and
+    validation), then the model is refit on all seasons with that number of rounds.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset. Must include a "Season" column.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        learning_rate (float): Shrinkage applied to each tree.
+        max_iter (int): Maximum number of boosting rounds.
+        max_leaf_nodes (int): Maximum number of leaves per tree.
+        max_bins (int): Number of histogram bins per feature.
+        val_fraction (float): Fraction of the seasons held out for early stopping.
+        patience (int): Rounds without validation improvement before stopping.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        tuple: (trained HistGradientBoostingRegressor, number of boosting rounds)
+    """
+    X = train_data[features]
+    y = train_data[response_var]
+    val_mask = season_split(train_data["Season"].to_numpy(), val_fraction=val_fraction, random_state=random_state)
+
+    params = {"learning_rate": learning_rate, "max_leaf_nodes": max_leaf_nodes, "max_bins": max_bins,
+              "early_stopping": False, "random_state": random_state}
+    model = HistGradientBoostingRegressor(max_iter=max_iter, **params)
+    model.fit(X[~val_mask], y[~val_mask])
+
+    # validation error after each round
+    best_iter, best_rmse, stale = 1, np.inf, 0
+    for i, y_val_pred in enumerate(model.staged_predict(X[val_mask]), start=1):
+        rmse = np.sqrt(mean_squared_error(y[val_mask], y_val_pred))
+        if rmse < best_rmse:
+            best_iter, best_rmse, stale = i, rmse, 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    # refit on every season with the selected number of rounds
+    model = HistGradientBoostingRegressor(max_iter=best_iter, **params)
+    model.fit(X, y)
+    return model, best_iter
+
+
+@traced()
+def evaluate_model(model, test_data, features, response_var):
+    """
+    Evaluate the gradient boosting model on the testing data.
+
+    Args:
+        model (HistGradientBoostingRegressor): Trained gradient boosting model.
+        test_data (pd.DataFrame): Testing dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+    Returns:
+        dict: Evaluation metrics including MSE and R^2 score.
+    """
+    X_test = test_data[features]
+    y_test = test_data[response_var]
+
+    y_pred = model.predict(X_test)
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = np.sqrt(mse)
+    r2 = r2_score(y_test, y_pred)
+
+    return {"RMSE": rmse, "R2": r2}
+
+
+@traced()
+def evaluate_specific_year(year, model, features, response_var):
+    """
+    Evaluate the model on a specific year's data and keep team names for comparison.
+
+    Args:
+        year (int): Year for evaluation.
+        model (HistGradientBoostingRegressor): Trained gradient boosting model.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+    Returns:
+        pd.DataFrame: DataFrame with team names, actual values, and predicted values.
+    """
+    file_path = f"./data/{year}/data_{year}.csv"
+
+    try:
+        # Load the data for the specific year
+        df = pd.read_csv(file_path)
+    except FileNotFoundError:
+        print(f"ERROR: File not found: {file_path}")
+        return None
+
+    # prepare data
+    X = df[features]
+    y_actual = df[response_var]
+    team_names = df["Team"]
+    actual_wins = df["W"]
+    tot_games = df["W"] + df["L"]
+
+    # make predictions
+    y_pred = model.predict(X)
+
+    # get predicted wins
+    pred_wins = tot_games * y_pred
+
+    # other metrics
+    mse = mean_squared_error(y_actual, y_pred)
+    rmse = np.sqrt(mse)
+    r2 = r2_score(y_actual, y_pred)
+    metrics = {
+        "RMSE": rmse,
+        "R2": r2
+    }
+
+    # combine results into a DataFrame
+    results = pd.DataFrame({
+        "Team": team_names,
+        "Actual Win%": y_actual,
+        "Predicted Win%": y_pred,
+        "Actual Wins": actual_wins,
+        "Predicted Wins": pred_wins.round(2)
+    })
+    return results, metrics
+
+
+@traced()
+def compare_with_rf(train_data, test_data, features, response_var, gbm_params, n_estimators=100, max_depth=None):
+    """
+    Compare training time, model size and test accuracy of the gradient boosting model and the Random Forest.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset, with a "Season" column.
+        test_data (pd.DataFrame): Testing dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        gbm_params (dict): Keyword arguments for train_gradient_boosting.
+        n_estimators (int): Number of trees in the Random Forest.
+        max_depth (int): Maximum depth of the Random Forest trees.
+    Returns:
+        pd.DataFrame: One row per model.
+    """
+    rows = []
+
+    start = time.perf_counter()
+    gbm, n_rounds = train_gradient_boosting(train_data, features, response_var, **gbm_params)
+    gbm_time = time.perf_counter() - start
+    rows.append({"Model": f"HistGradientBoosting ({n_rounds} rounds)", "Train Time (s)": gbm_time,
+                 "Size (bytes)": len(pickle.dumps(gbm)), **evaluate_model(gbm, test_data, features, response_var)})
+
+    start = time.perf_counter()
+    rf = train_random_forest(train_data, features, response_var, n_estimators=n_estimators, max_depth=max_depth)
+    rf_time = time.perf_counter() - start
+    rows.append({"Model": f"RandomForest ({n_estimators} trees)", "Train Time (s)": rf_time,
+                 "Size (bytes)": len(pickle.dumps(rf)), **evaluate_model(rf, test_data, features, response_var)})
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    # args
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--eval_year", type=int, default=None, help="Evaluate the trained model on a specific year")
+    parser.add_argument("--train_years", type=str, default="2000-2020", help="Year range for training data (e.g., 2000-2020)")
+    parser.add_argument("--full_years", type=str, default="2000-2024", help="Year range to train on when evaluating a specific year (the evaluated year is left out)")
+    parser.add_argument("--learning_rate", type=float, default=0.1, help="Shrinkage applied to each tree")
+    parser.add_argument("--max_iter", type=int, default=500, help="Maximum number of boosting rounds")
+    parser.add_argument("--max_leaf_nodes", type=int, default=31, help="Maximum number of leaves per tree")
+    parser.add_argument("--max_bins", type=int, default=255, help="Number of histogram bins per feature")
+    parser.add_argument("--val_fraction", type=float, default=0.2, help="Fraction of the seasons held out for early stopping")
+    parser.add_argument("--patience", type=int, default=10, help="Rounds without validation improvement before stopping")
+    parser.add_argument("--compare_rf", action="store_true", help="Compare training time, size and accuracy with the Random Forest")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
+    args = parser.parse_args()
+    if args.trace:
+        tracing.start()
+
+    # features and response variable
+    FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+    RESPONSE_VAR = "W/L%"  # Using Win% as the response variable
+
+    gbm_params = {
+        "learning_rate": args.learning_rate,
+        "max_iter": args.max_iter,
+        "max_leaf_nodes": args.max_leaf_nodes,
+        "max_bins": args.max_bins,
+        "val_fraction": args.val_fraction,
+        "patience": args.patience
+    }
+
+    if args.eval_year is not None:
+        # early stopping needs the season of each row, so train on the yearly files instead of data.csv
+        # the evaluated season is left out so its metrics are out of sample
+        full_start, full_end = map(int, args.full_years.split("-"))
+        full_data = load_yearly_data(full_start, full_end)
+        if not full_data.empty:
+            full_data = full_data[full_data["Season"] != args.eval_year].reset_index(drop=True)
+        if full_data.empty:
+            print(f"ERROR: No yearly data found for {args.full_years} besides {args.eval_year}.")
+            sys.exit(1)
+
+        # Train the model on the entire dataset
+        model, n_rounds = train_gradient_boosting(full_data, FEATURES, RESPONSE_VAR, **gbm_params)
+        print(f"Boosting rounds selected by early stopping: {n_rounds}")
+
+        # Evaluate the model on the specific year
+        year_res, year_metrics = evaluate_specific_year(args.eval_year, model, FEATURES, RESPONSE_VAR)
+        if year_res is not None:
+            print(f"\nEvaluation Results for {args.eval_year}:")
+            print(year_res)
+            print(f"\nMetrics for {args.eval_year}:")
+            print(f"Root Mean Squared Error (RMSE): {year_metrics['RMSE']:.3f}")
+            print(f"R^2 Score: {year_metrics['R2']:.3f}")
+    else:
+        # use the train/test split when not evaluating for a specific year
+        train_start, train_end = map(int, args.train_years.split("-"))
+        train_data = load_yearly_data(train_start, train_end)
+        if train_data.empty:
+            print(f"ERROR: No yearly data found for {args.train_years}.")
+            sys.exit(1)
+        _, test_data = load_data("./data/train_data.csv", "./data/test_data.csv")
+
+        # Train the model on the training dataset
+        model, n_rounds = train_gradient_boosting(train_data, FEATURES, RESPONSE_VAR, **gbm_params)
+        print(f"Boosting rounds selected by early stopping: {n_rounds}")
+
+        # Evaluate the model on the testing dataset
+        metrics = evaluate_model(model, test_data, FEATURES, RESPONSE_VAR)
+
+        # Print evaluation results
+        print("Model Evaluation on Test Set:")
+        print(f"Root Mean Squared Error (RMSE): {metrics['RMSE']:.3f}")
+        print(f"R^2 Score: {metrics['R2']:.3f}")
+
+        if args.compare_rf:
+            comparison = compare_with_rf(train_data, test_data, FEATURES, RESPONSE_VAR, gbm_params)
+            print("\nGradient boosting vs Random Forest:")
+            print(comparison.to_string(index=False))
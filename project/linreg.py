@@ -3,7 +3,11 @@ from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 import argparse
 import numpy as np
+from predict import export_coefficients
+import tracing
+from tracing import traced
 
+@traced()
 def load_data(train_path, test_path):
     """
     Load training and testing data from CSV files.
@@ -16,9 +20,11 @@ def load_data(train_path, test_path):
     """
     train_data = pd.read_csv(train_path)
     test_data = pd.read_csv(test_path)
+    tracing.count("rows", len(train_data) + len(test_data))
     return train_data, test_data
 
 
+@traced()
 def train_linear_regression(train_data, features, response_var):
     """
     Train a linear regression model.
@@ -38,6 +44,7 @@ def train_linear_regression(train_data, features, response_var):
     return model
 
 
+@traced()
 def evaluate_model(model, test_data, features, response_var):
     """
     Evaluate the linear regression model on the testing data.
@@ -61,7 +68,135 @@ def evaluate_model(model, test_data, features, response_var):
     return {"RMSE": rmse, "R2": r2}
 
 
-def evaluate_specific_year(year, model, features, response_var):
+def design_matrix(data, features):
+    """
+    Build the OLS design matrix (features plus an intercept column).
+
+    Args:
+        data (pd.DataFrame): Dataset containing the feature columns.
+        features (list): List of feature column names.
+    Returns:
+        np.ndarray: Design matrix of shape (n_rows, n_features + 1).
+    """
+    X = data[features].to_numpy(dtype=float)
+    return np.column_stack([X, np.ones(len(X))])
+
+
+def loo_residuals(model, train_data, features, response_var):
+    """
+    Compute the leave-one-out residuals of a fitted OLS model in closed form. The hat-matrix diagonal
+    is taken from a thin QR of the design matrix, so no refits are needed: e_loo = e / (1 - h).
+
+    Args:
+        model (LinearRegression): Linear regression model trained on train_data.
+        train_data (pd.DataFrame): Training dataset the model was fit on.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+    Returns:
+        tuple: (residuals, leverages, loo residuals) as numpy arrays.
+    """
+    X = design_matrix(train_data, features)
+    y = train_data[response_var].to_numpy(dtype=float)
+
+    Q, _ = np.linalg.qr(X)
+    leverage = np.einsum("ij,ij->i", Q, Q)
+    resid = y - model.predict(train_data[features])
+    return resid, leverage, resid / (1.0 - leverage)
+
+
+@traced()
+def loo_metrics(model, train_data, features, response_var):
+    """
+    Leave-one-out error metrics for the OLS model, computed from the hat-matrix diagonal in one pass.
+
+    Args:
+        model (LinearRegression): Linear regression model trained on train_data.
+        train_data (pd.DataFrame): Training dataset the model was fit on.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+    Returns:
+        dict: PRESS statistic and LOO-RMSE.
+    """
+    _, _, loo = loo_residuals(model, train_data, features, response_var)
+    press = np.sum(loo ** 2)
+    return {"PRESS": press, "LOO-RMSE": np.sqrt(press / len(loo))}
+
+
+@traced()
+def jackknife_plus_intervals(model, train_data, X_new, features, response_var, alpha=0.1):
+    """
+    Jackknife+ prediction intervals for new points. The n leave-one-out models are never refit: each one
+    is a rank-one downdate of the full fit, beta_(-i) = beta - (X'X)^-1 x_i e_loo_i, so the LOO predictions
+    for every new point come out of a single (m x n) matrix product.
+
+    Args:
+        model (LinearRegression): Linear regression model trained on train_data.
+        train_data (pd.DataFrame): Training dataset the model was fit on.
+        X_new (pd.DataFrame): Rows to build intervals for.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        alpha (float): Miscoverage level (0.1 gives a 90% interval).
+    Returns:
+        tuple: (lower, upper) bounds as numpy arrays.
+    """
+    X = design_matrix(train_data, features)
+    Xn = design_matrix(X_new, features)
+    n = len(X)
+
+    _, leverage, loo = loo_residuals(model, train_data, features, response_var)
+    # rows of (X'X)^-1 x_i scaled by e_loo_i, i.e. beta - beta_(-i) for every i
+    Q, R = np.linalg.qr(X)
+    delta = np.linalg.solve(R, Q.T).T * loo[:, None]
+
+    # mu_(-i)(x) for every new x (rows) and left out i (cols)
+    mu_loo = model.predict(X_new[features])[:, None] - Xn @ delta.T
+    abs_loo = np.abs(loo)
+
+    k_lo = int(np.floor(alpha * (n + 1)))
+    k_hi = int(np.ceil((1 - alpha) * (n + 1)))
+    if k_lo < 1 or k_hi > n:
+        raise ValueError(f"alpha={alpha} is too small for {n} training rows")
+
+    lower = np.partition(mu_loo - abs_loo, k_lo - 1, axis=1)[:, k_lo - 1]
+    upper = np.partition(mu_loo + abs_loo, k_hi - 1, axis=1)[:, k_hi - 1]
+    return lower, upper
+
+
+@traced()
+def split_conformal_intervals(train_data, X_new, features, response_var, alpha=0.1, calib_frac=0.25, random_state=42):
+    """
+    Split-conformal prediction intervals. The model is fit on part of the training data and the interval
+    half-width is the conformal quantile of the absolute residuals on the held-out calibration rows.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        X_new (pd.DataFrame): Rows to build intervals for.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        alpha (float): Miscoverage level (0.1 gives a 90% interval).
+        calib_frac (float): Fraction of the training rows held out for calibration.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        tuple: (lower, upper) bounds as numpy arrays.
+    """
+    calib = train_data.sample(frac=calib_frac, random_state=random_state)
+    proper = train_data.drop(index=calib.index)
+
+    model = train_linear_regression(proper, features, response_var)
+    scores = np.abs(calib[response_var].to_numpy() - model.predict(calib[features]))
+
+    n = len(scores)
+    k = int(np.ceil((1 - alpha) * (n + 1)))
+    if k > n:
+        raise ValueError(f"alpha={alpha} is too small for {n} calibration rows")
+    q = np.partition(scores, k - 1)[k - 1]
+
+    y_pred = model.predict(X_new[features])
+    return y_pred - q, y_pred + q
+
+
+@traced()
+def evaluate_specific_year(year, model, features, response_var, train_data=None, alpha=0.1, interval="jackknife+"):
     """
     Evaluate the model on a specific year's data and keep team names for comparison.
 
@@ -70,6 +205,9 @@ def evaluate_specific_year(year, model, features, response_var):
         model (LinearRegression): Trained linear regression model.
         features (list): List of feature column names.
         response_var (str): Name of the response variable column.
+        train_data (pd.DataFrame): Data the model was trained on. If given, prediction intervals are added.
+        alpha (float): Miscoverage level for the prediction intervals.
+        interval (str): Interval method ('jackknife+' or 'split').
     Returns:
         pd.DataFrame: DataFrame with team names, actual values, and predicted values.
     """
@@ -112,6 +250,20 @@ def evaluate_specific_year(year, model, features, response_var):
         "Actual Wins": actual_wins,
         "Predicted Wins": pred_wins.round(2)
     })
+
+    # prediction intervals on win% and wins
+    if train_data is not None:
+        if interval == "jackknife+":
+            lower, upper = jackknife_plus_intervals(model, train_data, df, features, response_var, alpha=alpha)
+        elif interval == "split":
+            lower, upper = split_conformal_intervals(train_data, df, features, response_var, alpha=alpha)
+        else:
+            raise ValueError(f"Interval method {interval} not supported")
+        results["Win% Lower"] = lower
+        results["Win% Upper"] = upper
+        results["Wins Lower"] = (tot_games * lower).round(2)
+        results["Wins Upper"] = (tot_games * upper).round(2)
+
     return results, metrics
 
 
@@ -119,7 +271,14 @@ if __name__ == "__main__":
     # args
     parser = argparse.ArgumentParser()
     parser.add_argument("--eval_year", type=int, default=None, help="Evaluate the trained model on a specific year")
+    parser.add_argument("--export_path", type=str, default=None, help="Save the trained model as a plain coefficient file (linear models only)")
+    parser.add_argument("--alpha", type=float, default=0.1, help="Miscoverage level for the prediction intervals (0.1 = 90%% intervals)")
+    parser.add_argument("--interval", type=str, default="jackknife+", choices=["jackknife+", "split"],
+                        help="Conformal method used for the prediction intervals")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     # load train and test data
     train_path = "./data/train_data.csv"
@@ -137,14 +296,21 @@ if __name__ == "__main__":
         # Train the model on the entire dataset
         model = train_linear_regression(full_data, FEATURES, RESPONSE_VAR)
 
+        if args.export_path is not None:
+            export_coefficients(model, FEATURES, args.export_path)
+
         # Evaluate the model on the specific year
-        year_res, year_metrics = evaluate_specific_year(args.eval_year, model, FEATURES, RESPONSE_VAR)
+        year_res, year_metrics = evaluate_specific_year(args.eval_year, model, FEATURES, RESPONSE_VAR,
+                                                        train_data=full_data, alpha=args.alpha, interval=args.interval)
         if year_res is not None:
                 print(f"\nEvaluation Results for {args.eval_year}:")
                 print(year_res)
                 print(f"\nMetrics for {args.eval_year}:")
                 print(f"Root Mean Squared Error (RMSE): {year_metrics['RMSE']:.3f}")
                 print(f"R^2 Score: {year_metrics['R2']:.3f}")
+                loo = loo_metrics(model, full_data, FEATURES, RESPONSE_VAR)
+                print(f"PRESS: {loo['PRESS']:.3f}")
+                print(f"Leave-One-Out RMSE: {loo['LOO-RMSE']:.3f}")
     else:
         # use train/test sets when not evaluating for a specific year
         train_path = "./data/train_data.csv"
@@ -156,10 +322,18 @@ if __name__ == "__main__":
         # Train the model on the training dataset
         model = train_linear_regression(train_data, FEATURES, RESPONSE_VAR)
 
+        if args.export_path is not None:
+            export_coefficients(model, FEATURES, args.export_path)
+
         # Evaluate the model on the testing dataset
         metrics = evaluate_model(model, test_data, FEATURES, RESPONSE_VAR)
 
         # Print evaluation results
         print("Model Evaluation on Test Set:")
         print(f"Root Mean Squared Error (RMSE): {metrics['RMSE']:.3f}")
-        print(f"R^2 Score: {metrics['R2']:.3f}")
\ No newline at end of file
+        print(f"R^2 Score: {metrics['R2']:.3f}")
+
+        # closed-form leave-one-out metrics on the training set
+        loo = loo_metrics(model, train_data, FEATURES, RESPONSE_VAR)
+        print(f"PRESS (train): {loo['PRESS']:.3f}")
+        print(f"Leave-One-Out RMSE (train): {loo['LOO-RMSE']:.3f}")
\ No newline at end of file
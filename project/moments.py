@@ -0,0 +1,192 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# streaming moment accumulators
+# every season's count, means and co-moments are stored in ./data/{year}/moments_{source}_{year}.npz, so covariance,
+# correlation and VIF matrices for any range of seasons come from merging the accumulators (Chan et al. pairwise
+# update) instead of re-reading and concatenating the rows. A season's accumulator is only rebuilt when its source
+# csv changes (a different modification time or size), which is checked without reading the csv.
+# rows with a missing value in any tracked column are skipped whole (listwise deletion), unlike the pairwise
+# deletion of pandas' corr/cov, so the two only agree when the tracked columns have no missing values.
+
+# source tables with the columns tracked for each
+SOURCES = {
+    "four_factors": {
+        "file_pattern": "four_factors_{year}.csv",
+        "columns": ["Off eFG%", "Off TOV%", "ORB%", "Off FT/FGA%", "Def eFG%", "Def TOV%", "DRB%", "Def FT/FGA%",
+                    "Offensive Score", "Defensive Score", "Four-Factor Score", "W/L%"]
+    },
+    "data": {
+        "file_pattern": "data_{year}.csv",
+        "columns": ["Four-Factor Score", "NRtg_norm", "SRS_norm", "W/L%"]
+    }
+}
+
+
+class MomentAccumulator:
+    """
+    Count, means and co-moment matrix (sum of outer products of deviations from the mean) of a set of columns.
+    Accumulators can be updated with new rows and merged with each other in any order.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def merge_stats(self, n, mean, comoment):
+        if n == 0:
+            return self
+        total = self.n + n
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.n * n / total)
+        self.mean = self.mean + delta * (n / total)
+        self.n = total
+        return self
+
+    def update(self, X):
+        """
+        Add a block of rows. Rows with a missing value in any column are skipped whole, so every entry of the
+        co-moment matrix is over the same rows (pandas' corr/cov instead drop missing values per pair of columns).
+
+        Args:
+            X (np.ndarray): (rows x columns) values, in the accumulator's column order.
+        Returns:
+            MomentAccumulator: self
+        """
+        X = np.asarray(X, dtype=np.float64)
+        X = X[np.all(np.isfinite(X), axis=1)]
+        if len(X) == 0:
+            return self
+        mean = X.mean(axis=0)
+        D = X - mean
+        return self.merge_stats(len(X), mean, D.T @ D)
+
+    def merge(self, other):
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge accumulators with different columns")
+        return self.merge_stats(other.n, other.mean, other.comoment)
+
+    def select(self, columns):
+        """
+        Accumulator restricted to a subset of the columns.
+        """
+        idx = [self.columns.index(col) for col in columns]
+        sub = MomentAccumulator(columns)
+        sub.n, sub.mean, sub.comoment = self.n, self.mean[idx], self.comoment[np.ix_(idx, idx)]
+        return sub
+
+    def covariance(self, ddof=1):
+        return pd.DataFrame(self.comoment / (self.n - ddof), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        sd = np.sqrt(np.diag(self.comoment))
+        return pd.DataFrame(self.comoment / np.outer(sd, sd), index=self.columns, columns=self.columns)
+
+    def vif(self):
+        """
+        Variance inflation factor of each column against all the others (the diagonal of the inverse correlation
+        matrix).
+        """
+        return pd.Series(np.diag(np.linalg.inv(self.correlation().to_numpy())), index=self.columns, name="VIF")
+
+    def save(self, path, source_key=""):
+        np.savez(path, columns=np.array(self.columns), n=self.n, mean=self.mean, comoment=self.comoment,
+                 source_key=source_key)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            acc = cls([str(c) for c in f["columns"]])
+            acc.n = int(f["n"])
+            acc.mean = f["mean"].copy()
+            acc.comoment = f["comoment"].copy()
+            return acc, str(f["source_key"]) if "source_key" in f.files else ""
+
+
+def moments_path(year, source, data_dir="./data"):
+    return os.path.join(data_dir, str(year), f"moments_{source}_{year}.npz")
+
+
+def file_key(path):
+    # modification time and size identify a version of the source csv without reading it
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def update_season_moments(year, source, data_dir="./data"):
+    """
+    Rebuild a season's accumulator if its source csv changed since it was stored.
+
+    Args:
+        year (int): Season.
+        source (str): Key of SOURCES.
+        data_dir (str): Directory of the yearly data folders.
+    Returns:
+        MomentAccumulator: The season's accumulator, or None if the source csv is missing.
+    """
+    info = SOURCES[source]
+    csv_path = os.path.join(data_dir, str(year), info["file_pattern"].format(year=year))
+    if not os.path.exists(csv_path):
+        print(f"ERROR: File not found: {csv_path}")
+        return None
+
+    path = moments_path(year, source, data_dir)
+    key = file_key(csv_path)
+    if os.path.exists(path):
+        acc, stored_key = MomentAccumulator.load(path)
+        if stored_key == key and acc.columns == info["columns"]:
+            return acc
+
+    df = pd.read_csv(csv_path)
+    acc = MomentAccumulator(info["columns"]).update(df[info["columns"]].to_numpy())
+    acc.save(path, source_key=key)
+    return acc
+
+
+def range_moments(start_year, end_year, source, data_dir="./data"):
+    """
+    Merge the accumulators of a range of seasons, updating any season whose source changed.
+
+    Args:
+        start_year (int): First season.
+        end_year (int): Last season.
+        source (str): Key of SOURCES.
+        data_dir (str): Directory of the yearly data folders.
+    Returns:
+        MomentAccumulator: Merged accumulator.
+    """
+    total = MomentAccumulator(SOURCES[source]["columns"])
+    for year in range(start_year, end_year + 1):
+        acc = update_season_moments(year, source, data_dir)
+        if acc is not None:
+            total.merge(acc)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start_year", type=int, default=2000, help="First season of the range")
+    parser.add_argument("--end_year", type=int, default=2024, help="Last season of the range")
+    parser.add_argument("--source", type=str, default="data", choices=list(SOURCES), help="Table to summarize")
+    parser.add_argument("--columns", type=str, nargs="*", default=None, help="Columns to report (all tracked columns if not given)")
+    parser.add_argument("--response", type=str, default="W/L%", help="Response column, left out of the VIFs")
+    args = parser.parse_args()
+
+    acc = range_moments(args.start_year, args.end_year, args.source)
+    if args.columns:
+        acc = acc.select(args.columns)
+
+    pd.set_option("display.width", 200)
+    print(f"{acc.n} rows from {args.start_year}-{args.end_year} ({args.source})")
+    print("\nCovariance:")
+    print(acc.covariance().round(4))
+    print("\nCorrelation:")
+    print(acc.correlation().round(3))
+    features = [col for col in acc.columns if col != args.response]
+    print("\nVariance inflation factors:")
+    print(acc.select(features).vif().round(3).to_string())
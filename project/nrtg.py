@@ -2,30 +2,46 @@ import pandas as pd
 import numpy
 import os
 import argparse
+from season_norm import update_season, output_signature, DEFAULT_TOL
+import tracing
+from tracing import traced
 
 
-def standardize_nrtg(year):
+@traced()
+def standardize_nrtg(year, incremental=False, tol=DEFAULT_TOL):
     """
     Standardize the NRtg for a given year. The standardization is done to adjust the different scales between years 
     to something more uniform (zscore normalization like)
 
     Args:
         year (int): Year for which the data will be processed.
+        incremental (bool): Only renormalize the teams that changed since the last run (see season_norm.py).
+        tol (float): Drift of the std, relative to its stored value, that triggers renormalizing every team.
     """
     csv_path = f"./data/{year}/adv_{year}.csv"
+    outpath = f"./data/{year}/nrtg_{year}.csv"
     if os.path.exists(csv_path):
         df = pd.read_csv(csv_path)
+        tracing.count("rows", len(df))
 
         if "NRtg" in df.columns:
-            nrtg_std = df['NRtg'].std()
-            
-            df['NRtg_norm'] = df['NRtg'] / nrtg_std
+            if incremental:
+                normalized, n_changed, write = update_season(year, "nrtg", df, ["NRtg"], "scale", tol=tol,
+                                                             output_path=outpath, signature=output_signature(csv_path))
+                if not write:
+                    print(f"No changes in {csv_path}")
+                    tracing.count("cache hits")
+                    return
+                df['NRtg_norm'] = normalized[:, 0]
+            else:
+                nrtg_std = df['NRtg'].std()
+
+                df['NRtg_norm'] = df['NRtg'] / nrtg_std
             df["W/L%"] = (df["W"] / (df["W"] + df["L"])).round(3)
 
             outcols = ["Team", "W", "L", "W/L%", "NRtg", "NRtg_norm"]
             outdf = df[outcols]
 
-            outpath = f"./data/{year}/nrtg_{year}.csv"
             outdf.to_csv(outpath, index=False)
             print(f"Processed and saved to: {outpath}")
         else:
@@ -39,9 +55,14 @@ if __name__ == "__main__":
     parser.add_argument("--start_year", type=int, default=2024, help="Start year to fetch data from")
     parser.add_argument("--end_year", type=int, default=2024, help="End year to fetch data from")
     parser.add_argument("--year", type=int, default=None, help="Year to fetch data from (if no date range is needed). Leave blank if a range is needed")
+    parser.add_argument("--incremental", action="store_true", help="Only renormalize the teams that changed since the last run")
+    parser.add_argument("--tol", type=float, default=DEFAULT_TOL, help="Relative drift of the normalization constant that triggers renormalizing every team")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
     
     # parse params
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     start_yr = args.start_year
     end_yr = args.end_year
@@ -50,4 +71,4 @@ if __name__ == "__main__":
         end_yr = args.year
 
     for i in range(start_yr, end_yr + 1):
-        standardize_nrtg(year=i)
\ No newline at end of file
+        standardize_nrtg(year=i, incremental=args.incremental, tol=args.tol)
\ No newline at end of file
@@ -0,0 +1,97 @@
+import numpy as np
+
+# binned rendering for large datasets
+# above BINNED_THRESHOLD rows, scatter plots are drawn as hexbin densities and the regression line's confidence band
+# is bootstrapped on fixed-size subsamples, so plotting time stays about the same as the data grows
+
+BINNED_THRESHOLD = 5000
+
+
+def use_binned(n_rows, binned=None, threshold=BINNED_THRESHOLD):
+    """
+    Whether to use the binned rendering mode.
+
+    Args:
+        n_rows (int): Number of points to plot.
+        binned (bool): Force the mode on or off (automatic if None).
+        threshold (int): Row count above which the binned mode is used automatically.
+    Returns:
+        bool: Whether to bin.
+    """
+    return n_rows > threshold if binned is None else binned
+
+
+def regression_band(x, y, grid, n_boot=200, ci=95, subsample=2000, random_state=42):
+    """
+    Least-squares line with a bootstrap confidence band. The bootstrap refits the line on n_boot resamples of a
+    fixed size subsample (all replicates at once from their sufficient statistics) and the spread is rescaled by
+    sqrt(subsample / n) to the full data, so the cost does not grow with the number of rows.
+
+    Args:
+        x (np.ndarray): Predictor values.
+        y (np.ndarray): Response values.
+        grid (np.ndarray): Points where the line is evaluated.
+        n_boot (int): Number of bootstrap replicates.
+        ci (float): Confidence level of the band, in percent.
+        subsample (int): Resample size.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        tuple: (line, lower, upper) evaluated on grid.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    slope, intercept = np.polyfit(x, y, 1)
+    line = intercept + slope * grid
+
+    n = len(x)
+    m = min(n, subsample)
+    idx = np.random.default_rng(random_state).integers(0, n, size=(n_boot, m))
+    xb, yb = x[idx], y[idx]
+    xm, ym = xb.mean(axis=1, keepdims=True), yb.mean(axis=1, keepdims=True)
+    b = ((xb - xm) * (yb - ym)).sum(axis=1) / np.maximum(((xb - xm) ** 2).sum(axis=1), 1e-12)
+    a = ym[:, 0] - b * xm[:, 0]
+    lines = a[:, None] + b[:, None] * grid[None, :]
+
+    # deviations from the full-data line, scaled from subsample size to full size
+    scale = np.sqrt(m / n)
+    lower = line + scale * (np.percentile(lines, (100 - ci) / 2, axis=0) - lines.mean(axis=0))
+    upper = line + scale * (np.percentile(lines, 100 - (100 - ci) / 2, axis=0) - lines.mean(axis=0))
+    return line, lower, upper
+
+
+def density_scatter(ax, x, y, gridsize=40, cmap="Blues"):
+    """
+    Hexbin density of a scatter plot, with a log color scale so sparse tails stay visible.
+
+    Args:
+        ax (matplotlib.axes.Axes): Axes to draw on.
+        x (array-like): x values.
+        y (array-like): y values.
+        gridsize (int): Number of hexagons across the x axis.
+        cmap (str): Colormap.
+    Returns:
+        matplotlib.collections.PolyCollection: The hexbin artist (for colorbars).
+    """
+    return ax.hexbin(x, y, gridsize=gridsize, mincnt=1, bins="log", cmap=cmap, linewidths=0)
+
+
+def binned_regplot(ax, x, y, gridsize=40, color="C1"):
+    """
+    Binned version of seaborn's regplot: hexbin density, regression line and bootstrap band.
+
+    Args:
+        ax (matplotlib.axes.Axes): Axes to draw on.
+        x (array-like): x values.
+        y (array-like): y values.
+        gridsize (int): Number of hexagons across the x axis.
+        color (str): Color of the regression line.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    mask = np.isfinite(x) & np.isfinite(y)
+    x, y = x[mask], y[mask]
+    density_scatter(ax, x, y, gridsize=gridsize)
+    grid = np.linspace(x.min(), x.max(), 100)
+    line, lower, upper = regression_band(x, y, grid)
+    ax.plot(grid, line, color=color)
+    ax.fill_between(grid, lower, upper, color=color, alpha=0.2, linewidth=0)
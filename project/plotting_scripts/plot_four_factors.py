@@ -3,7 +3,83 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import argparse
 import os
+from binned import use_binned, binned_regplot, density_scatter
 
+OFFENSIVE_FACTORS = ['Off eFG%', 'Off TOV%', 'ORB%', 'Off FT/FGA%']
+DEFENSIVE_FACTORS = ['Def eFG%', 'Def TOV%', 'DRB%', 'Def FT/FGA%']
+
+
+def load_four_factors(start_year, end_year, data_dir="../data"):
+    """
+    Load the four factors of a range of years into one DataFrame with a Year column.
+
+    Args:
+        start_year (int): Start year of the range.
+        end_year (int): End year of the range.
+        data_dir (str): Directory of the yearly data folders.
+    Returns:
+        pd.DataFrame: Combined data (empty if no year could be loaded).
+    """
+    frames = []
+    for year in range(start_year, end_year + 1):
+
+        file_path = os.path.join(data_dir, str(year), f"four_factors_{year}.csv")
+        if not os.path.exists(file_path):
+            print(f"File not found: {file_path}")
+            continue
+
+        # add year's data to total data
+        year_df = pd.read_csv(file_path)
+        year_df['Year'] = year
+        frames.append(year_df)
+
+    # concatenate once, growing the frame inside the loop copies it every year
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def plot_factor_pairs(combined_df, factors, title, save_path, binned=None):
+    # pairwise scatterplots: four factors vs win%
+    # large datasets are drawn as densities with a binned regression (see binned.py)
+    if use_binned(len(combined_df), binned):
+        fig, axes = plt.subplots(1, len(factors), figsize=(2.5 * len(factors), 2.5), sharey=True)
+        for ax, factor in zip(axes, factors):
+            binned_regplot(ax, combined_df[factor], combined_df['W/L%'])
+            ax.set_xlabel(factor)
+        axes[0].set_ylabel('W/L%')
+        fig.suptitle(title, y=1.02)
+        fig.savefig(save_path, bbox_inches='tight')
+        plt.close(fig)
+        return
+
+    grid = sns.pairplot(combined_df, x_vars=factors, y_vars='W/L%', kind='reg')
+    grid.figure.suptitle(title, y=1.02)
+    grid.savefig(save_path, bbox_inches='tight')
+    plt.close(grid.figure)
+
+
+def plot_correlation_heatmap(correlation_matrix, save_path):
+    # the correlation matrix comes from the merged season accumulators in moments.py (see plots.py), or from
+    # the rows when this script is run on its own
+    plt.figure(figsize=(12, 10))
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5)
+    plt.title("Correlation Heatmap: Offensive, Defensive Factors and Win%")
+    plt.savefig(save_path, bbox_inches='tight')
+    plt.close()
+
+
+def plot_score_vs_win(combined_df, score_col, label, save_path, binned=None):
+    plt.figure(figsize=(8, 6))
+    if use_binned(len(combined_df), binned):
+        plt.colorbar(density_scatter(plt.gca(), combined_df[score_col], combined_df['W/L%']), label="count")
+    else:
+        sns.scatterplot(data=combined_df, x=score_col, y='W/L%', edgecolor='k')
+    plt.title(f"{label} vs Win%")
+    plt.xlabel(label)
+    plt.ylabel("Win%")
+    plt.savefig(save_path, bbox_inches='tight')
+    plt.close()
 
 
 if __name__ == "__main__":
@@ -11,7 +87,7 @@ if __name__ == "__main__":
     parser.add_argument("--start_year", type=int, default=2024, help="Start year to fetch data from")
     parser.add_argument("--end_year", type=int, default=2024, help="End year to fetch data from")
     parser.add_argument("--year", type=int, default=None, help="Year to fetch data from (if no date range is needed). Leave blank if a range is needed")
-    
+
     # parse arguments
     args = parser.parse_args()
 
@@ -24,19 +100,7 @@ if __name__ == "__main__":
     data_dir = "../data"
     output_dir = "../images"
 
-    combined_df = pd.DataFrame()
-    for year in range(start_yr, end_yr + 1):
-
-        file_path = os.path.join(data_dir, str(year), f"four_factors_{year}.csv")
-        if not os.path.exists(file_path):
-            print(f"File not found: {file_path}")
-            continue
-
-        # add year's data to total data    
-        year_df = pd.read_csv(file_path)
-        year_df['Year'] = year
-        combined_df = pd.concat([combined_df, year_df], ignore_index=True)
-
+    combined_df = load_four_factors(start_yr, end_yr, data_dir=data_dir)
     if combined_df.empty:
         print("No data loaded. Exiting.")
         exit()
@@ -46,75 +110,34 @@ if __name__ == "__main__":
     if not all(col in combined_df.columns for col in required_columns):
         print(f"Required columns ({', '.join(required_columns)}) not found in the dataset. Exiting.")
         exit()
-    
-    # pairwise scatterplots: offensive/defensive four factors vs win%
-    offensive_factors = ['Off eFG%', 'Off TOV%', 'ORB%', 'Off FT/FGA%']
-    defensive_factors = ['Def eFG%', 'Def TOV%', 'DRB%', 'Def FT/FGA%']
 
     # off factors
-    sns.pairplot(combined_df, x_vars=offensive_factors, y_vars='W/L%', kind='reg')
-    plt.suptitle("Pairwise Scatterplots: Offensive Four Factors vs Win%", y=1.02)
-
     offensive_scatterplot_path = os.path.join(output_dir, "offensive_factors_scatterplots.png")
-    plt.savefig(offensive_scatterplot_path, bbox_inches='tight')
-    plt.show()
+    plot_factor_pairs(combined_df, OFFENSIVE_FACTORS, "Pairwise Scatterplots: Offensive Four Factors vs Win%", offensive_scatterplot_path)
     print(f"Offensive factors scatterplots saved to: {offensive_scatterplot_path}")
 
     # def factors
-    sns.pairplot(combined_df, x_vars=defensive_factors, y_vars='W/L%', kind='reg')
-    plt.suptitle("Pairwise Scatterplots: Defensive Four Factors vs Win%", y=1.02)
-
     defensive_scatterplot_path = os.path.join(output_dir, "defensive_factors_scatterplots.png")
-    plt.savefig(defensive_scatterplot_path, bbox_inches='tight')
-    plt.show()
+    plot_factor_pairs(combined_df, DEFENSIVE_FACTORS, "Pairwise Scatterplots: Defensive Four Factors vs Win%", defensive_scatterplot_path)
     print(f"Defensive factors scatterplots saved to: {defensive_scatterplot_path}")
 
-    # correlation heatmap   
-    relevant_columns = offensive_factors + defensive_factors + ['W/L%']
-    correlation_matrix = combined_df[relevant_columns].corr()
-
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", linewidths=0.5)
-    plt.title("Correlation Heatmap: Offensive, Defensive Factors and Win%")
-
+    # correlation heatmap
     heatmap_path = os.path.join(output_dir, "4factors_correlation_heatmap.png")
-    plt.savefig(heatmap_path, bbox_inches='tight')
-    plt.show()
+    relevant_columns = OFFENSIVE_FACTORS + DEFENSIVE_FACTORS + ['W/L%']
+    plot_correlation_heatmap(combined_df[relevant_columns].corr(), heatmap_path)
     print(f"Correlation heatmap saved to: {heatmap_path}")
 
-
-    # offensive fouir factor score vs Win%
-    plt.figure(figsize=(8, 6))
-    sns.scatterplot(data=combined_df, x='Offensive Score', y='W/L%', edgecolor='k')
-    plt.title("Offensive Four-Factor Score vs Win%")
-    plt.xlabel("Offensive Four-Factor Score")
-    plt.ylabel("Win%")
-
+    # offensive four factor score vs Win%
     offensive_score_path = os.path.join(output_dir, "offensive_score_vs_win_percent.png")
-    plt.savefig(offensive_score_path, bbox_inches='tight')
-    plt.show()
+    plot_score_vs_win(combined_df, 'Offensive Score', "Offensive Four-Factor Score", offensive_score_path)
     print(f"Offensive score vs Win% plot saved to: {offensive_score_path}")
 
     # defensive four factor score vs Win%
-    plt.figure(figsize=(8, 6))
-    sns.scatterplot(data=combined_df, x='Defensive Score', y='W/L%', edgecolor='k')
-    plt.title("Defensive Four-Factor Score vs Win%")
-    plt.xlabel("Defensive Four-Factor Score")
-    plt.ylabel("Win%")
-
     defensive_score_path = os.path.join(output_dir, "defensive_score_vs_win_percent.png")
-    plt.savefig(defensive_score_path, bbox_inches='tight')
-    plt.show()
+    plot_score_vs_win(combined_df, 'Defensive Score', "Defensive Four-Factor Score", defensive_score_path)
     print(f"Defensive score vs Win% plot saved to: {defensive_score_path}")
 
     # tot four factor score vs win%
-    plt.figure(figsize=(8, 6))
-    sns.scatterplot(data=combined_df, x='Four-Factor Score', y='W/L%', edgecolor='k')
-    plt.title("Four-Factor Score vs Win%")
-    plt.xlabel("Four-Factor Score")
-    plt.ylabel("Win%")
-
     overall_score_path = os.path.join(output_dir, "4factor_score_vs_win_percent.png")
-    plt.savefig(overall_score_path, bbox_inches='tight')
-    plt.show()
-    print(f"Overall score vs Win% plot saved to: {overall_score_path}")
\ No newline at end of file
+    plot_score_vs_win(combined_df, 'Four-Factor Score', "Four-Factor Score", overall_score_path)
+    print(f"Overall score vs Win% plot saved to: {overall_score_path}")
@@ -1,19 +1,46 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load the two CSV files
-ff_df = pd.read_csv('../data/2024/four_factors_2024.csv')  # Replace with the actual path if necessary
-srs_df = pd.read_csv('../data/2024/srs_2024.csv')    # Replace with the actual path if necessary
-
-# Merge the two dataframes based on the 'Team' column
-merged_df = pd.merge(ff_df, srs_df, on="Team")
-
-# Plot NRtg_norm vs SRS_norm to illustrate multicollinearity
-plt.figure(figsize=(10, 6))
-plt.scatter(merged_df['Four-Factor Score'], merged_df['SRS_norm'], alpha=0.7)
-plt.title("Four Factor Score vs SRS", fontsize=16)
-plt.xlabel("4Factors", fontsize=14)
-plt.ylabel("SRS", fontsize=14)
-plt.grid(True)
-plt.savefig("../images/4factor_vs_srs.png")
-plt.close()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from moments import range_moments
+
+# model features whose multicollinearity is reported on the figure
+MODEL_FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+
+
+def feature_correlation(start_year, end_year, data_dir="../data"):
+    # correlation of the model features over a range of seasons, merged from the per-season moment accumulators
+    return range_moments(start_year, end_year, "data", data_dir=data_dir).select(MODEL_FEATURES).correlation()
+
+
+def plot_four_factors_vs_srs(ff_df, srs_df, feature_corr, save_path):
+    # Merge the two dataframes based on the 'Team' column
+    merged_df = pd.merge(ff_df, srs_df, on="Team")
+
+    # Plot NRtg_norm vs SRS_norm to illustrate multicollinearity
+    plt.figure(figsize=(10, 6))
+    plt.scatter(merged_df['Four-Factor Score'], merged_df['SRS_norm'], alpha=0.7)
+    plt.title("Four Factor Score vs SRS", fontsize=16)
+    plt.xlabel("4Factors", fontsize=14)
+    plt.ylabel("SRS", fontsize=14)
+    plt.grid(True)
+
+    # correlation and VIFs of the model features over all seasons (VIFs are the diagonal of the inverse correlation)
+    vif = np.diag(np.linalg.inv(feature_corr.to_numpy()))
+    lines = [f"All seasons: r = {feature_corr.loc['Four-Factor Score', 'SRS_norm']:.2f}"]
+    lines += [f"VIF {col}: {v:.2f}" for col, v in zip(feature_corr.columns, vif)]
+    plt.gca().text(0.02, 0.98, "\n".join(lines), transform=plt.gca().transAxes, va="top", fontsize=11,
+                   bbox={"facecolor": "white", "alpha": 0.8})
+    plt.savefig(save_path)
+    plt.close()
+
+
+if __name__ == "__main__":
+    # Load the two CSV files
+    ff_df = pd.read_csv('../data/2024/four_factors_2024.csv')  # Replace with the actual path if necessary
+    srs_df = pd.read_csv('../data/2024/srs_2024.csv')    # Replace with the actual path if necessary
+
+    plot_four_factors_vs_srs(ff_df, srs_df, feature_correlation(2000, 2024), "../images/4factor_vs_srs.png")
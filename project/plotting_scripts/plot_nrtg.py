@@ -2,30 +2,29 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import os
 import argparse
+from binned import use_binned, density_scatter
 
-def plot_nrtg_vs_win_percentage(start_year, end_year, save=False):
+def load_nrtg_data(start_year, end_year, data_dir="../data"):
     """
-    Plots normalized NRtg (NRtg_norm) vs Win Percentage (W/L%) for a range of years.
+    Loads normalized NRtg (NRtg_norm) and Win Percentage (W/L%, in percent) for a range of years.
 
     Args:
         start_year (int): Start year of the range.
         end_year (int): End year of the range.
-        save (bool): Whether to save the plot as an image.
+        data_dir (str): Directory of the yearly data folders.
+    Returns:
+        pd.DataFrame: Combined data, or None if no year could be loaded.
     """
-    plt.figure(figsize=(10, 6))
     aggregated_data = []
-
     for year in range(start_year, end_year + 1):
-        file_path = f"../data/{year}/nrtg_{year}.csv"
+        file_path = f"{data_dir}/{year}/nrtg_{year}.csv"
         if os.path.exists(file_path):
             # load data
             df = pd.read_csv(file_path)
 
             # check cols
             if "NRtg_norm" in df.columns and "W/L%" in df.columns:
-
                 df["W/L%"] = df["W/L%"] * 100
-
                 # aggregate data
                 aggregated_data.append(df[["NRtg_norm", "W/L%"]])
             else:
@@ -33,29 +32,59 @@ def plot_nrtg_vs_win_percentage(start_year, end_year, save=False):
         else:
             print(f"ERROR: File {file_path} not found.")
 
-    if aggregated_data:
-        # combine into one df
-        aggregated_df = pd.concat(aggregated_data, ignore_index=True)
+    if not aggregated_data:
+        return None
+    # combine into one df
+    return pd.concat(aggregated_data, ignore_index=True)
 
-        # scatter plot
+
+def draw_nrtg_vs_win_percentage(aggregated_df, save_path=None, binned=None):
+    """
+    Scatter plot of normalized NRtg vs Win Percentage. Saves the figure if save_path is given, otherwise shows it.
+
+    Args:
+        aggregated_df (pd.DataFrame): Data from load_nrtg_data.
+        save_path (str): Output image path.
+        binned (bool): Draw a hexbin density instead of points (automatic above binned.BINNED_THRESHOLD rows if None).
+    """
+    plt.figure(figsize=(10, 6))
+    if use_binned(len(aggregated_df), binned):
+        plt.colorbar(density_scatter(plt.gca(), aggregated_df["NRtg_norm"], aggregated_df["W/L%"]), label="count")
+    else:
         plt.scatter(aggregated_df["NRtg_norm"], aggregated_df["W/L%"], alpha=0.7, label="Aggregated Data")
-        plt.title("Normalized NRtg vs Win Percentage")
-        plt.xlabel("Normalized NRtg")
-        plt.ylabel("W/L%")
-        plt.axhline(50, color='gray', linestyle='--', alpha=0.7, label="50% Win Percentage")
-        plt.grid(alpha=0.5)
-        plt.legend(loc='best')
+    plt.title("Normalized NRtg vs Win Percentage")
+    plt.xlabel("Normalized NRtg")
+    plt.ylabel("W/L%")
+    plt.axhline(50, color='gray', linestyle='--', alpha=0.7, label="50% Win Percentage")
+    plt.grid(alpha=0.5)
+    plt.legend(loc='best')
 
-        # plot figure
-        if save:
-            save_path = f"../images/nrtg_vs_win_percent.png"
-            os.makedirs("../images", exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"Plot saved: {save_path}")
-        else:
-            plt.show()
+    if save_path:
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        plt.savefig(save_path, dpi=300)
     else:
+        plt.show()
+    plt.close()
+
+
+def plot_nrtg_vs_win_percentage(start_year, end_year, save=False):
+    """
+    Plots normalized NRtg (NRtg_norm) vs Win Percentage (W/L%) for a range of years.
+
+    Args:
+        start_year (int): Start year of the range.
+        end_year (int): End year of the range.
+        save (bool): Whether to save the plot as an image.
+    """
+    aggregated_df = load_nrtg_data(start_year, end_year)
+    if aggregated_df is None:
         print("No data to plot.")
+        return
+    save_path = "../images/nrtg_vs_win_percent.png" if save else None
+    draw_nrtg_vs_win_percentage(aggregated_df, save_path=save_path)
+    if save:
+        print(f"Plot saved: {save_path}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -0,0 +1,190 @@
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+from plot import load_adv_stats
+from plot_four_factors import load_four_factors, OFFENSIVE_FACTORS, DEFENSIVE_FACTORS
+from plot_nrtg import load_nrtg_data
+from plot_srs import load_srs_data
+from plot_multicolinear import feature_correlation
+import binned
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from moments import range_moments
+
+# headless build of every figure in ../images
+# the season data is loaded once, the figures are rendered in a process pool with the Agg backend, and a figure is
+# only re-rendered when its input data or its plotting code changed since the last build (hashes are kept in
+# ../images/.build_cache.json)
+
+CACHE_FILE = ".build_cache.json"
+
+# output file -> (module, function, input datasets, extra arguments)
+FIGURES = {
+    "offensive_factors_scatterplots.png": ("plot_four_factors", "plot_factor_pairs", ["four_factors"],
+                                           [OFFENSIVE_FACTORS, "Pairwise Scatterplots: Offensive Four Factors vs Win%"]),
+    "defensive_factors_scatterplots.png": ("plot_four_factors", "plot_factor_pairs", ["four_factors"],
+                                           [DEFENSIVE_FACTORS, "Pairwise Scatterplots: Defensive Four Factors vs Win%"]),
+    "4factors_correlation_heatmap.png": ("plot_four_factors", "plot_correlation_heatmap", ["four_factors_corr"], []),
+    "offensive_score_vs_win_percent.png": ("plot_four_factors", "plot_score_vs_win", ["four_factors"],
+                                           ["Offensive Score", "Offensive Four-Factor Score"]),
+    "defensive_score_vs_win_percent.png": ("plot_four_factors", "plot_score_vs_win", ["four_factors"],
+                                           ["Defensive Score", "Defensive Four-Factor Score"]),
+    "4factor_score_vs_win_percent.png": ("plot_four_factors", "plot_score_vs_win", ["four_factors"],
+                                         ["Four-Factor Score", "Four-Factor Score"]),
+    "srs_vs_win_percent.png": ("plot_srs", "draw_srs_vs_win_percentage", ["srs"], []),
+    "nrtg_vs_win_percent.png": ("plot_nrtg", "draw_nrtg_vs_win_percentage", ["nrtg"], []),
+    "net_rating_vs_wins.png": ("plot", "plot_nrtg_vs_wins", ["adv"], []),
+    "age_vs_wins.png": ("plot", "plot_age_vs_wins", ["adv"], []),
+    "4factor_vs_srs.png": ("plot_multicolinear", "plot_four_factors_vs_srs", ["four_factors_year", "srs_year", "feature_corr"], [])
+}
+
+
+def load_datasets(start_year, end_year, data_dir):
+    """
+    Load every dataset used by the figures, once.
+
+    Args:
+        start_year (int): First season of the multi-season figures.
+        end_year (int): Last season, also used for the single-season figures.
+        data_dir (str): Directory of the yearly data folders.
+    Returns:
+        dict: Dataset name -> DataFrame (None if it could not be loaded).
+    """
+    year_path = os.path.join(data_dir, str(end_year))
+    # correlations are merged from the per-season accumulators instead of the concatenated rows
+    moments = range_moments(start_year, end_year, "four_factors", data_dir=data_dir)
+    return {
+        "four_factors_corr": moments.select(OFFENSIVE_FACTORS + DEFENSIVE_FACTORS + ["W/L%"]).correlation(),
+        "feature_corr": feature_correlation(start_year, end_year, data_dir=data_dir),
+        "four_factors": load_four_factors(start_year, end_year, data_dir=data_dir),
+        "srs": load_srs_data(start_year, end_year, data_dir=data_dir),
+        "nrtg": load_nrtg_data(start_year, end_year, data_dir=data_dir),
+        "adv": load_adv_stats(end_year, data_dir=data_dir),
+        "four_factors_year": pd.read_csv(os.path.join(year_path, f"four_factors_{end_year}.csv")),
+        "srs_year": pd.read_csv(os.path.join(year_path, f"srs_{end_year}.csv"))
+    }
+
+
+def figure_hash(name, spec, datasets):
+    """
+    Hash of everything a figure depends on: the source of its plotting module (and of the shared binned
+    rendering helpers), its arguments and its input data.
+
+    Args:
+        name (str): Output file name.
+        spec (tuple): Entry of FIGURES.
+        datasets (dict): Loaded datasets.
+    Returns:
+        str: Hex digest.
+    """
+    module, func, inputs, extra = spec
+    h = hashlib.sha256()
+    h.update(name.encode())
+    h.update(inspect.getsource(importlib.import_module(module)).encode())
+    h.update(inspect.getsource(binned).encode())
+    h.update(json.dumps([func, extra]).encode())
+    for key in inputs:
+        df = datasets[key]
+        h.update(json.dumps(list(map(str, df.columns))).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+
+
+def _render(task):
+    name, module, func, args, save_path = task
+    start = time.perf_counter()
+    getattr(importlib.import_module(module), func)(*args, save_path)
+    return name, time.perf_counter() - start
+
+
+def build(start_year, end_year, data_dir="../data", output_dir="../images", n_jobs=None, force=False):
+    """
+    Render every figure whose inputs or code changed since the last build.
+
+    Args:
+        start_year (int): First season of the multi-season figures.
+        end_year (int): Last season, also used for the single-season figures.
+        data_dir (str): Directory of the yearly data folders.
+        output_dir (str): Directory of the images.
+        n_jobs (int): Number of worker processes (all cores if None).
+        force (bool): Re-render every figure.
+    Returns:
+        list: Names of the figures that failed to render.
+    """
+    start = time.perf_counter()
+    datasets = load_datasets(start_year, end_year, data_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    cache_path = os.path.join(output_dir, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    tasks, hashes = [], {}
+    for name, spec in FIGURES.items():
+        module, func, inputs, extra = spec
+        if any(datasets[key] is None or datasets[key].empty for key in inputs):
+            print(f"ERROR: Missing data for {name}, skipping")
+            continue
+        hashes[name] = figure_hash(name, spec, datasets)
+        save_path = os.path.join(output_dir, name)
+        if not force and cache.get(name) == hashes[name] and os.path.exists(save_path):
+            continue
+        tasks.append((name, module, func, [datasets[key] for key in inputs] + extra, save_path))
+
+    print(f"{len(tasks)} of {len(hashes)} figures out of date")
+    failed = []
+    if tasks:
+        try:
+            with ProcessPoolExecutor(max_workers=min(n_jobs or os.cpu_count(), len(tasks)), initializer=_init_worker) as pool:
+                futures = {pool.submit(_render, task): task[0] for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        name, elapsed = future.result()
+                    except Exception as e:
+                        # one broken figure must not stop the others or lose their cache entries
+                        failed.append(futures[future])
+                        print(f"ERROR: Failed to render {futures[future]}: {type(e).__name__}: {e}")
+                        continue
+                    # only record figures that were written, so a failed figure is retried next time
+                    cache[name] = hashes[name]
+                    print(f"Rendered {name} ({elapsed:.2f}s)")
+        finally:
+            with open(cache_path, "w") as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+    print(f"Build finished in {time.perf_counter() - start:.2f}s" + (f", {len(failed)} failed" if failed else ""))
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Render the figures in the images folder that are out of date")
+    build_parser.add_argument("--start_year", type=int, default=2000, help="First season of the multi-season figures")
+    build_parser.add_argument("--end_year", type=int, default=2024, help="Last season, also used for the single-season figures")
+    build_parser.add_argument("--data_dir", type=str, default="../data", help="Directory of the yearly data folders")
+    build_parser.add_argument("--output_dir", type=str, default="../images", help="Directory of the images")
+    build_parser.add_argument("--n_jobs", type=int, default=None, help="Number of worker processes (all cores if not set)")
+    build_parser.add_argument("--force", action="store_true", help="Re-render every figure")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        failed = build(args.start_year, args.end_year, data_dir=args.data_dir, output_dir=args.output_dir,
+                       n_jobs=args.n_jobs, force=args.force)
+        if failed:
+            sys.exit(1)
@@ -0,0 +1,203 @@
+import argparse
+import csv
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import numpy as np
+
+# lightweight scoring entry point
+# only numpy is imported at module level, pandas/sklearn are imported inside the subcommands that need them
+
+FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+RESPONSE_VAR = "W/L%"
+
+
+def export_coefficients(model, features, path):
+    """
+    Save a trained linear model (LinearRegression or linear-kernel SVR) as a plain coefficient file.
+
+    Args:
+        model (LinearRegression or SVR): Trained linear model.
+        features (list): List of feature column names, in training order.
+        path (str): Output JSON path.
+    """
+    if getattr(model, "kernel", "linear") != "linear" or not hasattr(model, "coef_"):
+        raise ValueError("Only linear models can be exported as coefficients")
+
+    coef = np.ravel(model.coef_).tolist()
+    intercept = float(np.ravel(model.intercept_)[0])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"model": type(model).__name__, "features": list(features), "coef": coef, "intercept": intercept}, f, indent=2)
+    print(f"Coefficients saved to: {path}")
+
+
+def load_coefficients(path):
+    """
+    Load a coefficient file written by export_coefficients.
+
+    Args:
+        path (str): Path to the JSON coefficient file.
+    Returns:
+        dict: Model name, features, coefficients (np.ndarray) and intercept.
+    """
+    with open(path) as f:
+        model = json.load(f)
+    model["coef"] = np.asarray(model["coef"], dtype=np.float64)
+    return model
+
+
+def read_season(year, features):
+    """
+    Read a year's compiled data with the csv module (no pandas).
+
+    Args:
+        year (int): Year to read.
+        features (list): List of feature column names.
+    Returns:
+        tuple: (team names, feature matrix, actual win%, wins, total games) or None if the file is missing.
+    """
+    file_path = f"./data/{year}/data_{year}.csv"
+    if not os.path.exists(file_path):
+        print(f"ERROR: File not found: {file_path}")
+        return None
+
+    with open(file_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    teams = [row["Team"] for row in rows]
+    X = np.array([[float(row[col]) for col in features] for row in rows])
+    y = np.array([float(row[RESPONSE_VAR]) for row in rows])
+    wins = np.array([float(row["W"]) for row in rows])
+    games = wins + np.array([float(row["L"]) for row in rows])
+    return teams, X, y, wins, games
+
+
+def print_results(year, teams, y, y_pred, wins, games):
+    """
+    Print projections and metrics in the same layout as the model scripts, without pandas.
+
+    Args:
+        year (int): Year that was scored.
+        teams (list): Team names.
+        y (np.ndarray): Actual win%.
+        y_pred (np.ndarray): Predicted win%.
+        wins (np.ndarray): Actual wins.
+        games (np.ndarray): Games played.
+    """
+    width = max(len(t) for t in teams)
+    print(f"\nEvaluation Results for {year}:")
+    print(f"{'Team':<{width}}  Actual Win%  Predicted Win%  Actual Wins  Predicted Wins")
+    for team, actual, pred, w, g in zip(teams, y, y_pred, wins, games):
+        print(f"{team:<{width}}  {actual:>11.3f}  {pred:>14.3f}  {w:>11.0f}  {g * pred:>14.2f}")
+
+    rmse = np.sqrt(np.mean((y - y_pred) ** 2))
+    r2 = 1 - np.sum((y - y_pred) ** 2) / np.sum((y - y.mean()) ** 2)
+    print(f"\nMetrics for {year}:")
+    print(f"Root Mean Squared Error (RMSE): {rmse:.3f}")
+    print(f"R^2 Score: {r2:.3f}")
+
+
+def score_linear(args):
+    model = load_coefficients(args.model_path)
+    season = read_season(args.eval_year, model["features"])
+    if season is None:
+        return
+    teams, X, y, wins, games = season
+    print_results(args.eval_year, teams, y, X @ model["coef"] + model["intercept"], wins, games)
+
+
+def score_forest(args):
+    from flat_forest import load_forest, predict_forest
+
+    forest, meta = load_forest(args.model_dir)
+    season = read_season(args.eval_year, meta["features"])
+    if season is None:
+        return
+    teams, X, y, wins, games = season
+    print_results(args.eval_year, teams, y, predict_forest(forest, X, meta["max_depth"]), wins, games)
+
+
+def export_model(args):
+    # the heavy stacks are only needed to train the model being exported
+    import pandas as pd
+
+    full_data = pd.read_csv("./data/data.csv")
+    if args.model == "linreg":
+        from linreg import train_linear_regression
+        model = train_linear_regression(full_data, FEATURES, RESPONSE_VAR)
+    else:
+        from svr import train_svr
+        model = train_svr(full_data, FEATURES, RESPONSE_VAR, kernel="linear", C=args.C, epsilon=args.epsilon)
+    export_coefficients(model, FEATURES, args.model_path)
+
+
+def import_times(cmd):
+    """
+    Run a command under python -X importtime and collect the cumulative import time of each top-level module.
+
+    Args:
+        cmd (list): Script and arguments to run with the current interpreter.
+    Returns:
+        tuple: (wall time in ms, dict of top-level module -> cumulative import time in ms)
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + cmd, capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1000
+
+    # lines look like "import time:   self [us] | cumulative | <indent>package"
+    top_level = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if m and len(m.group(3)) == 0:
+            top_level[m.group(4)] = int(m.group(2)) / 1000
+    return wall, top_level
+
+
+def bench_startup(args):
+    commands = {
+        "predict.py linear": ["predict.py", "linear", "--eval_year", str(args.eval_year), "--model_path", args.model_path],
+        "linreg.py": ["linreg.py", "--eval_year", str(args.eval_year)]
+    }
+    for label, cmd in commands.items():
+        walls, imports = [], {}
+        for _ in range(args.repeats):
+            wall, imports = import_times(cmd)
+            walls.append(wall)
+        print(f"\n{label}: median wall time {np.median(walls):.0f} ms, total import time {sum(imports.values()):.0f} ms")
+        for module, ms in sorted(imports.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {module:<30} {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    linear = subparsers.add_parser("linear", help="Score a year with an exported coefficient file (numpy only)")
+    linear.add_argument("--eval_year", type=int, required=True, help="Year to score")
+    linear.add_argument("--model_path", type=str, default="./models/linreg.json", help="Coefficient file to use")
+    linear.set_defaults(func=score_linear)
+
+    forest = subparsers.add_parser("forest", help="Score a year with an exported flat forest (numpy only)")
+    forest.add_argument("--eval_year", type=int, required=True, help="Year to score")
+    forest.add_argument("--model_dir", type=str, default="./models/rf_flat", help="Directory of the flat forest artifact")
+    forest.set_defaults(func=score_forest)
+
+    export = subparsers.add_parser("export", help="Train a linear model on ./data/data.csv and export its coefficients")
+    export.add_argument("--model", type=str, default="linreg", choices=["linreg", "svr"], help="Model to train (svr uses the linear kernel)")
+    export.add_argument("--model_path", type=str, default="./models/linreg.json", help="Output coefficient file")
+    export.add_argument("--C", type=float, default=1.0, help="Regularization parameter for SVR")
+    export.add_argument("--epsilon", type=float, default=0.1, help="Epsilon in the epsilon-SVR model")
+    export.set_defaults(func=export_model)
+
+    bench = subparsers.add_parser("bench-startup", help="Compare startup and import time of the quick path and linreg.py")
+    bench.add_argument("--eval_year", type=int, default=2025, help="Year to score")
+    bench.add_argument("--model_path", type=str, default="./models/linreg.json", help="Coefficient file to use")
+    bench.add_argument("--repeats", type=int, default=5, help="Number of runs per command")
+    bench.add_argument("--top", type=int, default=8, help="Number of slowest imports to list")
+    bench.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
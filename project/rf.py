@@ -1,9 +1,14 @@
 import pandas as pd
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 import argparse
 import numpy as np
+from bootstrap import add_bootstrap_intervals
+import tracing
+from tracing import traced
 
+@traced()
 def load_data(train_path, test_path):
     """
     Load training and testing data from CSV files.
@@ -16,9 +21,11 @@ def load_data(train_path, test_path):
     """
     train_data = pd.read_csv(train_path)
     test_data = pd.read_csv(test_path)
+    tracing.count("rows", len(train_data) + len(test_data))
     return train_data, test_data
 
 
+@traced()
 def train_random_forest(train_data, features, response_var, n_estimators=100, max_depth=None, random_state=42):
     """
     Train a Random Forest regression model.
@@ -41,6 +48,69 @@ def train_random_forest(train_data, features, response_var, n_estimators=100, ma
     return model
 
 
+@traced()
+def train_random_forest_oob(train_data, features, response_var, block_size=10, max_estimators=500, tol=1e-3, patience=3,
+                            max_depth=None, random_state=42):
+    """
+    Grow a Random Forest in blocks of trees with warm_start and stop once the out-of-bag error plateaus.
+    The OOB R^2/RMSE after every block gives the error-vs-trees curve and a validation estimate without a held-out set.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        block_size (int): Number of trees added per step.
+        max_estimators (int): Upper bound on the number of trees.
+        tol (float): Relative OOB RMSE improvement below which a block counts as no improvement.
+        patience (int): Number of blocks without improvement before stopping.
+        max_depth (int): Maximum depth of each tree.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        tuple: (trained RandomForestRegressor, DataFrame with the OOB error curve)
+    """
+    X_train = train_data[features]
+    y_train = train_data[response_var].to_numpy()
+    # the trees are fit on float32 features, so score them on the same array without per-call validation
+    X_arr = X_train.to_numpy(dtype=np.float32)
+
+    # oob_score=True would make sklearn recompute the OOB prediction over every tree on each fit, O(trees^2 / block)
+    # in total, so the OOB sums are kept here and only the trees added by each block are scored
+    model = RandomForestRegressor(n_estimators=0, max_depth=max_depth, warm_start=True, random_state=random_state)
+    curve = []
+    oob_sum = np.zeros(len(y_train))
+    oob_counts = np.zeros(len(y_train), dtype=np.int64)
+    best_rmse = np.inf
+    stale = 0
+    for n_trees in range(block_size, max_estimators + 1, block_size):
+        model.set_params(n_estimators=n_trees)
+        model.fit(X_train, y_train)
+
+        new_trees = zip(model.estimators_[n_trees - block_size:], model.estimators_samples_[n_trees - block_size:])
+        for tree, sample in new_trees:
+            oob = np.ones(len(y_train), dtype=bool)
+            oob[sample] = False
+            oob_sum[oob] += tree.predict(X_arr[oob], check_input=False)
+            oob_counts += oob
+
+        # only score rows with at least one out of bag tree
+        mask = oob_counts > 0
+        oob_pred = oob_sum / np.maximum(oob_counts, 1)
+        oob_rmse = np.sqrt(mean_squared_error(y_train[mask], oob_pred[mask]))
+        oob_r2 = r2_score(y_train[mask], oob_pred[mask])
+        curve.append({"Trees": n_trees, "OOB RMSE": oob_rmse, "OOB R2": oob_r2, "OOB Rows": int(mask.sum())})
+
+        if oob_rmse < best_rmse * (1 - tol):
+            best_rmse = oob_rmse
+            stale = 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    return model, pd.DataFrame(curve)
+
+
+@traced()
 def evaluate_model(model, test_data, features, response_var):
     """
     Evaluate the Random Forest regression model on the testing data.
@@ -64,6 +134,7 @@ def evaluate_model(model, test_data, features, response_var):
     return {"RMSE": rmse, "R2": r2}
 
 
+@traced()
 def evaluate_specific_year(year, model, features, response_var):
     """
     Evaluate the model on a specific year's data and keep team names for comparison.
@@ -118,13 +189,42 @@ def evaluate_specific_year(year, model, features, response_var):
     return results, metrics
 
 
+def report_oob_curve(curve, curve_path=None):
+    """
+    Print the OOB error-vs-trees curve and optionally save it as a csv.
+
+    Args:
+        curve (pd.DataFrame): OOB curve from train_random_forest_oob.
+        curve_path (str): CSV path to save the curve to (not saved if None).
+    """
+    print("OOB error vs number of trees:")
+    print(curve.to_string(index=False))
+    final = curve.iloc[-1]
+    print(f"Stopped at {int(final['Trees'])} trees (OOB RMSE: {final['OOB RMSE']:.4f}, OOB R^2: {final['OOB R2']:.3f})\n")
+    if curve_path is not None:
+        curve.to_csv(curve_path, index=False)
+        print(f"OOB curve saved to: {curve_path}")
+
+
 if __name__ == "__main__":
     # args
     parser = argparse.ArgumentParser()
     parser.add_argument("--eval_year", type=int, default=None, help="Evaluate the trained model on a specific year")
     parser.add_argument("--n_estimators", type=int, default=100, help="Number of trees in the Random Forest")
     parser.add_argument("--max_depth", type=int, default=None, help="Maximum depth of the trees")
+    parser.add_argument("--oob", action="store_true", help="Grow the forest with warm_start until the out-of-bag error plateaus (--n_estimators is the upper bound)")
+    parser.add_argument("--block_size", type=int, default=10, help="Number of trees added per step in OOB mode")
+    parser.add_argument("--tol", type=float, default=1e-3, help="Relative OOB RMSE improvement that counts as progress in OOB mode")
+    parser.add_argument("--patience", type=int, default=3, help="Blocks without OOB improvement before stopping in OOB mode")
+    parser.add_argument("--curve_path", type=str, default=None, help="CSV path to save the OOB error-vs-trees curve")
+    parser.add_argument("--bootstrap", type=int, default=0, help="Number of season-level bootstrap replicates for prediction intervals (0 to disable)")
+    parser.add_argument("--boot_trees", type=int, default=None, help="Number of trees in each bootstrap replicate forest (the size of the point model if None)")
+    parser.add_argument("--alpha", type=float, default=0.1, help="Miscoverage level for the prediction intervals (0.1 = 90%% intervals)")
+    parser.add_argument("--n_jobs", type=int, default=None, help="Number of worker processes for the bootstrap (all cores if None)")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     # load train and test data
     train_path = "./data/train_data.csv"
@@ -140,11 +240,25 @@ if __name__ == "__main__":
         full_data = pd.read_csv("./data/data.csv")
 
         # Train the model on the entire dataset
-        model = train_random_forest(full_data, FEATURES, RESPONSE_VAR, n_estimators=args.n_estimators, max_depth=args.max_depth)
+        if args.oob:
+            model, curve = train_random_forest_oob(full_data, FEATURES, RESPONSE_VAR, block_size=args.block_size,
+                                                   max_estimators=max(args.n_estimators, args.block_size), tol=args.tol,
+                                                   patience=args.patience, max_depth=args.max_depth)
+            report_oob_curve(curve, args.curve_path)
+        else:
+            model = train_random_forest(full_data, FEATURES, RESPONSE_VAR, n_estimators=args.n_estimators, max_depth=args.max_depth)
 
         # Evaluate the model on the specific year
         year_res, year_metrics = evaluate_specific_year(args.eval_year, model, FEATURES, RESPONSE_VAR)
         if year_res is not None:
+            if args.bootstrap > 0:
+                # replicates refit the point model's forest (the size selected in OOB mode unless --boot_trees is set)
+                # on resampled seasons of data.csv
+                estimator = clone(model).set_params(warm_start=False, oob_score=False)
+                if args.boot_trees is not None:
+                    estimator.set_params(n_estimators=args.boot_trees)
+                year_res = add_bootstrap_intervals(year_res, args.eval_year, estimator, full_data, FEATURES, RESPONSE_VAR,
+                                                   n_boot=args.bootstrap, alpha=args.alpha, n_jobs=args.n_jobs)
             print(f"\nEvaluation Results for {args.eval_year}:")
             print(year_res)
             print(f"\nMetrics for {args.eval_year}:")
@@ -153,7 +267,13 @@ if __name__ == "__main__":
     else:
         # use train/test sets when not evaluating for a specific year
         # Train the model on the training dataset
-        model = train_random_forest(train_data, FEATURES, RESPONSE_VAR, n_estimators=args.n_estimators, max_depth=args.max_depth)
+        if args.oob:
+            model, curve = train_random_forest_oob(train_data, FEATURES, RESPONSE_VAR, block_size=args.block_size,
+                                                   max_estimators=max(args.n_estimators, args.block_size), tol=args.tol,
+                                                   patience=args.patience, max_depth=args.max_depth)
+            report_oob_curve(curve, args.curve_path)
+        else:
+            model = train_random_forest(train_data, FEATURES, RESPONSE_VAR, n_estimators=args.n_estimators, max_depth=args.max_depth)
 
         # Evaluate the model on the testing dataset
         metrics = evaluate_model(model, test_data, FEATURES, RESPONSE_VAR)
@@ -3,6 +3,7 @@ from bs4 import BeautifulSoup
 import time
 import pandas as pd
 from scraper_utils import *
+import tracing
 
 # scraper for https://www.basketball-reference.com/ 
 # disallowed paths from their robots.txt
@@ -18,10 +19,14 @@ def scrape_table_by_div_id(url, div_id):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
-    response = requests.get(url, headers=headers)
+    with tracing.span("http get", url=url):
+        response = requests.get(url, headers=headers)
+    tracing.count("requests")
+    tracing.count("bytes", len(response.content))
     
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with tracing.span("parse html"):
+            soup = BeautifulSoup(response.content, 'html.parser')
         
         # Find the div with the given id
         div = soup.find('div', id=div_id)
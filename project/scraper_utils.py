@@ -2,6 +2,7 @@ import requests
 from bs4 import BeautifulSoup
 import time
 import pandas as pd
+import tracing
 
 disallowed_paths = [
     '/basketball/', '/blazers/', '/dump/', '/fc/', '/my/', '/7103',
@@ -22,7 +23,10 @@ def scrape_all_tables(url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
-    response = requests.get(url, headers=headers)
+    with tracing.span("http get", url=url):
+        response = requests.get(url, headers=headers)
+    tracing.count("requests")
+    tracing.count("bytes", len(response.content))
     
     if response.status_code == 200:
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -93,7 +97,10 @@ def scrape_table(url, table_name):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     
-    response = requests.get(url, headers=headers)  
+    with tracing.span("http get", url=url):
+        response = requests.get(url, headers=headers)
+    tracing.count("requests")
+    tracing.count("bytes", len(response.content))
     
     if response.status_code == 200:
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -164,7 +171,10 @@ def scrape_page(url):
         print(f"Skipping disallowed URL: {url}")
         return
 
-    response = requests.get(url, headers=headers)
+    with tracing.span("http get", url=url):
+        response = requests.get(url, headers=headers)
+    tracing.count("requests")
+    tracing.count("bytes", len(response.content))
 
     if response.status_code == 200:
         soup = BeautifulSoup(response.content, 'html.parser')
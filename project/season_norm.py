@@ -0,0 +1,236 @@
+import json
+import os
+import numpy as np
+from tracing import traced
+
+# incremental in-season normalization
+# the normalization statistics of a season (count, mean and sum of squared deviations of each column, updated with
+# Welford's method) are kept in ./data/{year}/norm_{source}_{year}.json along with every team's raw and normalized
+# values. When a few teams change during the season only their rows are updated and normalized, in O(1) each,
+# with the constants that were last published. Every team is renormalized only when the current constants have
+# moved from the published ones by more than the tolerance. The state also keeps a signature of the last output
+# written (source file version and output settings such as the weights), so an unchanged season is only skipped
+# when its output exists and was written from the same source and settings. The source table is still read and the
+# output table rewritten in full when anything changed; at 30 rows per season the file I/O is not the bottleneck.
+
+# relative change of a normalization constant (in units of the column's spread) that triggers a full renormalization
+DEFAULT_TOL = 1e-3
+
+
+class SeasonNormalizer:
+    """
+    Per-season normalization of a set of columns, updated one team at a time.
+
+    Methods:
+        zscore: (x - mean) / std
+        min-max: (x - min) / (max - min)
+        centered: x - mean
+        scale: x / std (the NRtg and SRS standardization)
+    """
+
+    def __init__(self, columns, method, tol=DEFAULT_TOL):
+        if method not in ("zscore", "min-max", "centered", "scale"):
+            raise ValueError(f"Normalization method {method} not supported")
+        self.columns = list(columns)
+        self.method = method
+        self.tol = tol
+        k = len(self.columns)
+        self.n = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.raw = {}
+        self.normalized = {}
+        self.published = None
+        self.output = ""
+
+    def _add(self, x):
+        mask = np.isfinite(x)
+        self.n[mask] += 1
+        delta = x[mask] - self.mean[mask]
+        self.mean[mask] += delta / self.n[mask]
+        self.m2[mask] += delta * (x[mask] - self.mean[mask])
+
+    def _remove(self, x):
+        mask = np.isfinite(x)
+        self.n[mask] -= 1
+        delta = x[mask] - self.mean[mask]
+        empty = self.n[mask] == 0
+        self.mean[mask] = np.where(empty, 0.0, self.mean[mask] - delta / np.maximum(self.n[mask], 1))
+        self.m2[mask] = np.where(empty, 0.0, self.m2[mask] - delta * (x[mask] - self.mean[mask]))
+
+    def constants(self):
+        """
+        Current normalization constants of each column.
+
+        Returns:
+            dict: mean, std (sample), min and max arrays. The min and max are only tracked for the min-max method
+                (taken over the stored values, the other constants come from the running statistics).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.maximum(self.m2, 0) / (self.n - 1))
+        low = high = np.full(len(self.columns), np.nan)
+        if self.method == "min-max" and self.raw:
+            values = np.array(list(self.raw.values()))
+            low, high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        return {"mean": self.mean.copy(), "std": std, "min": low, "max": high}
+
+    def drifted(self):
+        """
+        Whether the constants used by the method moved beyond the tolerance since they were last published.
+        """
+        if self.published is None:
+            return True
+        current = self.constants()
+        old = self.published
+        spread = np.where(old["std"] > 0, old["std"], 1.0)
+        if self.method in ("zscore", "scale") and np.any(np.abs(current["std"] / spread - 1) > self.tol):
+            return True
+        if self.method in ("zscore", "centered") and np.any(np.abs(current["mean"] - old["mean"]) > self.tol * spread):
+            return True
+        if self.method == "min-max":
+            span = np.where(old["max"] > old["min"], old["max"] - old["min"], 1.0)
+            return bool(np.any(np.abs(current["min"] - old["min"]) > self.tol * span) or
+                        np.any(np.abs(current["max"] - old["max"]) > self.tol * span))
+        return False
+
+    def normalize(self, x):
+        """
+        Normalize one row with the published constants.
+        """
+        c = self.published
+        if self.method == "zscore":
+            return (x - c["mean"]) / c["std"]
+        if self.method == "min-max":
+            return (x - c["min"]) / (c["max"] - c["min"])
+        if self.method == "centered":
+            return x - c["mean"]
+        return x / c["std"]
+
+    def renormalize(self):
+        """
+        Publish the current constants and normalize every team with them. The running statistics are recomputed
+        from the stored values first (this pass is O(teams) anyway), which clears any rounding error they picked up.
+        """
+        values = np.array(list(self.raw.values()))
+        mask = np.isfinite(values)
+        self.n = mask.sum(axis=0).astype(np.float64)
+        self.mean = np.where(mask, values, 0.0).sum(axis=0) / np.maximum(self.n, 1)
+        self.m2 = np.where(mask, (values - self.mean) ** 2, 0.0).sum(axis=0)
+        self.published = self.constants()
+        for team, x in self.raw.items():
+            self.normalized[team] = self.normalize(x)
+
+    def update(self, rows):
+        """
+        Set the raw values of some teams (new or changed) and normalize them. If that moves the constants beyond
+        the tolerance every team is renormalized, otherwise only the given teams are.
+
+        Args:
+            rows (dict): Team -> raw values, in the order of the columns.
+        Returns:
+            list: Teams whose normalized values changed.
+        """
+        changed = []
+        for team, x in rows.items():
+            x = np.asarray(x, dtype=np.float64)
+            old = self.raw.get(team)
+            if old is not None and np.array_equal(old, x, equal_nan=True):
+                continue
+            if old is not None:
+                self._remove(old)
+            self._add(x)
+            self.raw[team] = x
+            changed.append(team)
+
+        if not changed:
+            return []
+        if self.drifted():
+            self.renormalize()
+            return list(self.raw)
+        for team in changed:
+            self.normalized[team] = self.normalize(self.raw[team])
+        return changed
+
+    def save(self, path):
+        state = {
+            "columns": self.columns, "method": self.method, "tol": self.tol,
+            "n": self.n.tolist(), "mean": self.mean.tolist(), "m2": self.m2.tolist(),
+            "raw": {team: x.tolist() for team, x in self.raw.items()},
+            "normalized": {team: x.tolist() for team, x in self.normalized.items()},
+            "published": {key: x.tolist() for key, x in self.published.items()} if self.published else None,
+            "output": self.output
+        }
+        # json writes NaN for missing values, which it also reads back
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        norm = cls(state["columns"], state["method"], state["tol"])
+        norm.n, norm.mean, norm.m2 = (np.array(state[key], dtype=np.float64) for key in ("n", "mean", "m2"))
+        norm.raw = {team: np.array(x, dtype=np.float64) for team, x in state["raw"].items()}
+        norm.normalized = {team: np.array(x, dtype=np.float64) for team, x in state["normalized"].items()}
+        if state["published"] is not None:
+            norm.published = {key: np.array(x, dtype=np.float64) for key, x in state["published"].items()}
+        norm.output = state.get("output", "")
+        return norm
+
+
+def norm_path(year, source, data_dir="./data"):
+    return os.path.join(data_dir, str(year), f"norm_{source}_{year}.json")
+
+
+def output_signature(source_path, **settings):
+    """
+    Signature of an output table: the version of its source file (modification time and size) and the settings
+    it is computed with.
+
+    Args:
+        source_path (str): Path of the source csv.
+        **settings: JSON serializable settings of the output (e.g., the four factor weights).
+    Returns:
+        str: Signature.
+    """
+    stat = os.stat(source_path)
+    return json.dumps({"source": f"{stat.st_mtime_ns}:{stat.st_size}", **settings}, sort_keys=True)
+
+
+@traced()
+def update_season(year, source, df, columns, method, tol=DEFAULT_TOL, data_dir="./data", output_path=None, signature=""):
+    """
+    Update a season's stored normalizer with the rows of a source table and return the normalized columns.
+    Teams are matched by name; only the rows that changed since the last call are renormalized (all of them if
+    the constants drifted, or the method, columns or teams changed).
+
+    Args:
+        year (int): Season.
+        source (str): Name of the normalized table (used in the state file name).
+        df (pd.DataFrame): Source rows, with a Team column.
+        columns (list): Columns to normalize.
+        method (str): Normalization method (see SeasonNormalizer).
+        tol (float): Drift tolerance of the normalization constants.
+        data_dir (str): Directory of the yearly data folders.
+        output_path (str): Output table written from the normalized values.
+        signature (str): Signature of the output (see output_signature).
+    Returns:
+        tuple: (normalized values (rows x columns) in the row order of df, number of teams renormalized, whether
+            the output must be written: some team changed, or the output is missing or has another signature)
+    """
+    path = norm_path(year, source, data_dir)
+    norm = None
+    if os.path.exists(path):
+        norm = SeasonNormalizer.load(path)
+        if norm.columns != list(columns) or norm.method != method or norm.tol != tol or set(norm.raw) - set(df["Team"]):
+            norm = None
+    if norm is None:
+        norm = SeasonNormalizer(columns, method, tol)
+
+    values = df[columns].to_numpy(dtype=np.float64)
+    changed = norm.update(dict(zip(df["Team"], values)))
+    stale = output_path is not None and (not os.path.exists(output_path) or norm.output != signature)
+    if changed or stale:
+        norm.output = signature
+        norm.save(path)
+    return np.array([norm.normalized[team] for team in df["Team"]]), len(changed), bool(changed) or stale
@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+from predict import load_coefficients, read_season
+from flat_forest import load_forest, predict_forest
+
+# long-running local prediction service
+# models and the current season's features are loaded once, concurrent requests are micro-batched into one
+# vectorized predict call per model, and model/data files are reloaded when they change on disk
+#
+# endpoints:
+#   POST /predict   {"model": "linear", "teams": ["Boston Celtics"]} or {"model": "linear", "features": [[ff, nrtg, srs]]}
+#   GET  /teams     teams in the feature store
+#   GET  /metrics   request count, throughput, p50/p99 latency and batch sizes
+#   GET  /health
+
+
+class ModelStore:
+    """
+    Holds the loaded models and the current season's feature store, and reloads them when their files change.
+    """
+
+    def __init__(self, year, linear_paths, forest_dirs):
+        self.year = year
+        self.linear_paths = linear_paths
+        self.forest_dirs = forest_dirs
+        self.models = {}
+        self.model_features = {}
+        self.columns = {}
+        self.teams = {}
+        self.mtimes = {}
+        self.reloads = 0
+        self.load()
+
+    def watched_files(self):
+        files = [f"./data/{self.year}/data_{self.year}.csv"] + list(self.linear_paths.values())
+        files += [os.path.join(d, "meta.json") for d in self.forest_dirs.values()]
+        return files
+
+    def load(self):
+        models = {}
+        model_features = {}
+        for name, path in self.linear_paths.items():
+            model = load_coefficients(path)
+            models[name] = (lambda X, m=model: X @ m["coef"] + m["intercept"])
+            model_features[name] = list(model["features"])
+        for name, model_dir in self.forest_dirs.items():
+            # read the arrays into memory, a re-export must not change the arrays of the model being served
+            forest, meta = load_forest(model_dir, mmap=False)
+            models[name] = (lambda X, f=forest, d=meta["max_depth"]: predict_forest(f, X, d))
+            model_features[name] = list(meta["features"])
+
+        # the feature store holds every column used by any model, each model reads its own columns from it
+        columns = list(dict.fromkeys(col for features in model_features.values() for col in features))
+        season = read_season(self.year, columns)
+        if season is None:
+            raise FileNotFoundError(f"No data for {self.year}")
+        teams, X, _, _, games = season
+
+        # swap everything at once so in-flight batches see a consistent state
+        self.models = models
+        self.model_features = model_features
+        self.columns = {col: i for i, col in enumerate(columns)}
+        self.teams = {team: (X[i], games[i]) for i, team in enumerate(teams)}
+        self.mtimes = {path: os.path.getmtime(path) for path in self.watched_files()}
+
+    def features(self, model_name):
+        """
+        Feature columns of a model, in the order its predict function expects them.
+
+        Args:
+            model_name (str): Name of the model.
+        Returns:
+            list: Feature column names.
+        """
+        if model_name not in self.model_features:
+            raise KeyError(f"Unknown model: {model_name}")
+        return self.model_features[model_name]
+
+    def team_features(self, model_name, teams):
+        """
+        Feature matrix of some teams for one model.
+
+        Args:
+            model_name (str): Name of the model.
+            teams (list): Team names in the feature store.
+        Returns:
+            np.ndarray: Feature matrix with the model's columns.
+        """
+        idx = [self.columns[col] for col in self.features(model_name)]
+        return np.array([self.teams[team][0][idx] for team in teams])
+
+    def maybe_reload(self):
+        """
+        Reload the models and feature store if any watched file changed. A failed reload keeps the loaded models
+        serving.
+
+        Returns:
+            bool: Whether a reload happened.
+        """
+        try:
+            changed = any(os.path.getmtime(path) != mtime for path, mtime in self.mtimes.items())
+            if changed:
+                self.load()
+                self.reloads += 1
+                print(f"Reloaded models and data for {self.year}")
+            return changed
+        except Exception as e:
+            # a file may be mid-write or malformed, try again on the next poll
+            print(f"ERROR: Reload failed: {type(e).__name__}: {e}")
+            return False
+
+
+class MicroBatcher:
+    """
+    Collects concurrent predict requests and answers them with one vectorized call per model. A batch is flushed
+    when it reaches max_batch rows or max_wait_ms after its first request, whichever comes first.
+    """
+
+    def __init__(self, store, metrics, max_batch=256, max_wait_ms=2.0):
+        self.store = store
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+
+    async def predict(self, model_name, X):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((model_name, X, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            n_rows = len(pending[0][1])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[1])
+            self.flush(pending)
+
+    def flush(self, pending):
+        by_model = {}
+        for item in pending:
+            by_model.setdefault(item[0], []).append(item)
+
+        for model_name, items in by_model.items():
+            model = self.store.models.get(model_name)
+            if model is None:
+                for _, _, future in items:
+                    future.set_exception(KeyError(f"Unknown model: {model_name}"))
+                continue
+            try:
+                X = np.vstack([x for _, x, _ in items])
+                preds = model(X)
+            except Exception as e:
+                # a failed batch fails its requests, but must not stop the batcher or every later request would hang
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.metrics.batch_sizes.append(len(X))
+
+            start = 0
+            for _, x, future in items:
+                # the client may have disconnected and cancelled its future
+                if not future.done():
+                    future.set_result(preds[start:start + len(x)])
+                start += len(x)
+
+
+class Metrics:
+    """
+    Rolling request latency and throughput statistics.
+    """
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    def record(self, latency, ok=True):
+        self.latencies.append(latency)
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, store):
+        lat = np.asarray(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        uptime = time.perf_counter() - self.started
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "uptime_s": round(uptime, 3),
+            "throughput_rps": round(self.requests / uptime, 2),
+            "latency_p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "latency_p99_ms": round(float(np.percentile(lat, 99)), 3),
+            "mean_batch_rows": round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+            "reloads": store.reloads
+        }
+
+
+async def handle_predict(body, store, batcher):
+    request = json.loads(body or b"{}")
+    model_name = request.get("model", "linear")
+
+    if "teams" in request:
+        missing = [team for team in request["teams"] if team not in store.teams]
+        if missing:
+            return 404, {"error": f"Unknown teams: {missing}"}
+        X = store.team_features(model_name, request["teams"])
+        preds = await batcher.predict(model_name, X)
+        games = np.array([store.teams[team][1] for team in request["teams"]])
+        return 200, {"year": store.year, "model": model_name, "predictions": [
+            {"team": team, "predicted_win_pct": float(p), "predicted_wins": round(float(p * g), 2)}
+            for team, p, g in zip(request["teams"], preds, games)]}
+
+    if "features" in request:
+        features = store.features(model_name)
+        X = np.asarray(request["features"], dtype=np.float64).reshape(-1, len(features))
+        preds = await batcher.predict(model_name, X)
+        return 200, {"model": model_name, "features": features, "predicted_win_pct": preds.tolist()}
+
+    return 400, {"error": "Request needs 'teams' or 'features'"}
+
+
+async def handle_connection(reader, writer, store, batcher, metrics):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode().partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            start = time.perf_counter()
+            try:
+                if method == "POST" and path == "/predict":
+                    status, payload = await handle_predict(body, store, batcher)
+                elif method == "GET" and path == "/metrics":
+                    status, payload = 200, metrics.summary(store)
+                elif method == "GET" and path == "/teams":
+                    status, payload = 200, {"year": store.year, "teams": sorted(store.teams)}
+                elif method == "GET" and path == "/health":
+                    status, payload = 200, {"status": "ok", "models": sorted(store.models)}
+                else:
+                    status, payload = 404, {"error": f"No route for {method} {path}"}
+            except (ValueError, KeyError) as e:
+                status, payload = 400, {"error": str(e.args[0]) if e.args else str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            if path == "/predict":
+                metrics.record(time.perf_counter() - start, ok=status == 200)
+
+            data = json.dumps(payload).encode()
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+            await writer.drain()
+
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def watch_files(store, interval):
+    while True:
+        await asyncio.sleep(interval)
+        store.maybe_reload()
+
+
+async def main(args):
+    linear_paths = dict(spec.split("=", 1) for spec in args.linear)
+    forest_dirs = dict(spec.split("=", 1) for spec in args.forest)
+    store = ModelStore(args.year, linear_paths, forest_dirs)
+    metrics = Metrics()
+    batcher = MicroBatcher(store, metrics, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+    def handler(reader, writer):
+        return handle_connection(reader, writer, store, batcher, metrics)
+
+    if args.unix_socket:
+        server = await asyncio.start_unix_server(handler, path=args.unix_socket)
+        print(f"Serving {sorted(store.models)} for {args.year} on unix socket {args.unix_socket}")
+    else:
+        server = await asyncio.start_server(handler, host=args.host, port=args.port)
+        print(f"Serving {sorted(store.models)} for {args.year} on http://{args.host}:{args.port}")
+
+    tasks = [asyncio.create_task(batcher.run()), asyncio.create_task(watch_files(store, args.reload_interval))]
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--year", type=int, default=2025, help="Season whose features are served")
+    parser.add_argument("--linear", type=str, nargs="*", default=["linear=./models/linreg.json"],
+                        help="Coefficient files to serve, as name=path (see predict.py export)")
+    parser.add_argument("--forest", type=str, nargs="*", default=[],
+                        help="Flat forests to serve, as name=model_dir (see flat_forest.py --export)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
+    parser.add_argument("--unix_socket", type=str, default=None, help="Serve on a unix socket instead of TCP")
+    parser.add_argument("--max_batch", type=int, default=256, help="Maximum rows per micro-batch")
+    parser.add_argument("--max_wait_ms", type=float, default=2.0, help="Maximum time a request waits for its batch to fill")
+    parser.add_argument("--reload_interval", type=float, default=1.0, help="Seconds between checks for changed model/data files")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
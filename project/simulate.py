@@ -0,0 +1,317 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+# monte carlo season simulator
+# team strengths are the model's predicted win%, each remaining game is decided with the log5 formula, and
+# whole seasons are drawn as batched binomial draws over every (team, opponent) pairing
+
+GAMES_PER_SEASON = 82
+PLAYOFF_SEEDS = 6    # seeds 1-6 qualify directly
+PLAY_IN_SEEDS = 10   # seeds 7-10 play the play-in tournament
+
+# current conference alignment (older franchise names are mapped to their conference at the time they last played)
+CONFERENCES = {
+    "Atlanta Hawks": "East", "Boston Celtics": "East", "Brooklyn Nets": "East", "Charlotte Bobcats": "East",
+    "Charlotte Hornets": "East", "Chicago Bulls": "East", "Cleveland Cavaliers": "East", "Detroit Pistons": "East",
+    "Indiana Pacers": "East", "Miami Heat": "East", "Milwaukee Bucks": "East", "New Jersey Nets": "East",
+    "New York Knicks": "East", "Orlando Magic": "East", "Philadelphia 76ers": "East", "Toronto Raptors": "East",
+    "Washington Wizards": "East",
+    "Dallas Mavericks": "West", "Denver Nuggets": "West", "Golden State Warriors": "West", "Houston Rockets": "West",
+    "Los Angeles Clippers": "West", "Los Angeles Lakers": "West", "Memphis Grizzlies": "West",
+    "Minnesota Timberwolves": "West", "New Orleans Hornets": "West", "New Orleans Pelicans": "West",
+    "New Orleans/Oklahoma City Hornets": "West", "Oklahoma City Thunder": "West", "Phoenix Suns": "West",
+    "Portland Trail Blazers": "West", "Sacramento Kings": "West", "San Antonio Spurs": "West",
+    "Seattle SuperSonics": "West", "Utah Jazz": "West", "Vancouver Grizzlies": "West"
+}
+
+
+def log5(p_a, p_b):
+    """
+    Probability that team a beats team b given their win% strengths (Bill James' log5 formula).
+
+    Args:
+        p_a (np.ndarray): Strength of team a.
+        p_b (np.ndarray): Strength of team b.
+    Returns:
+        np.ndarray: Win probability of team a.
+    """
+    return p_a * (1 - p_b) / (p_a * (1 - p_b) + p_b * (1 - p_a))
+
+
+def remaining_schedule(conferences, games_played, n_iter=50):
+    """
+    Approximate the remaining schedule when no game-level schedule is available. The full NBA schedule gives each
+    team 2 games against every team in the other conference and 52 games spread over its own conference. Those
+    pairing rates are rescaled so every team's row adds up to its games left, then rounded to whole games, with a
+    final repair pass so every team ends up with exactly GAMES_PER_SEASON games.
+
+    Args:
+        conferences (np.ndarray): Conference of each team.
+        games_played (np.ndarray): Games already played by each team.
+        n_iter (int): Number of rescaling iterations.
+    Returns:
+        tuple: (team index, opponent index, number of games) arrays, one entry per pairing.
+    """
+    n = len(conferences)
+    same_conf = conferences[:, None] == conferences[None, :]
+    conf_size = np.array([np.sum(conferences == c) for c in conferences])
+    left = np.clip(GAMES_PER_SEASON - np.asarray(games_played, dtype=np.float64), 0, None)
+
+    rates = np.where(same_conf, 52.0 / np.maximum(conf_size[:, None] - 1, 1), 2.0)
+    np.fill_diagonal(rates, 0)
+
+    # symmetric rescaling so each row sums to the team's games left
+    for _ in range(n_iter):
+        scale = np.sqrt(np.divide(left, rates.sum(axis=1), out=np.zeros(n), where=rates.sum(axis=1) > 0))
+        rates = rates * scale[:, None] * scale[None, :]
+
+    # round down, then hand out the remaining games to the pairings with the largest fractions
+    games = np.floor(rates).astype(np.int64)
+    need = left.astype(np.int64) - games.sum(axis=1)
+    i, j = np.triu_indices(n, k=1)
+    for k in np.argsort(-(rates - games)[i, j]):
+        a, b = i[k], j[k]
+        if need[a] > 0 and need[b] > 0:
+            games[a, b] += 1
+            games[b, a] += 1
+            need[a] -= 1
+            need[b] -= 1
+
+    # the rounding can leave teams short when their best pairings were used up: pair them with each other, or give a
+    # team 2 games by splitting a game between two other teams into a game against each of them
+    while need.max() > 0:
+        a = np.argmax(need)
+        others = np.flatnonzero(need > 0)
+        others = others[others != a]
+        if len(others):
+            b = others[np.argmax(rates[a, others])]
+            games[a, b] += 1
+            games[b, a] += 1
+            need[a] -= 1
+            need[b] -= 1
+        elif need[a] >= 2:
+            mask = games > 0
+            mask[a, :] = False
+            mask[:, a] = False
+            score = np.where(mask, rates[a][:, None] + rates[a][None, :], -np.inf)
+            b, c = np.unravel_index(np.argmax(score), score.shape)
+            if not mask[b, c]:
+                raise ValueError(f"Cannot complete the schedule of team {a}")
+            games[b, c] -= 1
+            games[c, b] -= 1
+            games[a, b] += 1
+            games[b, a] += 1
+            games[a, c] += 1
+            games[c, a] += 1
+            need[a] -= 2
+        else:
+            raise ValueError("The teams' games left add up to an odd number, so they cannot be paired")
+    assert np.all(np.asarray(games_played) + games.sum(axis=1) == GAMES_PER_SEASON), "Remaining schedule does not add up to 82 games"
+
+    keep = games[i, j] > 0
+    return i[keep], j[keep], games[i, j][keep]
+
+
+def load_schedule(path, teams):
+    """
+    Load a remaining schedule csv with 'Home' and 'Away' team name columns (one row per game).
+
+    Args:
+        path (str): Path to the schedule csv.
+        teams (list): Team names, in simulation order.
+    Returns:
+        tuple: (team index, opponent index, number of games) arrays, one entry per pairing.
+    """
+    games = pd.read_csv(path)
+    index = {team: k for k, team in enumerate(teams)}
+    pairs = games.apply(lambda g: tuple(sorted((index[g["Home"]], index[g["Away"]]))), axis=1)
+    counts = pairs.value_counts()
+    i = np.array([p[0] for p in counts.index], dtype=np.int64)
+    j = np.array([p[1] for p in counts.index], dtype=np.int64)
+    return i, j, counts.to_numpy(dtype=np.int64)
+
+
+def simulate_chunk(task):
+    """
+    Simulate a chunk of seasons.
+
+    Args:
+        task (tuple): (seed, n_sims, strengths, current wins, pairing arrays (i, j, n), conference ids, play-in flag)
+    Returns:
+        tuple: (final wins (n_sims, n_teams), seeds (n_sims, n_teams), playoff flags (n_sims, n_teams))
+    """
+    seed, n_sims, strengths, wins, (i, j, n_games), conf_ids, play_in = task
+    rng = np.random.default_rng(seed)
+    n_teams = len(strengths)
+
+    # wins of team i in each pairing, for every simulated season at once
+    p = log5(strengths[i], strengths[j])
+    pair_wins = rng.binomial(n_games[None, :], p[None, :], size=(n_sims, len(p)))
+
+    # scatter pairing results onto teams: wins for i, losses for i are wins for j
+    incidence_i = np.zeros((len(p), n_teams))
+    incidence_i[np.arange(len(p)), i] = 1
+    incidence_j = np.zeros((len(p), n_teams))
+    incidence_j[np.arange(len(p)), j] = 1
+    final_wins = wins[None, :] + pair_wins @ incidence_i + (n_games[None, :] - pair_wins) @ incidence_j
+
+    # seed within each conference by wins, random tiebreak
+    seeds = np.zeros((n_sims, n_teams), dtype=np.int64)
+    playoffs = np.zeros((n_sims, n_teams), dtype=bool)
+    key = final_wins + rng.random((n_sims, n_teams)) * 0.5
+    for c in np.unique(conf_ids):
+        members = np.flatnonzero(conf_ids == c)
+        order = members[np.argsort(-key[:, members], axis=1)]  # team index of each seed
+        rows = np.arange(n_sims)[:, None]
+        seeds[rows, order] = np.arange(1, len(members) + 1)[None, :]
+        playoffs[rows, order[:, :PLAYOFF_SEEDS]] = True
+
+        if play_in and len(members) >= PLAY_IN_SEEDS:
+            s7, s8, s9, s10 = (order[:, k] for k in range(6, 10))
+            # 7 v 8: winner is the 7 seed
+            win78 = rng.random(n_sims) < log5(strengths[s7], strengths[s8])
+            seventh, loser78 = np.where(win78, s7, s8), np.where(win78, s8, s7)
+            # 9 v 10, then the loser of 7 v 8 hosts the winner for the 8 seed
+            win910 = rng.random(n_sims) < log5(strengths[s9], strengths[s10])
+            winner910 = np.where(win910, s9, s10)
+            win_last = rng.random(n_sims) < log5(strengths[loser78], strengths[winner910])
+            eighth = np.where(win_last, loser78, winner910)
+            playoffs[np.arange(n_sims), seventh] = True
+            playoffs[np.arange(n_sims), eighth] = True
+        elif not play_in:
+            playoffs[rows, order[:, PLAYOFF_SEEDS:8]] = True
+
+    return final_wins, seeds, playoffs
+
+
+def simulate_season(teams, strengths, wins, losses, schedule=None, n_sims=100000, n_jobs=None, play_in=True, random_state=42):
+    """
+    Simulate the rest of a season n_sims times across a process pool.
+
+    Args:
+        teams (list): Team names.
+        strengths (np.ndarray): Predicted win% of each team.
+        wins (np.ndarray): Current wins.
+        losses (np.ndarray): Current losses.
+        schedule (tuple): Remaining pairings (i, j, n_games). Approximated from the conferences if None.
+        n_sims (int): Number of simulated seasons.
+        n_jobs (int): Number of worker processes (all cores if None).
+        play_in (bool): Whether seeds 7-10 play the play-in tournament (otherwise seeds 7-8 qualify directly).
+        random_state (int): Random state for reproducibility.
+    Returns:
+        tuple: (summary DataFrame, seed probability DataFrame)
+    """
+    missing = [team for team in teams if team not in CONFERENCES]
+    if missing:
+        raise ValueError(f"No conference for {missing}, add them to simulate.CONFERENCES")
+    conferences = np.array([CONFERENCES[team] for team in teams])
+    _, conf_ids = np.unique(conferences, return_inverse=True)
+    strengths = np.clip(np.asarray(strengths, dtype=np.float64), 0.01, 0.99)
+    wins = np.asarray(wins, dtype=np.float64)
+    if schedule is None:
+        schedule = remaining_schedule(conferences, wins + np.asarray(losses, dtype=np.float64))
+
+    # split the simulations into chunks, each with an independent seed
+    n_jobs = n_jobs or os.cpu_count()
+    n_chunks = max(1, min(n_sims // 5000, 4 * n_jobs))
+    sizes = np.full(n_chunks, n_sims // n_chunks)
+    sizes[:n_sims % n_chunks] += 1
+    seeds = np.random.SeedSequence(random_state).generate_state(n_chunks)
+    tasks = [(int(s), int(size), strengths, wins, schedule, conf_ids, play_in) for s, size in zip(seeds, sizes)]
+
+    if n_jobs > 1:
+        with Pool(processes=n_jobs) as pool:
+            results = pool.map(simulate_chunk, tasks)
+    else:
+        results = [simulate_chunk(task) for task in tasks]
+
+    final_wins = np.concatenate([r[0] for r in results])
+    seeds = np.concatenate([r[1] for r in results])
+    playoffs = np.concatenate([r[2] for r in results])
+
+    summary = pd.DataFrame({
+        "Team": teams,
+        "Conf": conferences,
+        "W": wins.astype(int),
+        "L": np.asarray(losses).astype(int),
+        "Strength": strengths.round(3),
+        "Mean Wins": final_wins.mean(axis=0).round(2),
+        "Wins P5": np.percentile(final_wins, 5, axis=0),
+        "Wins P50": np.percentile(final_wins, 50, axis=0),
+        "Wins P95": np.percentile(final_wins, 95, axis=0),
+        "Top-6%": ((seeds >= 1) & (seeds <= PLAYOFF_SEEDS)).mean(axis=0).round(4),
+        "Play-In%": ((seeds > PLAYOFF_SEEDS) & (seeds <= PLAY_IN_SEEDS)).mean(axis=0).round(4) if play_in else 0.0,
+        "Playoff%": playoffs.mean(axis=0).round(4)
+    }).sort_values(["Conf", "Mean Wins"], ascending=[True, False], ignore_index=True)
+
+    max_seed = seeds.max()
+    seed_probs = pd.DataFrame((seeds[:, :, None] == np.arange(1, max_seed + 1)).mean(axis=0).round(4),
+                              columns=[f"Seed {k}" for k in range(1, max_seed + 1)])
+    seed_probs.insert(0, "Team", teams)
+    return summary, seed_probs
+
+
+def predict_strengths(year, model_name):
+    """
+    Train a model on ./data/data.csv and predict the win% strength of every team in a year.
+
+    Args:
+        year (int): Year to predict.
+        model_name (str): Model to use ('linreg', 'rf' or 'svr').
+    Returns:
+        pd.DataFrame: The year's data with a "Predicted Win%" column.
+    """
+    FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
+    RESPONSE_VAR = "W/L%"
+    full_data = pd.read_csv("./data/data.csv")
+
+    if model_name == "linreg":
+        from linreg import train_linear_regression
+        model = train_linear_regression(full_data, FEATURES, RESPONSE_VAR)
+    elif model_name == "rf":
+        from rf import train_random_forest
+        model = train_random_forest(full_data, FEATURES, RESPONSE_VAR)
+    elif model_name == "svr":
+        from svr import train_svr
+        model = train_svr(full_data, FEATURES, RESPONSE_VAR)
+    else:
+        raise ValueError(f"Model {model_name} not supported")
+
+    df = pd.read_csv(f"./data/{year}/data_{year}.csv")
+    df["Predicted Win%"] = model.predict(df[FEATURES])
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--year", type=int, default=2025, help="Season to simulate")
+    parser.add_argument("--model", type=str, default="linreg", choices=["linreg", "rf", "svr"], help="Model used for team strengths")
+    parser.add_argument("--n_sims", type=int, default=100000, help="Number of simulated seasons")
+    parser.add_argument("--n_jobs", type=int, default=None, help="Number of worker processes (all cores if None)")
+    parser.add_argument("--schedule", type=str, default=None, help="CSV of remaining games with Home/Away columns (approximated if None)")
+    parser.add_argument("--no_play_in", action="store_true", help="Seeds 7-8 qualify directly instead of a play-in tournament")
+    parser.add_argument("--seed_probs_path", type=str, default=None, help="CSV path to save the seed probabilities")
+    args = parser.parse_args()
+
+    df = predict_strengths(args.year, args.model)
+    teams = df["Team"].tolist()
+    schedule = load_schedule(args.schedule, teams) if args.schedule else None
+
+    start = time.perf_counter()
+    try:
+        summary, seed_probs = simulate_season(teams, df["Predicted Win%"].to_numpy(), df["W"].to_numpy(), df["L"].to_numpy(),
+                                              schedule=schedule, n_sims=args.n_sims, n_jobs=args.n_jobs, play_in=not args.no_play_in)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        exit()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nSimulated {args.n_sims} seasons for {args.year} in {elapsed:.2f}s:")
+    print(summary.to_string(index=False))
+    if args.seed_probs_path is not None:
+        seed_probs.to_csv(args.seed_probs_path, index=False)
+        print(f"Seed probabilities saved to: {args.seed_probs_path}")
@@ -2,8 +2,16 @@ import pandas as pd
 import os
 import numpy as np
 import argparse
+import time
+import scipy.sparse as sp
+from scipy.sparse.linalg import cg, LinearOperator
+from fetch_games import load_games, load_team_ids
+from season_norm import update_season, output_signature, DEFAULT_TOL
+import tracing
+from tracing import traced
 
-def standardize_srs(year):
+@traced()
+def standardize_srs(year, incremental=False, tol=DEFAULT_TOL):
     """
     Standardizes the Simple Rating system metric for a given year. The mean for a given year will always be 0, but
     the spread can vary a good amount from year to year. The standardization is done to adjust the different scales between years 
@@ -11,23 +19,127 @@ def standardize_srs(year):
 
     Args:
         year (int): Year for which the data will be processed.
+        incremental (bool): Only renormalize the teams that changed since the last run (see season_norm.py).
+        tol (float): Drift of the std, relative to its stored value, that triggers renormalizing every team.
     """
     csv_path = f"./data/{year}/standings_{year}.csv"
     df = pd.read_csv(csv_path)
+    tracing.count("rows", len(df))
+    outpath = f'./data/{year}/srs_{year}.csv'
     if "SRS" in df.columns:
-        srs_std = df['SRS'].std()
-        df['SRS_norm'] = df['SRS'] / srs_std
+        if incremental:
+            normalized, n_changed, write = update_season(year, "srs", df, ["SRS"], "scale", tol=tol, output_path=outpath,
+                                                         signature=output_signature(csv_path))
+            if not write:
+                print(f"No changes in {csv_path}")
+                tracing.count("cache hits")
+                return
+            df['SRS_norm'] = normalized[:, 0]
+        else:
+            srs_std = df['SRS'].std()
+            df['SRS_norm'] = df['SRS'] / srs_std
 
         # output cols
         output_cols = ['Team', 'W', 'L', "W/L%", 'SRS_norm']
         outdf = df[output_cols]
-        outpath = f'./data/{year}/srs_{year}.csv'
         outdf.to_csv(outpath, index=False)
         print(f"Processed and saved: {outpath}")
     else:
         print(f"ERROR: Skipped {csv_path}: 'SRS' column not found.")
 
 
+@traced()
+def daily_srs(games, rtol=1e-10):
+    """
+    Simple Rating System as of every game day of a season. The ratings solve the least-squares system
+    r_home - r_away = margin over every game played so far, with the ratings summing to 0 (the same definition
+    as basketball-reference, home court is not modeled). The normal equations are the sparse team-by-team
+    graph Laplacian of the games, which only gains entries as days are added, so it is accumulated day by day
+    and each day is solved with conjugate gradient starting from the previous day's ratings.
+
+    Args:
+        games (dict): Columns from fetch_games.load_games (played games only).
+        rtol (float): Relative tolerance of the conjugate gradient solve.
+    Returns:
+        tuple: (game dates, team ids, games played, MOV, SOS, SRS), the last four with shape (n_dates, n_teams).
+    """
+    team_ids, idx = np.unique(np.concatenate([games["home"], games["away"]]), return_inverse=True)
+    n_games = len(games["date"])
+    home, away = idx[:n_games], idx[n_games:]
+    margin = games["home_pts"].astype(np.float64) - games["away_pts"]
+    dates, day = np.unique(games["date"], return_inverse=True)
+    n_days, n_teams = len(dates), len(team_ids)
+
+    # running games played and point differential of each team after each day
+    played = np.zeros((n_days, n_teams))
+    diff = np.zeros((n_days, n_teams))
+    np.add.at(played, (day, home), 1)
+    np.add.at(played, (day, away), 1)
+    np.add.at(diff, (day, home), margin)
+    np.add.at(diff, (day, away), -margin)
+    played = np.cumsum(played, axis=0)
+    diff = np.cumsum(diff, axis=0)
+    mov = np.divide(diff, played, out=np.zeros_like(diff), where=played > 0)
+
+    # laplacian increments of each game: +1 on both diagonals, -1 between the two teams
+    rows = np.concatenate([home, away, home, away])
+    cols = np.concatenate([home, away, away, home])
+    vals = np.concatenate([np.ones(2 * n_games), -np.ones(2 * n_games)])
+    game_day = np.tile(day, 4)
+
+    order = np.argsort(game_day, kind="stable")
+    bounds = np.searchsorted(game_day[order], np.arange(n_days + 1))
+    laplacian = sp.csr_matrix((n_teams, n_teams))
+    srs = np.zeros((n_days, n_teams))
+    x = np.zeros(n_teams)
+    for d in range(n_days):
+        k = order[bounds[d]:bounds[d + 1]]
+        laplacian = laplacian + sp.csr_matrix((vals[k], (rows[k], cols[k])), shape=(n_teams, n_teams))
+        # adding mean(v) pins the ratings to sum to 0 without densifying the laplacian
+        op = LinearOperator((n_teams, n_teams), matvec=lambda v, L=laplacian: L @ v + v.mean(), dtype=np.float64)
+        x, _ = cg(op, diff[d], x0=x, rtol=rtol, maxiter=10 * n_teams)
+        srs[d] = x
+
+    # SRS = MOV + SOS
+    sos = srs - mov
+    return dates, team_ids, played, mov, sos, srs
+
+
+@traced()
+def save_daily_srs(year):
+    """
+    Compute the daily SRS and SOS of a season from its stored games and save them to ./data/{year}/srs_daily_{year}.csv.
+    Only regular season games are used, like basketball-reference's SRS. SRS_norm is the SRS divided by its standard
+    deviation across teams that day, as in standardize_srs.
+
+    Args:
+        year (int): Year for which the data will be processed.
+    """
+    games = load_games(year)
+    if games is None:
+        return
+    regular = games["playoff"] == 0
+    games = {col: arr[regular] for col, arr in games.items()}
+    start = time.perf_counter()
+    dates, team_ids, played, mov, sos, srs = daily_srs(games)
+    elapsed = time.perf_counter() - start
+
+    names = {team_id: name for name, team_id in load_team_ids().items()}
+    srs_std = srs.std(axis=1, ddof=1, keepdims=True)
+    df = pd.DataFrame({
+        "Date": np.repeat(dates, len(team_ids)),
+        "Team": np.tile([names.get(t, str(t)) for t in team_ids], len(dates)),
+        "G": played.ravel().astype(int),
+        "MOV": mov.ravel().round(3),
+        "SOS": sos.ravel().round(3),
+        "SRS": srs.ravel().round(3),
+        "SRS_norm": np.divide(srs, srs_std, out=np.zeros_like(srs), where=srs_std > 0).ravel().round(4)
+    })
+    outpath = f"./data/{year}/srs_daily_{year}.csv"
+    df.to_csv(outpath, index=False)
+    print(f"Processed and saved: {outpath} ({len(dates)} days in {elapsed * 1000:.0f} ms)")
+
+
 
 
 if __name__ == "__main__":
@@ -35,9 +147,15 @@ if __name__ == "__main__":
     parser.add_argument("--start_year", type=int, default=2024, help="Start year to fetch data from")
     parser.add_argument("--end_year", type=int, default=2024, help="End year to fetch data from")
     parser.add_argument("--year", type=int, default=None, help="Year to fetch data from (if no date range is needed). Leave blank if a range is needed")
+    parser.add_argument("--daily", action="store_true", help="Compute the daily SRS and SOS from the stored game results instead")
+    parser.add_argument("--incremental", action="store_true", help="Only renormalize the teams that changed since the last run")
+    parser.add_argument("--tol", type=float, default=DEFAULT_TOL, help="Relative drift of the normalization constant that triggers renormalizing every team")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
 
     # parse params
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     start_yr = args.start_year
     end_yr = args.end_year
@@ -46,4 +164,7 @@ if __name__ == "__main__":
         end_yr = args.year
 
     for i in range(start_yr, end_yr+1):
-        standardize_srs(year=i)
\ No newline at end of file
+        if args.daily:
+            save_daily_srs(year=i)
+        else:
+            standardize_srs(year=i, incremental=args.incremental, tol=args.tol)
\ No newline at end of file
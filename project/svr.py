@@ -1,9 +1,23 @@
 import pandas as pd
-from sklearn.svm import SVR
+from sklearn.base import clone
+from sklearn.svm import SVR, LinearSVR
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.metrics.pairwise import pairwise_kernels
+from sklearn.model_selection import KFold
 import argparse
+import time
+from collections import OrderedDict
 import numpy as np
+from predict import export_coefficients
+from bootstrap import add_bootstrap_intervals
+import tracing
+from tracing import traced
 
+@traced()
 def load_data(train_path, test_path):
     """
     Load training and testing data from CSV files.
@@ -16,10 +30,12 @@ def load_data(train_path, test_path):
     """
     train_data = pd.read_csv(train_path)
     test_data = pd.read_csv(test_path)
+    tracing.count("rows", len(train_data) + len(test_data))
     return train_data, test_data
 
 
-def train_svr(train_data, features, response_var, kernel="linear", C=1.0, epsilon=0.1):
+@traced()
+def train_svr(train_data, features, response_var, kernel="linear", C=1.0, epsilon=0.1, gamma="scale", degree=3):
     """
     Train an SVR model.
 
@@ -30,17 +46,330 @@ def train_svr(train_data, features, response_var, kernel="linear", C=1.0, epsilo
         kernel (str): Kernel type for SVR ('linear', 'poly', 'rbf', etc.).
         C (float): Regularization parameter.
         epsilon (float): Epsilon in the epsilon-SVR model.
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+        degree (int): Degree of the polynomial kernel.
     Returns:
         SVR: Trained SVR model.
     """
     X_train = train_data[features]
     y_train = train_data[response_var]
 
-    model = SVR(kernel=kernel, C=C, epsilon=epsilon)
+    model = SVR(kernel=kernel, C=C, epsilon=epsilon, gamma=gamma, degree=degree)
     model.fit(X_train, y_train)
     return model
 
 
+def resolve_gamma(X, gamma):
+    """
+    Resolve sklearn's 'scale' and 'auto' gamma settings to a number for a given training matrix.
+
+    Args:
+        X (np.ndarray): Training features.
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+    Returns:
+        float: Kernel coefficient.
+    """
+    if gamma == "scale":
+        var = X.var()
+        return 1.0 / (X.shape[1] * var) if var != 0 else 1.0
+    if gamma == "auto":
+        return 1.0 / X.shape[1]
+    return float(gamma)
+
+
+class GramCache:
+    """
+    LRU cache of kernel matrices keyed by the kernel parameterization and caller-supplied keys naming the row sets
+    they were built from (e.g. "train"). The Gram matrix only depends on the kernel and its gamma/degree/coef0, so
+    every C/epsilon combination and every prediction on the same rows reuses the same matrix. A caller must use a new
+    key when the rows behind it change, since the rows themselves are not hashed.
+    """
+
+    def __init__(self, max_entries=8):
+        self.matrices = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, X, Y, kernel, gamma, degree, coef0, x_key=None, y_key=None):
+        """
+        Get the kernel matrix K(X, Y), computing it on the first request. Matrices are only cached when both row
+        sets have a key, and the least recently used one is dropped once max_entries are held.
+
+        Args:
+            X (np.ndarray): Row points.
+            Y (np.ndarray): Column points (usually the training rows).
+            kernel (str): Kernel type ('linear', 'poly', 'rbf', 'sigmoid').
+            gamma (float): Kernel coefficient.
+            degree (int): Degree of the polynomial kernel.
+            coef0 (float): Independent term of the poly and sigmoid kernels.
+            x_key (str): Key of the row points (None to not cache).
+            y_key (str): Key of the column points (None to not cache).
+        Returns:
+            np.ndarray: Kernel matrix of shape (len(X), len(Y)).
+        """
+        key = (kernel, gamma, degree, coef0, x_key, y_key)
+        cacheable = x_key is not None and y_key is not None
+        if cacheable and key in self.matrices:
+            self.matrices.move_to_end(key)
+            self.hits += 1
+            tracing.count("cache hits")
+            return self.matrices[key]
+
+        self.misses += 1
+        tracing.count("cache misses")
+        params = {"linear": {}, "rbf": {"gamma": gamma}, "poly": {"gamma": gamma, "degree": degree, "coef0": coef0},
+                  "sigmoid": {"gamma": gamma, "coef0": coef0}}
+        if kernel not in params:
+            raise ValueError(f"Kernel {kernel} not supported for precomputed SVR")
+        K = pairwise_kernels(X, Y, metric=kernel, **params[kernel])
+        if cacheable:
+            self.matrices[key] = K
+            if len(self.matrices) > self.max_entries:
+                self.matrices.popitem(last=False)
+        return K
+
+
+class PrecomputedSVR:
+    """
+    SVR trained with kernel='precomputed' on cached Gram matrices. Exposes predict() on raw feature rows like
+    sklearn's SVR, so it can be passed to evaluate_model and evaluate_specific_year. The training rows are cached
+    under train_key.
+    """
+
+    def __init__(self, X_train, cache, kernel="rbf", gamma="scale", degree=3, coef0=0.0, C=1.0, epsilon=0.1,
+                 train_key="train"):
+        self.X_train = np.asarray(X_train, dtype=np.float64)
+        self.cache = cache
+        self.train_key = train_key
+        self.kernel = kernel
+        self.gamma = resolve_gamma(self.X_train, gamma)
+        self.degree = degree
+        self.coef0 = coef0
+        self.svr = SVR(kernel="precomputed", C=C, epsilon=epsilon)
+
+    def fit(self, y):
+        K = self.cache.get(self.X_train, self.X_train, self.kernel, self.gamma, self.degree, self.coef0,
+                           x_key=self.train_key, y_key=self.train_key)
+        self.svr.fit(K, y)
+        return self
+
+    def predict(self, X, key=None):
+        # cross kernel between the new rows and the training rows, cached as well when the rows have a key
+        K = self.cache.get(np.asarray(X, dtype=np.float64), self.X_train, self.kernel, self.gamma, self.degree, self.coef0,
+                           x_key=key, y_key=self.train_key)
+        return self.svr.predict(K)
+
+
+@traced()
+def train_svr_precomputed(train_data, features, response_var, kernel="rbf", C=1.0, epsilon=0.1, gamma="scale",
+                          degree=3, coef0=0.0, cache=None, train_key="train"):
+    """
+    Train an SVR model on a cached precomputed Gram matrix.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        kernel (str): Kernel type for SVR ('linear', 'poly', 'rbf', 'sigmoid').
+        C (float): Regularization parameter.
+        epsilon (float): Epsilon in the epsilon-SVR model.
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+        degree (int): Degree of the polynomial kernel.
+        coef0 (float): Independent term of the poly and sigmoid kernels.
+        cache (GramCache): Kernel matrix cache to use. A new one is made if None.
+        train_key (str): Cache key of the training rows.
+    Returns:
+        PrecomputedSVR: Trained SVR model.
+    """
+    model = PrecomputedSVR(train_data[features].to_numpy(), cache if cache is not None else GramCache(),
+                           kernel=kernel, gamma=gamma, degree=degree, coef0=coef0, C=C, epsilon=epsilon,
+                           train_key=train_key)
+    return model.fit(train_data[response_var].to_numpy())
+
+
+@traced()
+def grid_search_svr(train_data, features, response_var, C_grid, epsilon_grid, kernel="rbf", gamma="scale",
+                    degree=3, coef0=0.0, n_folds=5, random_state=42, cache=None, train_key="train"):
+    """
+    Cross-validated grid search over C and epsilon. The Gram matrix of the training rows is computed once, and
+    the fold train/validation kernels are slices of it, so the solver is the only per-combination cost.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        C_grid (list): Values of C to try.
+        epsilon_grid (list): Values of epsilon to try.
+        kernel (str): Kernel type for SVR ('linear', 'poly', 'rbf', 'sigmoid').
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+        degree (int): Degree of the polynomial kernel.
+        coef0 (float): Independent term of the poly and sigmoid kernels.
+        n_folds (int): Number of cross-validation folds.
+        random_state (int): Random state for reproducibility.
+        cache (GramCache): Kernel matrix cache to use. A new one is made if None.
+        train_key (str): Cache key of the training rows.
+    Returns:
+        pd.DataFrame: Mean CV RMSE for every (C, epsilon), sorted best first.
+    """
+    cache = cache if cache is not None else GramCache()
+    X = train_data[features].to_numpy(dtype=np.float64)
+    y = train_data[response_var].to_numpy(dtype=np.float64)
+    gamma = resolve_gamma(X, gamma)
+    K = cache.get(X, X, kernel, gamma, degree, coef0, x_key=train_key, y_key=train_key)
+
+    folds = [(tr, va, K[np.ix_(tr, tr)], K[np.ix_(va, tr)])
+             for tr, va in KFold(n_splits=n_folds, shuffle=True, random_state=random_state).split(X)]
+
+    rows = []
+    for C in C_grid:
+        for epsilon in epsilon_grid:
+            fold_rmse = []
+            for tr, va, K_tr, K_va in folds:
+                model = SVR(kernel="precomputed", C=C, epsilon=epsilon)
+                model.fit(K_tr, y[tr])
+                fold_rmse.append(np.sqrt(mean_squared_error(y[va], model.predict(K_va))))
+            rows.append({"C": C, "epsilon": epsilon, "CV RMSE": np.mean(fold_rmse)})
+
+    return pd.DataFrame(rows).sort_values("CV RMSE", ignore_index=True)
+
+
+@traced()
+def train_with_grid(train_data, features, response_var, C_grid, epsilon_grid, kernel="rbf", gamma="scale", degree=3, n_folds=5):
+    """
+    Run the precomputed-kernel grid search and refit the best (C, epsilon) on the full training set.
+    The grid search, final fit and later predictions all share one Gram matrix cache.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        C_grid (list): Values of C to try.
+        epsilon_grid (list): Values of epsilon to try.
+        kernel (str): Kernel type for SVR ('linear', 'poly', 'rbf', 'sigmoid').
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+        degree (int): Degree of the polynomial kernel.
+        n_folds (int): Number of cross-validation folds.
+    Returns:
+        tuple: (trained PrecomputedSVR, grid search results DataFrame)
+    """
+    cache = GramCache()
+    grid = grid_search_svr(train_data, features, response_var, C_grid, epsilon_grid, kernel=kernel, gamma=gamma,
+                           degree=degree, n_folds=n_folds, cache=cache)
+    best = grid.iloc[0]
+    model = train_svr_precomputed(train_data, features, response_var, kernel=kernel, C=best["C"], epsilon=best["epsilon"],
+                                  gamma=gamma, degree=degree, cache=cache)
+    return model, grid
+
+
+@traced()
+def train_svr_approx(train_data, features, response_var, kernel="rbf", C=1.0, epsilon=0.1, feature_map="nystroem",
+                     n_components=100, solver="linear_svr", gamma="scale", degree=3, random_state=42):
+    """
+    Train an approximate kernel SVR. The kernel is replaced by an explicit n_components feature map (Nystroem or
+    random Fourier features) followed by a linear solver, so training time grows about linearly with the number of
+    rows instead of quadratically to cubically. The linear kernel needs no feature map and uses LinearSVR directly.
+    The features are standardized first, and LinearSVR's intercept is scaled up so its penalty is negligible, as in
+    SVR where the intercept is not penalized.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        kernel (str): Kernel to approximate ('linear', 'poly', 'rbf', 'sigmoid').
+        C (float): Regularization parameter.
+        epsilon (float): Epsilon in the epsilon-SVR model (ignored by the ridge solver).
+        feature_map (str): Kernel feature map ('nystroem' or 'rff'). Random Fourier features only support rbf.
+        n_components (int): Dimension of the feature map. Larger is more accurate and slower.
+        solver (str): Linear solver on the mapped features ('linear_svr' or 'ridge').
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+        degree (int): Degree of the polynomial kernel.
+        random_state (int): Random state for reproducibility.
+    Returns:
+        Pipeline: Trained scaler + feature map + linear model pipeline.
+    """
+    X_train = train_data[features]
+    y_train = train_data[response_var]
+
+    if solver == "linear_svr":
+        linear = LinearSVR(C=C, epsilon=epsilon, dual="auto", intercept_scaling=10.0, max_iter=100000,
+                           random_state=random_state)
+    elif solver == "ridge":
+        linear = Ridge(alpha=1.0 / (2.0 * C))
+    else:
+        raise ValueError(f"Solver {solver} not supported")
+
+    if kernel == "linear":
+        model = make_pipeline(StandardScaler(), linear)
+    else:
+        # gamma is resolved on the standardized features the feature map sees
+        gamma = resolve_gamma(StandardScaler().fit_transform(X_train.to_numpy(dtype=np.float64)), gamma)
+        if feature_map == "nystroem":
+            fmap = Nystroem(kernel=kernel, gamma=gamma, degree=degree, n_components=min(n_components, len(X_train)),
+                            random_state=random_state)
+        elif feature_map == "rff":
+            if kernel != "rbf":
+                raise ValueError("Random Fourier features only approximate the rbf kernel")
+            fmap = RBFSampler(gamma=gamma, n_components=n_components, random_state=random_state)
+        else:
+            raise ValueError(f"Feature map {feature_map} not supported")
+        model = make_pipeline(StandardScaler(), fmap, linear)
+
+    model.fit(X_train, y_train)
+    return model
+
+
+@traced()
+def compare_approx_svr(train_data, test_data, features, response_var, components_grid, kernel="rbf", C=1.0, epsilon=0.1,
+                       feature_map="nystroem", solver="linear_svr", gamma="scale", degree=3):
+    """
+    Report the accuracy and training time gap between exact SVR and the approximate mode for several feature map sizes.
+    The exact SVR is fit on the same standardized features as the approximate models, so the gap is the error of the
+    approximation alone.
+
+    Args:
+        train_data (pd.DataFrame): Training dataset.
+        test_data (pd.DataFrame): Testing dataset.
+        features (list): List of feature column names.
+        response_var (str): Name of the response variable column.
+        components_grid (list): Feature map sizes to try.
+        kernel (str): Kernel type for SVR.
+        C (float): Regularization parameter.
+        epsilon (float): Epsilon in the epsilon-SVR model.
+        feature_map (str): Kernel feature map ('nystroem' or 'rff').
+        solver (str): Linear solver on the mapped features ('linear_svr' or 'ridge').
+        gamma (str or float): Kernel coefficient ('scale', 'auto' or a float).
+        degree (int): Degree of the polynomial kernel.
+    Returns:
+        pd.DataFrame: RMSE, R^2 and training time of each approximate model, with the RMSE gap to exact SVR.
+    """
+    start = time.perf_counter()
+    exact = make_pipeline(StandardScaler(), SVR(kernel=kernel, C=C, epsilon=epsilon, gamma=gamma, degree=degree))
+    exact.fit(train_data[features], train_data[response_var])
+    exact_time = time.perf_counter() - start
+    exact_metrics = evaluate_model(exact, test_data, features, response_var)
+    exact_pred = exact.predict(test_data[features])
+
+    rows = [{"Model": "exact", "Components": None, "RMSE": exact_metrics["RMSE"], "R2": exact_metrics["R2"],
+             "RMSE Gap": 0.0, "Max Pred Diff": 0.0, "Train Time (s)": exact_time}]
+    for n_components in components_grid:
+        start = time.perf_counter()
+        approx = train_svr_approx(train_data, features, response_var, kernel=kernel, C=C, epsilon=epsilon,
+                                  feature_map=feature_map, n_components=n_components, solver=solver, gamma=gamma,
+                                  degree=degree)
+        train_time = time.perf_counter() - start
+        metrics = evaluate_model(approx, test_data, features, response_var)
+        rows.append({"Model": f"{feature_map}+{solver}", "Components": n_components, "RMSE": metrics["RMSE"],
+                     "R2": metrics["R2"], "RMSE Gap": metrics["RMSE"] - exact_metrics["RMSE"],
+                     "Max Pred Diff": np.abs(approx.predict(test_data[features]) - exact_pred).max(),
+                     "Train Time (s)": train_time})
+        if kernel == "linear":
+            break  # no feature map, the component count does nothing
+
+    return pd.DataFrame(rows)
+
+
+@traced()
 def evaluate_model(model, test_data, features, response_var):
     """
     Evaluate the SVR model on the testing data.
@@ -64,6 +393,7 @@ def evaluate_model(model, test_data, features, response_var):
     return {"RMSE": rmse, "R2": r2}
 
 
+@traced()
 def evaluate_specific_year(year, model, features, response_var):
     """
     Evaluate the model on a specific year's data and keep team names for comparison.
@@ -123,10 +453,28 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--eval_year", type=int, default=None, help="Evaluate the trained model on a specific year. \
                         If none given, uses the trian/test sets from ./data")
+    parser.add_argument("--export_path", type=str, default=None, help="Save the trained model as a plain coefficient file (linear models only)")
     parser.add_argument("--kernel", type=str, default="linear", help="Kernel type for SVR (linear, poly, rbf, etc.)")
     parser.add_argument("--C", type=float, default=1.0, help="Regularization parameter for SVR")
     parser.add_argument("--epsilon", type=float, default=0.1, help="Epsilon in the epsilon-SVR model")
+    parser.add_argument("--gamma", type=str, default="scale", help="Kernel coefficient for rbf, poly and sigmoid ('scale', 'auto' or a float)")
+    parser.add_argument("--degree", type=int, default=3, help="Degree of the poly kernel")
+    parser.add_argument("--C_grid", type=str, default=None, help="Comma separated C values for a precomputed-kernel grid search (e.g., 0.1,1,10)")
+    parser.add_argument("--epsilon_grid", type=str, default=None, help="Comma separated epsilon values for the grid search (defaults to --epsilon)")
+    parser.add_argument("--cv_folds", type=int, default=5, help="Number of cross-validation folds for the grid search")
+    parser.add_argument("--approx", type=str, default=None, choices=["nystroem", "rff"],
+                        help="Train an approximate kernel SVR with the given feature map instead of exact SVR")
+    parser.add_argument("--n_components", type=int, default=100, help="Feature map size for the approximate mode (accuracy vs speed)")
+    parser.add_argument("--approx_solver", type=str, default="linear_svr", choices=["linear_svr", "ridge"],
+                        help="Linear solver used on the mapped features")
+    parser.add_argument("--compare_exact", action="store_true", help="Report the accuracy/time gap of the approximate mode versus exact SVR")
+    parser.add_argument("--bootstrap", type=int, default=0, help="Number of season-level bootstrap replicates for prediction intervals (0 to disable)")
+    parser.add_argument("--alpha", type=float, default=0.1, help="Miscoverage level for the prediction intervals (0.1 = 90%% intervals)")
+    parser.add_argument("--n_jobs", type=int, default=None, help="Number of worker processes for the bootstrap (all cores if None)")
+    parser.add_argument("--trace", action="store_true", help="Record a trace of the run in ./traces and print a timing summary")
     args = parser.parse_args()
+    if args.trace:
+        tracing.start()
 
     # load train and test data
     train_path = "./data/train_data.csv"
@@ -137,21 +485,66 @@ if __name__ == "__main__":
     FEATURES = ["Four-Factor Score", "NRtg_norm", "SRS_norm"]
     RESPONSE_VAR = "W/L%"  # Using Win% as the response variable
 
+    # only the plain linear-kernel SVR has coefficients to export, check before training
+    if args.export_path is not None and (args.kernel != "linear" or args.C_grid or args.approx is not None):
+        print("ERROR: --export_path needs a linear kernel without --C_grid or --approx")
+        exit()
+
+    # grid search settings (precomputed kernel mode)
+    gamma = args.gamma if args.gamma in ("scale", "auto") else float(args.gamma)
+    C_grid = [float(c) for c in args.C_grid.split(",")] if args.C_grid else None
+    epsilon_grid = [float(e) for e in args.epsilon_grid.split(",")] if args.epsilon_grid else [args.epsilon]
+
     if args.eval_year is not None:
         # use single compiled set for training when evaluating on one year
         full_data = pd.read_csv("./data/data.csv")
 
         # Train the model on the entire dataset
-        model = train_svr(full_data, FEATURES, RESPONSE_VAR, kernel=args.kernel, C=args.C, epsilon=args.epsilon)
+        if C_grid is not None:
+            model, grid = train_with_grid(full_data, FEATURES, RESPONSE_VAR, C_grid, epsilon_grid, kernel=args.kernel,
+                                          gamma=gamma, degree=args.degree, n_folds=args.cv_folds)
+            print("Grid search (best first):")
+            print(grid.head(10))
+            args.C, args.epsilon = grid.iloc[0]["C"], grid.iloc[0]["epsilon"]
+        elif args.approx is not None:
+            model = train_svr_approx(full_data, FEATURES, RESPONSE_VAR, kernel=args.kernel, C=args.C, epsilon=args.epsilon,
+                                     feature_map=args.approx, n_components=args.n_components, solver=args.approx_solver, gamma=gamma,
+                                     degree=args.degree)
+        else:
+            model = train_svr(full_data, FEATURES, RESPONSE_VAR, kernel=args.kernel, C=args.C, epsilon=args.epsilon,
+                              gamma=gamma, degree=args.degree)
+
+        if args.export_path is not None:
+            export_coefficients(model, FEATURES, args.export_path)
 
         # Evaluate the model on the specific year
         year_res, year_metrics = evaluate_specific_year(args.eval_year, model, FEATURES, RESPONSE_VAR)
         if year_res is not None:
+                if args.bootstrap > 0:
+                    # replicates refit the point model's hyperparameters on resampled seasons of data.csv
+                    if isinstance(model, PrecomputedSVR):
+                        estimator = SVR(kernel=model.kernel, gamma=model.gamma, degree=model.degree, coef0=model.coef0,
+                                        C=model.svr.C, epsilon=model.svr.epsilon)
+                    else:
+                        estimator = clone(model)
+                    year_res = add_bootstrap_intervals(year_res, args.eval_year, estimator, full_data, FEATURES, RESPONSE_VAR,
+                                                       n_boot=args.bootstrap, alpha=args.alpha, n_jobs=args.n_jobs)
                 print(f"\nEvaluation Results for {args.eval_year}:")
                 print(year_res)
                 print(f"\nMetrics for {args.eval_year}:")
                 print(f"Root Mean Squared Error (RMSE): {year_metrics['RMSE']:.3f}")
                 print(f"R^2 Score: {year_metrics['R2']:.3f}")
+
+                if args.compare_exact:
+                    # the evaluated season is the test set of the comparison
+                    year_data = pd.read_csv(f"./data/{args.eval_year}/data_{args.eval_year}.csv")
+                    components_grid = sorted({25, 50, 100, 200, 400, args.n_components})
+                    comparison = compare_approx_svr(full_data, year_data, FEATURES, RESPONSE_VAR, components_grid,
+                                                    kernel=args.kernel, C=args.C, epsilon=args.epsilon,
+                                                    feature_map=args.approx or "nystroem", solver=args.approx_solver,
+                                                    gamma=gamma, degree=args.degree)
+                    print(f"\nApproximate vs exact SVR on {args.eval_year}:")
+                    print(comparison.to_string(index=False))
     else:
         # use train/test sets when not evaluating for a specific year
         train_path = "./data/train_data.csv"
@@ -161,7 +554,21 @@ if __name__ == "__main__":
         train_data, test_data = load_data(train_path, test_path)
 
         # Train the model on the training dataset
-        model = train_svr(train_data, FEATURES, RESPONSE_VAR, kernel=args.kernel, C=args.C, epsilon=args.epsilon)
+        if C_grid is not None:
+            model, grid = train_with_grid(train_data, FEATURES, RESPONSE_VAR, C_grid, epsilon_grid, kernel=args.kernel,
+                                          gamma=gamma, degree=args.degree, n_folds=args.cv_folds)
+            print("Grid search (best first):")
+            print(grid.head(10))
+        elif args.approx is not None:
+            model = train_svr_approx(train_data, FEATURES, RESPONSE_VAR, kernel=args.kernel, C=args.C, epsilon=args.epsilon,
+                                     feature_map=args.approx, n_components=args.n_components, solver=args.approx_solver, gamma=gamma,
+                                     degree=args.degree)
+        else:
+            model = train_svr(train_data, FEATURES, RESPONSE_VAR, kernel=args.kernel, C=args.C, epsilon=args.epsilon,
+                              gamma=gamma, degree=args.degree)
+
+        if args.export_path is not None:
+            export_coefficients(model, FEATURES, args.export_path)
 
         # Evaluate the model on the testing dataset
         metrics = evaluate_model(model, test_data, FEATURES, RESPONSE_VAR)
@@ -169,4 +576,12 @@ if __name__ == "__main__":
         # Print evaluation results
         print("Model Evaluation on Test Set:")
         print(f"Root Mean Squared Error (RMSE): {metrics['RMSE']:.3f}")
-        print(f"R^2 Score: {metrics['R2']:.3f}")
\ No newline at end of file
+        print(f"R^2 Score: {metrics['R2']:.3f}")
+
+        if args.compare_exact:
+            components_grid = sorted({25, 50, 100, 200, 400, args.n_components})
+            comparison = compare_approx_svr(train_data, test_data, FEATURES, RESPONSE_VAR, components_grid, kernel=args.kernel,
+                                            C=args.C, epsilon=args.epsilon, feature_map=args.approx or "nystroem",
+                                            solver=args.approx_solver, gamma=gamma, degree=args.degree)
+            print("\nApproximate vs exact SVR:")
+            print(comparison.to_string(index=False))
\ No newline at end of file
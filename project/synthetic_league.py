@@ -0,0 +1,472 @@
+import argparse
+import contextlib
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+from fetch_games import get_team_ids, write_game_days, GAME_COLUMNS
+from four_factors import OFFENSIVE_FACTORS, DEFENSIVE_FACTORS
+
+# synthetic league generator for scale testing
+# writes the raw tables of made-up leagues in the layout fetch_bballref_data.py (and fetch_games.py) produce,
+# {out_dir}/league_{i}/data/{year}/{table}_{year}.csv, so every pipeline script can be run from a league folder.
+# Each team's four factors are drawn around the league averages with the spread, correlations and year-to-year
+# persistence of the real 2000-2024 seasons, and the league averages drift from season to season. The box score
+# of both sides, the ratings, the standings and the shot mix are then derived from the factors, so the tables
+# agree with each other the way the real ones do. Leagues are generated one season at a time, so memory only
+# grows with the number of teams.
+
+TABLES = ["standings", "per_100_team", "per_100_opp", "adv", "shooting", "per_game_team", "per_game_opp"]
+
+# league averages of a season (2000-2024 average), eFG%, FT/FGA, 3PAr, 3P% and FT% are fractions, TOV% and ORB%
+# percentages, Pace is possessions per 48 minutes
+LEAGUE_MEANS = {"eFG%": 0.503, "TOV%": 13.3, "ORB%": 25.8, "FT/FGA": 0.217, "3PAr": 0.265, "3P%": 0.357,
+                "FT%": 0.765, "Pace": 94.2}
+# season-to-season change of the league averages and how strongly they revert to LEAGUE_MEANS
+LEAGUE_STEP = {"eFG%": 0.0064, "TOV%": 0.37, "ORB%": 0.64, "FT/FGA": 0.0101, "3PAr": 0.0096, "3P%": 0.004,
+               "FT%": 0.004, "Pace": 1.12}
+LEAGUE_REVERSION = 0.95
+
+# within-season spread of the team four factors (in the order of the adv table) and their correlations
+FACTORS = OFFENSIVE_FACTORS + DEFENSIVE_FACTORS
+FACTOR_SD = np.array([0.018, 0.94, 2.32, 0.022, 0.015, 1.01, 1.65, 0.022])
+FACTOR_CORR = np.array([
+    [1.00, -0.12, -0.25, 0.10, -0.33, -0.09, 0.08, -0.22],
+    [-0.12, 1.00, 0.09, 0.18, 0.04, 0.06, -0.09, 0.22],
+    [-0.25, 0.09, 1.00, 0.10, 0.08, 0.01, 0.00, 0.10],
+    [0.10, 0.18, 0.10, 1.00, -0.06, 0.03, 0.04, 0.09],
+    [-0.33, 0.04, 0.08, -0.06, 1.00, 0.08, -0.40, 0.15],
+    [-0.09, 0.06, 0.01, 0.03, 0.08, 1.00, -0.18, 0.37],
+    [0.08, -0.09, 0.00, 0.04, -0.40, -0.18, 1.00, -0.12],
+    [-0.22, 0.22, 0.10, 0.09, 0.15, 0.37, -0.12, 1.00]
+])
+FACTOR_CHOL = np.linalg.cholesky(FACTOR_CORR)
+# spread of the team pace and 3PAr (the playing style, persistent like the factors)
+STYLE_SD = np.array([2.18, 0.043])
+# correlation of a team's factors and style with its previous season
+SEASON_RHO = np.array([0.60, 0.51, 0.50, 0.51, 0.54, 0.48, 0.45, 0.56, 0.62, 0.64])
+
+# pythagorean exponent of the expected wins and the home court advantage (points)
+PYTHAG_EXP = 14
+HOME_COURT = 2.5
+# spread of the wins around the pythagorean wins, as a share of the games (close game luck)
+WIN_LUCK_SD = 0.036
+# standard deviation of one team's points in a game around its expectation
+GAME_PTS_SD = 9.0
+# game days of a regular season, starting on October 24
+SEASON_DAYS = 170
+
+# shot zones of the 2P attempts (0-3, 3-10, 10-16 and 16-3P ft): share of the 2PA, FG% and distance
+ZONE_SHARES = np.array([0.420, 0.313, 0.155, 0.112])
+ZONE_FG = np.array([0.685, 0.428, 0.427, 0.401])
+ZONE_FG_SD = np.array([0.032, 0.037, 0.034, 0.034])
+ZONE_DIST = np.array([1.5, 6.5, 13.0, 19.5])
+THREE_DIST = 25.0
+
+BOX_COLUMNS = ["FG", "FGA", "FG%", "3P", "3PA", "3P%", "2P", "2PA", "2P%", "FT", "FTA", "FT%", "ORB", "DRB", "TRB",
+               "AST", "STL", "BLK", "TOV", "PF", "PTS"]
+SHOOTING_COLUMNS = [
+    "% of FGA By Distance - 2P", "% of FGA By Distance - 0-3", "% of FGA By Distance - 3-10",
+    "% of FGA By Distance - 10-16", "% of FGA By Distance - 16-3P", "% of FGA By Distance - 3P",
+    "FG% By Distance - 2P", "FG% By Distance - 0-3", "FG% By Distance - 3-10", "FG% By Distance - 10-16",
+    "FG% By Distance - 16-3P", "FG% By Distance - 3P", "% of FG Ast'd - 2P", "% of FG Ast'd - 3P", "Dunks - %FGA",
+    "Dunks - Md.", "Layups - %FGA", "Layups - Md.", "Corner - %3PA", "Corner - 3P%", "Heaves - Att.", "Heaves - Md."
+]
+
+
+# format -> (decimals, format string), "pct" are fractions shown without the leading zero (.487)
+FORMATTERS = {
+    "int": (0, "{:.0f}"),
+    "1f": (1, "{:.1f}"),
+    "2f": (2, "{:.2f}"),
+    "+1f": (1, "{:+.1f}"),
+    "pct": (3, "{:.3f}"),
+    "comma": (0, "{:,.0f}")
+}
+
+
+def format_table(df, formats, rank=True, average=False, blank=()):
+    """
+    Format a table of numbers the way the scraper saves the basketball-reference tables.
+
+    Args:
+        df (pd.DataFrame): Team column and the numeric (or, for "str" columns, text) columns, in table order.
+        formats (dict): Column -> format (a FORMATTERS key, or "str" to keep the values).
+        rank (bool): Add the Rk column (rows are ranked in their current order).
+        average (bool): Add a League Average row with the mean of every column.
+        blank (tuple): Columns left empty in the League Average row.
+    Returns:
+        pd.DataFrame: Table of strings.
+    """
+    n = len(df)
+    out = {}
+    if rank:
+        out["Rk"] = [str(i) for i in range(1, n + 1)] + [""] * average
+    out["Team"] = list(df["Team"]) + ["League Average"] * average
+    for col, kind in formats.items():
+        if kind == "str":
+            out[col] = list(df[col]) + [""] * average
+            continue
+        values = df[col].to_numpy(dtype=np.float64)
+        if average:
+            values = np.append(values, values.mean())
+        decimals, fmt = FORMATTERS[kind]
+        # rounding first (and adding 0) turns the values that round to -0 into 0
+        text = map(fmt.format, (np.round(values, decimals) + 0.0).tolist())
+        out[col] = [t[1:] if t[0] == "0" else t for t in text] if kind == "pct" else list(text)
+        if average and col in blank:
+            out[col][-1] = ""
+    return pd.DataFrame(out)
+
+
+def step_league(rng, means):
+    """
+    League averages of the next season: each one takes a step and reverts towards LEAGUE_MEANS.
+    """
+    return {key: LEAGUE_MEANS[key] + LEAGUE_REVERSION * (value - LEAGUE_MEANS[key]) + LEAGUE_STEP[key] * rng.normal()
+            for key, value in means.items()}
+
+
+def step_teams(rng, z):
+    """
+    Latent team strengths (factors and style, standard normal) of the next season, correlated SEASON_RHO with
+    the current ones.
+    """
+    return SEASON_RHO * z + np.sqrt(1 - SEASON_RHO ** 2) * rng.standard_normal(z.shape)
+
+
+def possession_box(efg, tov, orb, ft_fga, par, p3, ftp):
+    """
+    Box score of one side per 100 possessions from its four factors and shot mix. Possessions are
+    FGA - ORB + TOV + 0.44 FTA, TOV% is TOV / (FGA + 0.44 FTA + TOV) and ORB% is the share of the misses
+    rebounded, which fixes the number of shots.
+
+    Args:
+        efg, tov, orb, ft_fga (np.ndarray): Four factors (fractions).
+        par, p3, ftp (np.ndarray): 3PAr, 3P% and FT%.
+    Returns:
+        dict: FG, FGA, 3P, 3PA, 2P, 2PA, FT, FTA, ORB, TOV and PTS.
+    """
+    ftr = ft_fga / ftp
+    fg_rate = efg - 0.5 * p3 * par
+    fga = 100 / ((1 + 0.44 * ftr) / (1 - tov) - orb * (1 - fg_rate))
+    box = {"FGA": fga, "FG": fg_rate * fga, "3PA": par * fga}
+    box["3P"] = p3 * box["3PA"]
+    box["2P"] = box["FG"] - box["3P"]
+    box["2PA"] = fga - box["3PA"]
+    box["FT"] = ft_fga * fga
+    box["FTA"] = ftr * fga
+    box["ORB"] = orb * (fga - box["FG"])
+    box["TOV"] = tov / (1 - tov) * fga * (1 + 0.44 * ftr)
+    box["PTS"] = 2 * box["FG"] + box["3P"] + box["FT"]
+    return box
+
+
+def season_stats(rng, means, z):
+    """
+    Draw one season of team stats from the league averages and the latent team strengths.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        means (dict): League averages of the season.
+        z (np.ndarray): Latent team strengths (teams x 10).
+    Returns:
+        dict: Per team arrays: the eight factors, Pace, Age, the per 100 possession box scores of the team
+            ("team") and its opponents ("opp"), ORtg, DRtg and the extra shooting stats.
+    """
+    n = len(z)
+    dev = z[:, :8] @ FACTOR_CHOL.T * FACTOR_SD
+    # what the league scores is what it allows: the offensive and defensive averages both equal the league's
+    dev -= dev.mean(axis=0)
+    style = z[:, 8:] * STYLE_SD
+
+    s = {
+        "Off eFG%": means["eFG%"] + dev[:, 0], "Off TOV%": means["TOV%"] + dev[:, 1],
+        "ORB%": means["ORB%"] + dev[:, 2], "Off FT/FGA%": means["FT/FGA"] + dev[:, 3],
+        "Def eFG%": means["eFG%"] + dev[:, 4], "Def TOV%": means["TOV%"] + dev[:, 5],
+        "DRB%": 100 - means["ORB%"] + dev[:, 6], "Def FT/FGA%": means["FT/FGA"] + dev[:, 7],
+        "Pace": means["Pace"] + style[:, 0],
+        "Age": rng.normal(26.8, 1.7, n)
+    }
+    par = np.clip(means["3PAr"] + style[:, 1], 0.01, 0.9)
+    p3 = np.clip(means["3P%"] + rng.normal(0, 0.018, n), 0.2, 0.5)
+    ftp = np.clip(means["FT%"] + rng.normal(0, 0.028, n), 0.6, 0.95)
+    opp_par = np.clip(means["3PAr"] + rng.normal(0, 0.02, n), 0.01, 0.9)
+    opp_p3 = np.clip(means["3P%"] + rng.normal(0, 0.012, n), 0.2, 0.5)
+    opp_ftp = np.clip(means["FT%"] + rng.normal(0, 0.01, n), 0.6, 0.95)
+
+    team = possession_box(s["Off eFG%"], s["Off TOV%"] / 100, s["ORB%"] / 100, s["Off FT/FGA%"], par, p3, ftp)
+    opp = possession_box(s["Def eFG%"], s["Def TOV%"] / 100, 1 - s["DRB%"] / 100, s["Def FT/FGA%"], opp_par,
+                         opp_p3, opp_ftp)
+    for side, other in ((team, opp), (opp, team)):
+        side["DRB"] = other["FGA"] - other["FG"] - other["ORB"]
+        side["TRB"] = side["ORB"] + side["DRB"]
+        side["AST"] = rng.normal(0.59, 0.04, n) * side["FG"]
+        side["STL"] = rng.normal(0.55, 0.05, n) * other["TOV"]
+        side["BLK"] = rng.normal(0.10, 0.015, n) * other["2PA"]
+        side["PF"] = rng.normal(20.5, 1.4, n)
+        side["FG%"] = side["FG"] / side["FGA"]
+        side["3P%"] = side["3P"] / side["3PA"]
+        side["2P%"] = side["2P"] / side["2PA"]
+        side["FT%"] = side["FT"] / side["FTA"]
+    s["team"], s["opp"] = team, opp
+    s["ORtg"], s["DRtg"] = team["PTS"], opp["PTS"]
+
+    # shot mix of the 2P attempts, with zone FG% that add up to the team's 2P%
+    zones = rng.dirichlet(ZONE_SHARES * 60, size=n)
+    zone_fg = ZONE_FG + rng.normal(0, ZONE_FG_SD, (n, 4))
+    zone_fg *= (team["2P%"] / np.sum(zones * zone_fg, axis=1))[:, None]
+    s["zones"], s["zone_fg"] = zones, np.clip(zone_fg, 0, 1)
+    return s
+
+
+def simulate_games(rng, ortg, drtg, pace, n_games, year):
+    """
+    Play a season of games between the teams. Each of the n_games rounds pairs the teams at random (one team
+    sits out each round when the number of teams is odd), the expected score of each side comes from its ORtg,
+    the opponent's DRtg, the two teams' pace and home court, and ties go to overtime. The scores are then shifted
+    so every team's average points scored and allowed match its season (ORtg and DRtg at its pace), which keeps
+    the standings that come out of the games in line with the season tables.
+
+    Returns:
+        dict: Games in the fetch_games.py columns (team indices in home and away), sorted by round.
+    """
+    n = len(ortg)
+    half = n // 2
+    order = np.argsort(rng.random((n_games, n)), axis=1)
+    home, away = order[:, :half].ravel(), order[:, half:2 * half].ravel()
+    rounds = np.repeat(np.arange(n_games), half)
+
+    game_pace = (pace[home] + pace[away]) / 200
+    home_pts = (ortg[home] + drtg[away]) / 2 * game_pace + HOME_COURT / 2 + rng.normal(0, GAME_PTS_SD, len(home))
+    away_pts = (ortg[away] + drtg[home]) / 2 * game_pace - HOME_COURT / 2 + rng.normal(0, GAME_PTS_SD, len(home))
+
+    g = np.bincount(home, minlength=n) + np.bincount(away, minlength=n)
+    scored, allowed = ortg * pace / 100, drtg * pace / 100
+    # the league scores what it allows
+    allowed += (g @ scored - g @ allowed) / g.sum()
+    for _ in range(20):
+        # alternately match the points scored and allowed of every team (block Gauss-Seidel on the team offsets)
+        off = (np.bincount(home, home_pts, n) + np.bincount(away, away_pts, n)) / np.maximum(g, 1) - scored
+        home_pts -= off[home]
+        away_pts -= off[away]
+        dfn = (np.bincount(home, away_pts, n) + np.bincount(away, home_pts, n)) / np.maximum(g, 1) - allowed
+        home_pts -= dfn[away]
+        away_pts -= dfn[home]
+        if max(np.abs(off).max(), np.abs(dfn).max()) < 1e-3:
+            break
+
+    home_pts, away_pts = np.rint(home_pts), np.rint(away_pts)
+    ot = np.zeros(len(home))
+    tied = home_pts == away_pts
+    while tied.any():
+        ot[tied] += 1
+        home_pts[tied] += np.rint(rng.normal(10, 3, tied.sum()))
+        away_pts[tied] += np.rint(rng.normal(10, 3, tied.sum()))
+        tied = home_pts == away_pts
+
+    # spread the rounds over the season (rounds share a day when there are more rounds than days)
+    day = rounds * SEASON_DAYS // n_games
+    dates = np.datetime64(f"{year - 1}-10-24") + day.astype("timedelta64[D]")
+    date_ints = np.char.replace(np.datetime_as_string(dates, unit="D"), "-", "").astype(np.int32)
+    return {"date": date_ints, "home": home, "away": away, "home_pts": home_pts, "away_pts": away_pts, "ot": ot,
+            "playoff": np.zeros(len(home))}
+
+
+def season_tables(rng, names, s, n_games, games=None):
+    """
+    Build the raw tables of a season from its team stats.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        names (list): Team names.
+        s (dict): Team stats from season_stats.
+        n_games (int): Games per team (used when games is None).
+        games (dict): Simulated games; the W, L and G then come from them, otherwise the wins are drawn from the
+            pythagorean expectation.
+    Returns:
+        dict: Table name -> table of strings, in the layout of fetch_bballref_data.py.
+    """
+    n = len(names)
+    expected = s["ORtg"] ** PYTHAG_EXP / (s["ORtg"] ** PYTHAG_EXP + s["DRtg"] ** PYTHAG_EXP)
+    if games is None:
+        g = np.full(n, n_games)
+        w = np.clip(np.rint(n_games * (expected + rng.normal(0, WIN_LUCK_SD, n))), 0, n_games)
+    else:
+        home_win = games["home_pts"] > games["away_pts"]
+        g = np.bincount(games["home"], minlength=n) + np.bincount(games["away"], minlength=n)
+        w = (np.bincount(games["home"][home_win], minlength=n) +
+             np.bincount(games["away"][~home_win], minlength=n))
+    pw = np.rint(g * expected)
+    mov = (s["ORtg"] - s["DRtg"]) * s["Pace"] / 100
+    # in a balanced schedule the opponents' average margin is -MOV / (n - 1); SRS is centered on 0
+    sos = -mov / max(n - 1, 1) + rng.normal(0, 0.25, n)
+    sos -= np.mean(mov + sos)
+    ortg, drtg = np.round(s["ORtg"], 1), np.round(s["DRtg"], 1)
+    team, opp = s["team"], s["opp"]
+
+    base = pd.DataFrame({"Team": names, "G": g, "W": w, "L": g - w, "PW": pw, "PL": g - pw, "MOV": mov, "SOS": sos,
+                         "SRS": mov + sos})
+    tables = {}
+
+    # standings: two conferences (first and second half of the teams), GB from the best record in the league
+    standings = base.assign(**{"W/L%": w / g, "PS/G": team["PTS"] * s["Pace"] / 100,
+                               "PA/G": opp["PTS"] * s["Pace"] / 100})
+    lead = standings["W/L%"].idxmax()
+    standings["GB"] = ((w[lead] - w) + (standings["L"] - standings.loc[lead, "L"])) / 2
+    standings["Conf"] = np.arange(n) >= (n + 1) // 2
+    standings = standings.sort_values(["Conf", "W/L%", "W"], ascending=[True, False, False], kind="stable")
+    tables["standings"] = format_table(standings, {"W": "int", "L": "int", "W/L%": "pct", "GB": "1f", "PS/G": "1f",
+                                                   "PA/G": "1f", "SRS": "2f"}, rank=False)
+
+    attend_g = np.rint(np.clip(rng.normal(17500, 2000, n), 5000, 25000))
+    adv = base.assign(**{
+        "Age": s["Age"], "ORtg": ortg, "DRtg": drtg, "NRtg": ortg - drtg, "Pace": s["Pace"],
+        "FTr": team["FTA"] / team["FGA"], "3PAr": team["3PA"] / team["FGA"],
+        "TS%": team["PTS"] / (2 * (team["FGA"] + 0.44 * team["FTA"])),
+        **{factor: s[factor] for factor in FACTORS},
+        "Arena": [f"{name} Arena" for name in names], "Attend.": attend_g * np.ceil(g / 2), "Attend./G": attend_g
+    })
+    adv = adv.sort_values("PW", ascending=False, kind="stable")
+    tables["adv"] = format_table(adv, {
+        "Age": "1f", "W": "int", "L": "int", "PW": "int", "PL": "int", "MOV": "2f", "SOS": "2f", "SRS": "2f",
+        "ORtg": "1f", "DRtg": "1f", "NRtg": "+1f", "Pace": "1f", "FTr": "pct", "3PAr": "pct", "TS%": "pct",
+        "Off eFG%": "pct", "Off TOV%": "1f", "ORB%": "1f", "Off FT/FGA%": "pct", "Def eFG%": "pct",
+        "Def TOV%": "1f", "DRB%": "1f", "Def FT/FGA%": "pct", "Arena": "str", "Attend.": "comma", "Attend./G": "comma"
+    }, average=True, blank=("W", "L", "NRtg"))
+
+    box_formats = {col: "pct" if col.endswith("%") else "1f" for col in BOX_COLUMNS}
+    mp = 240 + np.clip(rng.normal(1.4, 0.6, n), 0, None)
+    for name, side, ascending in (("team", team, False), ("opp", opp, True)):
+        per_100 = pd.DataFrame({"Team": names, "G": g, **{col: side[col] for col in BOX_COLUMNS}})
+        per_game = per_100.copy()
+        per_game.insert(2, "MP", mp)
+        counts = [col for col in BOX_COLUMNS if not col.endswith("%")]
+        per_game[counts] = per_game[counts].mul(s["Pace"] / 100, axis=0)
+        # the per 100 tables have no league average row
+        tables[f"per_100_{name}"] = format_table(per_100.sort_values("PTS", ascending=ascending, kind="stable"),
+                                                 {"G": "int", **box_formats})
+        tables[f"per_game_{name}"] = format_table(per_game.sort_values("PTS", ascending=ascending, kind="stable"),
+                                                  {"G": "int", "MP": "1f", **box_formats}, average=True)
+
+    # shooting, in team name order
+    par = team["3PA"] / team["FGA"]
+    zones, zone_fg = s["zones"], s["zone_fg"]
+    fga_total = team["FGA"] * s["Pace"] / 100 * g
+    dunks = np.clip(rng.normal(0.059, 0.011, n), 0, 1)
+    layups = np.clip(rng.normal(0.272, 0.026, n), 0, 1)
+    heaves = rng.poisson(14.4 * g / 82)
+    shooting = pd.DataFrame(np.column_stack([
+        1 - par, zones * (1 - par)[:, None], par, team["2P%"], zone_fg, team["3P%"],
+        np.clip(rng.normal(0.518, 0.042, n), 0, 1), np.clip(rng.normal(0.829, 0.045, n), 0, 1),
+        dunks, np.rint(dunks * fga_total * 0.9), layups, np.rint(layups * fga_total * 0.55),
+        np.clip(rng.normal(0.231, 0.031, n), 0, 1), np.clip(rng.normal(0.388, 0.021, n), 0, 1),
+        heaves, rng.binomial(heaves, 0.02)
+    ]), columns=SHOOTING_COLUMNS)
+    shooting.insert(0, "Team", names)
+    shooting.insert(1, "G", g)
+    shooting.insert(2, "MP", np.rint(mp * g))
+    shooting.insert(3, "FG%", team["FG%"])
+    shooting.insert(4, "Dist.", (zones * (1 - par)[:, None]) @ ZONE_DIST + par * THREE_DIST)
+    shooting_formats = {"G": "int", "MP": "int", "FG%": "pct", "Dist.": "1f"}
+    for col in SHOOTING_COLUMNS:
+        shooting_formats[col] = "int" if col.endswith(("Md.", "Att.")) else "pct"
+    tables["shooting"] = format_table(shooting.sort_values("Team", kind="stable"), shooting_formats, average=True)
+    return tables
+
+
+def generate_league(league_dir, start_year, end_year, n_teams, n_games, tables, game_level, seed):
+    """
+    Generate one league and write its tables (and game store) under league_dir.
+
+    Args:
+        league_dir (str): Folder of the league (its tables go to league_dir/data/{year}).
+        start_year (int): First season.
+        end_year (int): Last season.
+        n_teams (int): Number of teams.
+        n_games (int): Games per team in a season.
+        tables (list): Tables to write.
+        game_level (bool): Also simulate the games and store them like fetch_games.py.
+        seed (np.random.SeedSequence): Seed of the league.
+    Returns:
+        tuple: (league_dir, rows written, bytes written)
+    """
+    rng = np.random.default_rng(seed)
+    width = len(str(n_teams))
+    names = [f"Team {i:0{width}d}" for i in range(1, n_teams + 1)]
+    means = dict(LEAGUE_MEANS)
+    z = rng.standard_normal((n_teams, len(SEASON_RHO)))
+
+    rows = size = 0
+    for year in range(start_year, end_year + 1):
+        if year > start_year:
+            means = step_league(rng, means)
+            z = step_teams(rng, z)
+        s = season_stats(rng, means, z)
+        games = simulate_games(rng, s["ORtg"], s["DRtg"], s["Pace"], n_games, year) if game_level else None
+
+        dir_path = os.path.join(league_dir, "data", str(year))
+        os.makedirs(dir_path, exist_ok=True)
+        for name, df in season_tables(rng, names, s, n_games, games).items():
+            if name not in tables:
+                continue
+            path = os.path.join(dir_path, f"{name}_{year}.csv")
+            df.to_csv(path, index=False)
+            rows += len(df)
+            size += os.path.getsize(path)
+
+        if games is not None:
+            # the game store paths are relative to the data folder's parent, like the pipeline scripts
+            with contextlib.chdir(league_dir):
+                team_ids = get_team_ids(names)
+                ids = np.array([team_ids[name] for name in names])
+                columns = {col: games[col] for col in GAME_COLUMNS}
+                columns["home"], columns["away"] = ids[games["home"]], ids[games["away"]]
+                write_game_days({col: columns[col].astype(dtype) for col, dtype in GAME_COLUMNS.items()}, year,
+                                refresh=True)
+            rows += len(games["date"])
+    return league_dir, rows, size
+
+
+def _generate(task):
+    return generate_league(*task)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", type=int, default=1, help="Number of leagues to generate")
+    parser.add_argument("--teams", type=int, default=30, help="Number of teams in each league")
+    parser.add_argument("--games", type=int, default=82, help="Games per team in a season")
+    parser.add_argument("--start_year", type=int, default=2000, help="First season of each league")
+    parser.add_argument("--end_year", type=int, default=2024, help="Last season of each league")
+    parser.add_argument("--table", type=str, default=None, choices=TABLES, nargs="+",
+                        help="Tables to write (if None, then write all)")
+    parser.add_argument("--game_level", action="store_true", help="Also simulate every game and write the game store of fetch_games.py")
+    parser.add_argument("--out_dir", type=str, default="./synthetic", help="Output folder (one league_{i} folder per league)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--n_jobs", type=int, default=1, help="Number of leagues generated in parallel")
+    args = parser.parse_args()
+
+    if args.teams < 2 or args.games < 1 or args.end_year < args.start_year:
+        print("ERROR: Need at least 2 teams, 1 game and 1 season")
+        exit()
+    if args.game_level and args.teams > np.iinfo(GAME_COLUMNS["home"]).max:
+        print(f"ERROR: The game store holds at most {np.iinfo(GAME_COLUMNS['home']).max} teams")
+        exit()
+
+    tables = args.table or TABLES
+    seeds = np.random.SeedSequence(args.seed).spawn(args.leagues)
+    tasks = [(os.path.join(args.out_dir, f"league_{i}"), args.start_year, args.end_year, args.teams, args.games,
+              tables, args.game_level, seeds[i]) for i in range(args.leagues)]
+
+    start = time.perf_counter()
+    total_rows = total_size = 0
+    with Pool(processes=args.n_jobs) if args.n_jobs > 1 else contextlib.nullcontext() as pool:
+        results = pool.imap_unordered(_generate, tasks) if pool else map(_generate, tasks)
+        for league_dir, rows, size in results:
+            total_rows += rows
+            total_size += size
+            print(f"Saved {args.end_year - args.start_year + 1} seasons of {args.teams} teams to: {league_dir}")
+    elapsed = time.perf_counter() - start
+    print(f"{total_rows:,} rows ({total_size / 1e6:.1f} MB) in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s)")
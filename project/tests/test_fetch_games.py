@@ -0,0 +1,91 @@
+import os
+import sys
+import numpy as np
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fetch_games
+
+
+def game_row(date, visitor, visitor_pts, home, home_pts):
+    return (f'<tr><th data-stat="date_game">{date}</th>'
+            f'<td data-stat="visitor_team_name">{visitor}</td><td data-stat="visitor_pts">{visitor_pts}</td>'
+            f'<td data-stat="home_team_name">{home}</td><td data-stat="home_pts">{home_pts}</td>'
+            f'<td data-stat="overtimes"></td></tr>')
+
+
+SEPARATOR = '<tr class="thead"><th colspan="10">Playoffs</th></tr>'
+
+APRIL_PAGE = "".join([
+    game_row("Sun, Apr 14, 2024", "Boston Celtics", 131, "Washington Wizards", 127),
+    SEPARATOR,
+    game_row("Sat, Apr 20, 2024", "Miami Heat", 94, "Boston Celtics", 114)
+])
+
+MAY_PAGE = "".join([
+    game_row("Wed, May 1, 2024", "Boston Celtics", 118, "Miami Heat", 84),
+    game_row("Tue, May 7, 2024", "Cleveland Cavaliers", 95, "Boston Celtics", 120)
+])
+
+
+def schedule_table(rows):
+    return BeautifulSoup(f"<table><tbody>{rows}</tbody></table>", "html.parser").find("table")
+
+
+def test_parse_separator_page():
+    games = fetch_games.parse_schedule_table(schedule_table(APRIL_PAGE))
+    assert [g["playoff"] for g in games] == [0, 1]
+
+
+def test_parse_may_page_after_playoffs_started():
+    games = fetch_games.parse_schedule_table(schedule_table(MAY_PAGE), playoff=1)
+    assert [g["playoff"] for g in games] == [1, 1]
+
+
+def fake_pages(monkeypatch, pages):
+    # serve the schedule tables from memory and record the requested month pages
+    requested = []
+
+    def scrape(url, div_id):
+        month = url.split("_games-")[1][:-len(".html")]
+        requested.append(month)
+        return schedule_table(pages[month]) if month in pages else None
+
+    monkeypatch.setattr(fetch_games, "scrape_table_by_div_id", scrape)
+    monkeypatch.setattr(fetch_games, "is_allowed", lambda url: True)
+    monkeypatch.setattr(fetch_games.time, "sleep", lambda s: None)
+    return requested
+
+
+def test_playoff_flag_carries_into_may(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fake_pages(monkeypatch, {"april": APRIL_PAGE, "may": MAY_PAGE})
+    fetch_games.fetch_season_games(2024, 2024)
+
+    games = fetch_games.load_games(2024)
+    may = games["date"] >= 20240501
+    assert may.sum() == 2
+    assert np.all(games["playoff"][may] == 1)
+    assert np.all(games["playoff"][games["date"] < 20240415] == 0)
+
+
+def test_refetch_starting_in_may_keeps_playoff_flag(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first_may_game = game_row("Wed, May 1, 2024", "Boston Celtics", 118, "Miami Heat", 84)
+    fake_pages(monkeypatch, {"april": APRIL_PAGE, "may": first_may_game})
+    fetch_games.fetch_season_games(2024, 2024)
+
+    # the next run starts from the month of the last complete day, past the page with the separator
+    requested = fake_pages(monkeypatch, {"may": MAY_PAGE})
+    fetch_games.fetch_season_games(2024, 2024)
+    assert requested == ["may", "june"]
+
+    games = fetch_games.load_games(2024)
+    assert games["date"][-1] == 20240507
+    assert np.all(games["playoff"][games["date"] >= 20240501] == 1)
+
+
+def test_month_slug_uses_calendar_year():
+    assert fetch_games.month_slug(2020, 20201005) == "october-2020"
+    assert fetch_games.month_slug(2020, 20191030) == "october-2019"
+    assert fetch_games.month_slug(2024, 20240507) == "may"
@@ -0,0 +1,175 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# lightweight pipeline instrumentation
+# span timers, counters (requests, bytes, rows, cache hits, ...) and peak RSS, enabled by the --trace flag of the
+# scripts. When tracing is off every call below returns after one check of a module global, so the instrumentation
+# can stay in the hot paths. When it is on, the events are written as a Chrome trace (open it in chrome://tracing or
+# https://ui.perfetto.dev) to ./traces/{script}_{time}.json and a summary table is printed when the script exits.
+
+TRACE_DIR = "./traces"
+
+# the active tracer (None when tracing is off)
+_tracer = None
+
+
+class _Tracer:
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.events = []
+        self.spans = {}
+        self.counters = {}
+
+    def now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+
+class _NullSpan:
+    # shared do-nothing span returned while tracing is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enabled():
+    return _tracer is not None
+
+
+def start(name=None, path=None):
+    """
+    Turn tracing on for the rest of the process. The trace file and summary are written at exit.
+
+    Args:
+        name (str): Name of the traced program (the script name if None), used in the default file name.
+        path (str): Trace file path (./traces/{name}_{time}.json if None).
+    """
+    global _tracer
+    if _tracer is not None:
+        return
+    name = name or os.path.splitext(os.path.basename(sys.argv[0]))[0] or "python"
+    path = path or os.path.join(TRACE_DIR, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    _tracer = _Tracer(path)
+    atexit.register(finish)
+
+
+@contextmanager
+def _span(name, args):
+    tracer = _tracer
+    start_us = tracer.now_us()
+    try:
+        yield
+    finally:
+        dur = tracer.now_us() - start_us
+        tracer.events.append({"name": name, "ph": "X", "ts": start_us, "dur": dur, "pid": tracer.pid,
+                              "tid": threading.get_ident(), "args": args})
+        stats = tracer.spans.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += dur
+        stats[2] = max(stats[2], dur)
+
+
+def span(name, **args):
+    """
+    Time a block: `with tracing.span("fetch", year=2024): ...`. The keyword arguments are stored with the event.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _span(name, args)
+
+
+def traced(name=None):
+    """
+    Decorator that records every call of a function as a span (named after the function if name is None).
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """
+    Add to a counter (e.g. "requests", "bytes", "rows", "cache hits"). The running total is also recorded as a
+    Chrome trace counter event.
+    """
+    if _tracer is None:
+        return
+    total = _tracer.counters.get(name, 0) + value
+    _tracer.counters[name] = total
+    _tracer.events.append({"name": name, "ph": "C", "ts": _tracer.now_us(), "pid": _tracer.pid, "args": {name: total}})
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on linux and bytes on macOS, None where the resource module is unavailable
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def summary():
+    """
+    Summary table of the spans (calls, total, mean and max time) and the counters.
+
+    Returns:
+        str: The table.
+    """
+    if _tracer is None:
+        return ""
+    lines = [f"{'span':<40} {'calls':>7} {'total ms':>11} {'mean ms':>10} {'max ms':>10}"]
+    for name, (calls, total, longest) in sorted(_tracer.spans.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name[:40]:<40} {calls:>7} {total / 1000:>11.1f} {total / calls / 1000:>10.2f} {longest / 1000:>10.2f}")
+    if _tracer.counters:
+        lines.append("")
+        lines.append(f"{'counter':<40} {'total':>11}")
+        for name, total in sorted(_tracer.counters.items()):
+            lines.append(f"{name[:40]:<40} {total:>11,}")
+    lines.append("")
+    rss = peak_rss_mb()
+    rss = f"{rss:.1f} MB" if rss is not None else "unavailable"
+    lines.append(f"wall time {_tracer.now_us() / 1e6:.2f}s, peak RSS {rss}")
+    return "\n".join(lines)
+
+
+def finish():
+    """
+    Write the trace file and print the summary (called at exit once tracing is on).
+    """
+    global _tracer
+    if _tracer is None:
+        return
+    tracer = _tracer
+    metadata = {"peak_rss_mb": peak_rss_mb(), "counters": tracer.counters, "argv": sys.argv}
+    events = [{"name": "process_name", "ph": "M", "pid": tracer.pid, "args": {"name": " ".join(sys.argv)}}]
+    os.makedirs(os.path.dirname(tracer.path) or ".", exist_ok=True)
+    with open(tracer.path, "w") as f:
+        json.dump({"traceEvents": events + tracer.events, "displayTimeUnit": "ms", "metadata": metadata}, f)
+
+    print("\n" + summary())
+    print(f"Trace saved to: {tracer.path}")
+    _tracer = None